@@ -0,0 +1,517 @@
+import discord
+from discord.ext import commands
+import logging
+import asyncio
+from datetime import datetime
+import os
+import sys
+import time
+import signal
+
+# Add the bot directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import Database
+from settings import SettingsResolver
+from services import Services, is_admin, is_user_admin
+from config import *
+
+# Custom Discord logging handler
+class DiscordLogHandler(logging.Handler):
+    def __init__(self, bot):
+        super().__init__()
+        self.bot = bot
+        self.log_channel = None
+        self.pending_sends = set()  # In-flight send tasks, capped at DISCORD_LOG_MAX_PENDING
+        self.dropped = 0
+        
+    async def setup_channel(self):
+        """Find or create the log channel"""
+        if not self.bot.guilds:
+            return
+            
+        guild = self.bot.guilds[0]  # Use first guild
+        
+        # Find or create admin category (shared with the other setup steps)
+        admin_category = await services.get_or_create_category(
+            guild,
+            ADMIN_CATEGORY,
+            overwrites={
+                guild.default_role: discord.PermissionOverwrite(read_messages=False),
+                guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True)
+            }
+        )
+        
+        # Find or create log channel
+        self.log_channel = discord.utils.get(guild.channels, name=LOG_CHANNEL)
+        if not self.log_channel:
+            self.log_channel = await guild.create_text_channel(
+                name=LOG_CHANNEL,
+                category=admin_category,
+                overwrites={
+                    guild.default_role: discord.PermissionOverwrite(read_messages=False),
+                    guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True)
+                }
+            )
+    
+    def emit(self, record):
+        """Send log record to Discord channel"""
+        if not ENABLE_DISCORD_LOGGING or not self.log_channel:
+            return
+            
+        guild_id = self.log_channel.guild.id
+        # Cache only: a cache miss must not turn a log call into a MongoDB read
+        if record.levelname not in services.settings.get_cached(guild_id, 'LOG_LEVELS_TO_DISCORD'):
+            return
+            
+        # Format the log message
+        log_msg = self.format(record)
+        
+        # Create embed based on log level
+        color = {
+            'ERROR': discord.Color.red(),
+            'WARNING': discord.Color.orange(),
+            'INFO': discord.Color.blue(),
+            'DEBUG': discord.Color.light_grey()
+        }.get(record.levelname, discord.Color.dark_grey())
+        
+        embed = discord.Embed(
+            title=f"{record.levelname} Log",
+            description=f"```\n{log_msg}\n```",
+            color=color,
+            timestamp=datetime.utcnow()
+        )
+        embed.add_field(name="Module", value=record.name, inline=True)
+        embed.add_field(name="Function", value=record.funcName or "N/A", inline=True)
+        embed.add_field(name="Line", value=record.lineno, inline=True)
+        
+        # Send to Discord (async), dropping logs instead of queueing without bound
+        if len(self.pending_sends) >= DISCORD_LOG_MAX_PENDING:
+            self.dropped += 1
+            return
+        
+        task = asyncio.create_task(self._send_to_discord(embed))
+        self.pending_sends.add(task)
+        task.add_done_callback(self.pending_sends.discard)
+    
+    async def _send_to_discord(self, embed):
+        """Async method to send embed to Discord"""
+        try:
+            if self.log_channel:
+                await self.log_channel.send(embed=embed)
+        except Exception as e:
+            # Don't log Discord logging errors to avoid recursion
+            print(f"Failed to send log to Discord: {e}")
+
+# Set up logging
+logging.basicConfig(
+    level=getattr(logging, LOGGING_LEVEL),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Bot setup with intents (all privileged intents enabled in Discord portal)
+intents = discord.Intents.default()
+intents.message_content = True  # Enabled - required for bot commands
+intents.members = True          # Enabled - for member events and info
+intents.guilds = True
+
+# In lazy member mode the guild is not chunked at startup; only members that
+# join while the bot is online are cached, everything else is fetched on demand
+if LAZY_MEMBER_CACHE:
+    member_cache_flags = discord.MemberCacheFlags.none()
+    member_cache_flags.joined = True
+else:
+    member_cache_flags = discord.MemberCacheFlags.from_intents(intents)
+
+# Presence is sent with every IDENTIFY, so reconnects don't need change_presence
+bot = commands.Bot(
+    command_prefix=COMMAND_PREFIX,
+    intents=intents,
+    help_command=None,
+    chunk_guilds_at_startup=not LAZY_MEMBER_CACHE,
+    max_messages=MESSAGE_CACHE_SIZE,
+    member_cache_flags=member_cache_flags,
+    activity=discord.Activity(type=discord.ActivityType.watching, name="the server | !help")
+)
+
+# Initialize database
+db = Database()
+
+# Initialize Discord logging handler
+discord_handler = DiscordLogHandler(bot)
+discord_handler.setLevel(getattr(logging, LOGGING_LEVEL))
+discord_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+# Add Discord handler to root logger
+if ENABLE_DISCORD_LOGGING:
+    logging.getLogger().addHandler(discord_handler)
+
+# Shared services and state, injected into the extensions in bot/cogs
+services = Services(bot, db, SettingsResolver(db, ttl=CONFIG_CACHE_TTL, retry_ttl=CONFIG_RETRY_TTL), discord_handler)
+bot.services = services
+
+# Global variables for shutdown
+shutdown_task = None  # Set once a shutdown signal has been received
+
+def available_extensions():
+    """Names of the extensions in bot/cogs"""
+    cogs_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cogs')
+    return sorted(name[:-3] for name in os.listdir(cogs_dir) if name.endswith('.py') and not name.startswith('_'))
+
+@bot.event
+async def setup_hook():
+    """Load the extensions and install signal handlers before connecting to the gateway"""
+    if ENABLE_DISCORD_LOGGING:
+        services.add_startup_step('discord_logging', discord_handler.setup_channel)
+    if SYNC_APP_COMMANDS:
+        services.add_startup_step('app_commands', sync_app_commands)
+    
+    # Extensions register their own setup steps, message stages, views and loops
+    for name in EXTENSIONS:
+        try:
+            await bot.load_extension(f"cogs.{name}")
+            logger.info(f"Loaded extension {name}")
+        except commands.ExtensionError as e:
+            logger.error(f"Failed to load extension {name}: {e}")
+    
+    # Drain in-memory work before exiting on docker stop / docker-compose restart
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, request_shutdown, sig.name)
+        except NotImplementedError:
+            pass  # Signal handlers are unavailable on Windows
+
+async def sync_app_commands():
+    """Register the slash versions of the hybrid commands with Discord, returns how many were synced
+    
+    Synced globally rather than per guild: a reloaded extension replaces the
+    global commands in the tree, so the slash commands keep running its new code.
+    """
+    synced = await bot.tree.sync()
+    logger.info(f"Synced {len(synced)} slash commands")
+    return len(synced)
+
+def request_shutdown(signal_name):
+    """Start the graceful shutdown once, whichever signal arrives first"""
+    global shutdown_task
+    if shutdown_task is None:
+        logger.info(f"Received {signal_name}, shutting down gracefully")
+        shutdown_task = asyncio.create_task(graceful_shutdown())
+
+async def graceful_shutdown(timeout=SHUTDOWN_TIMEOUT):
+    """Stop taking new events, drain or persist every in-memory queue within the deadline, then close
+    
+    Order matters: message stages finish first (they feed the XP rollups and log
+    sends), then every extension drains its own queues (XP rollups, mute timers),
+    log sends drain while the gateway is still up, then MongoDB and Discord are
+    closed. Returns what was flushed.
+    """
+    deadline = time.monotonic() + timeout
+    report = {}
+    
+    def remaining():
+        return max(0.0, deadline - time.monotonic())
+    
+    # In-flight message stages (XP, activity, message logs)
+    stages = set(services.message_stage_tasks)
+    if stages:
+        done, pending = await asyncio.wait(stages, timeout=remaining())
+        for task in pending:
+            task.cancel()
+        report['message stages'] = f"{len(done)} finished, {len(pending)} cancelled"
+    
+    # Daily XP rollups go to MongoDB (or the spool), mute timers are already persisted
+    for name, cog in list(bot.cogs.items()):
+        drain = getattr(cog, 'drain', None)
+        if drain:
+            try:
+                report.update(await drain())
+            except Exception as e:
+                logger.error(f"Error draining {name}: {e}")
+    
+    # Log sends need the gateway connection, so drain them before closing it
+    sends = set(discord_handler.pending_sends)
+    if sends:
+        done, pending = await asyncio.wait(sends, timeout=remaining())
+        for task in pending:
+            task.cancel()
+        report['log sends'] = f"{len(done)} sent, {len(pending)} cancelled"
+    
+    db.spool.sync()
+    pending_spool = db.spool.pending()
+    if pending_spool:
+        report['spool'] = f"{pending_spool} bytes left for replay on the next start"
+    
+    summary = ", ".join(f"{name}: {result}" for name, result in report.items()) or "nothing pending"
+    logger.info(f"Shutdown drained in {timeout - remaining():.1f}s ({summary})")
+    
+    # Close MongoDB before Discord: bot.close() ends bot.run, which cancels this task
+    services.card_renderer.shutdown()
+    db.close_connection()
+    await bot.close()
+    return report
+
+@bot.event
+async def on_ready():
+    """Event triggered when bot is ready"""
+    logger.info(f'{bot.user} has connected to Discord!')
+    logger.info(f'Bot is in {len(bot.guilds)} guilds')
+    
+    # on_ready fires again on every reconnect; channel setup only runs once per process
+    if services.startup_task is None:
+        services.startup_task = asyncio.create_task(services.run_startup())
+    else:
+        logger.info("Reconnected to Discord, skipping channel setup")
+
+@bot.event
+async def on_message(message):
+    """Handle message events
+    
+    Blocking checks and command dispatch run first so command latency never
+    includes logging or database writes; side-effect stages then run
+    concurrently in the background. Stages are registered by the extensions.
+    """
+    if message.author.bot or shutdown_task:
+        return
+    
+    blocked = False
+    for name, check in list(services.message_checks.items()):
+        if await timed_message_stage(name, check, message):
+            blocked = True
+            break
+    
+    if not blocked:
+        await timed_message_stage('commands', dispatch_commands_stage, message)
+    
+    if message.guild is None:
+        return
+    
+    for name, (stage, run_when_blocked) in list(services.message_stages.items()):
+        if blocked and not run_when_blocked:
+            continue
+        task = asyncio.create_task(timed_message_stage(name, stage, message))
+        services.message_stage_tasks.add(task)
+        task.add_done_callback(services.message_stage_tasks.discard)
+
+async def timed_message_stage(name, stage, message):
+    """Run one message pipeline stage, recording its duration and isolating its errors"""
+    stats = services.message_stage_stats.setdefault(name, {'runs': 0, 'errors': 0, 'total': 0.0, 'max': 0.0})
+    start = time.perf_counter()
+    try:
+        return await stage(message)
+    except Exception as e:
+        stats['errors'] += 1
+        logger.error(f"Error in message stage {name}: {e}")
+    finally:
+        elapsed = time.perf_counter() - start
+        stats['runs'] += 1
+        stats['total'] += elapsed
+        stats['max'] = max(stats['max'], elapsed)
+
+async def dispatch_commands_stage(message):
+    """Dispatch commands (and the !help auto-response)"""
+    # Auto-respond to !help
+    if message.content.lower() == '!help':
+        await send_help_message(message.channel, message.author)
+        return
+    
+    await bot.process_commands(message)
+
+async def send_help_message(channel, user=None):
+    """Send help message with commands based on user permissions"""
+    # Check if user has admin permissions
+    user_is_admin = is_user_admin(user)
+    
+    embed = discord.Embed(
+        title="Bot Commands Help 📚",
+        description="Here are the available commands:",
+        color=discord.Color.blue()
+    )
+    
+    # Role Management
+    embed.add_field(
+        name="🎭 Role Management",
+        value="`!role <role_name>` - Request a role\n`!myroles` - View your current roles",
+        inline=False
+    )
+    
+    # Admin Commands (only show if user is admin), split so each field stays under Discord's 1024 characters
+    if user_is_admin:
+        embed.add_field(
+            name="🛡️ Admin: Moderation",
+            value="`!kick <user> [reason]` - Kick a member\n`!ban <user> [reason]` - Ban a member\n`!unban <user_id>` - Unban a member\n`!mute <user> [time] [reason]` - Mute a member\n`!unmute <user>` - Unmute a member\n`!purge <amount>` - Delete messages\n`!purge filter <filters>` - Delete messages by user/regex/attachments/age\n`!audit [filters]` - Query the admin audit log\n`!audit export [filters] [format: csv]` - Download the audit log",
+            inline=False
+        )
+        embed.add_field(
+            name="🛡️ Admin: Leveling",
+            value="`!resetlevel <user>` - Reset user's level and XP\n`!setlevel <user> <level>` - Set user's level\n`!addxp <user> <amount>` - Add/remove XP points\n`!synclevelroles` - Sync level roles for users without them\n`!reconcileroles [apply]` - Reconcile all level roles (dry run without apply)\n`!updateroles` - Update role names to include XP\n`!provisionroles` - Create and order all level roles ahead of time\n`!levelstats [rebuild]` - Show leveling system statistics\n`!recomputelevels [apply]` - Recompute levels after an XP curve change\n`!spamstats` - Show XP spam filter counters",
+            inline=False
+        )
+        embed.add_field(
+            name="🛡️ Admin: Server and Bot",
+            value="`!syncusers` - Sync all server members to database\n`!activity [period]` - Show activity heatmap and DAU/WAU/MAU\n`!memory [now]` - Show memory usage and cache sizes\n`!pipeline` - Show message pipeline stage timings\n`!dbstatus [replay]` - Show database breaker and spool state\n`!config` - Show server settings\n`!config set <setting> <value>` - Override a setting for this server\n`!config reset <setting>` - Restore a setting's default\n`!ext [load|unload|reload <name>|sync]` - Manage extensions without a restart\n`!bugs [status] [page]` - List bug reports\n`!bugstatus <bug_id> <status>` - Update a bug report's status\n`!testlog` - Test Discord logging\n`!testmessagelog` - Test message logging",
+            inline=False
+        )
+    
+    # Leveling Commands
+    embed.add_field(
+        name="📈 Leveling System",
+        value="`!level [user]` - Check level and XP\n`!leaderboard [page]` - Show server leaderboard\n`!topxp [week|month|<n>d|date [date]]` - XP earned in a period\n`!rank [user]` - Alias for !level",
+        inline=False
+    )
+    
+    # Dev Commands
+    embed.add_field(
+        name="💻 Dev Commands",
+        value="`!fixmybug <description>` - Submit a bug report\n`!resources [page]` - View shared resources\n`!resources search <terms>` - Search shared resources",
+        inline=False
+    )
+    
+    # General
+    embed.add_field(
+        name="ℹ️ General",
+        value="`!help` - Show this help message\n`!ping` - Check bot latency",
+        inline=False
+    )
+    
+    embed.add_field(
+        name="Available Roles",
+        value=", ".join(AVAILABLE_ROLES),
+        inline=False
+    )
+    
+    # Add footer based on admin status
+    if user_is_admin:
+        embed.set_footer(text="👑 Admin privileges active • Use commands responsibly!")
+    else:
+        embed.set_footer(text="💡 Tip: Get admin role to see additional commands!")
+    
+    await channel.send(embed=embed)
+# Utility Commands
+@bot.command(name='help')
+async def help_command(ctx):
+    """Show help message with role-based commands"""
+    await send_help_message(ctx.channel, ctx.author)
+    logger.info(f"Help command used by {ctx.author} ({ctx.author.id})")
+
+@bot.command(name='ping')
+async def ping(ctx):
+    """Check bot latency"""
+    latency = round(bot.latency * 1000)
+    embed = discord.Embed(
+        title="🏓 Pong!",
+        description=f"Bot latency: **{latency}ms**",
+        color=discord.Color.green()
+    )
+    await ctx.send(embed=embed)
+    
+    # Test Discord logging
+    logger.info(f"Ping command used by {ctx.author} ({ctx.author.id}) - Latency: {latency}ms")
+
+@bot.group(name='ext', invoke_without_command=True)
+@is_admin()
+async def list_extensions(ctx):
+    """List the extensions and which are loaded (Admin only)"""
+    lines = [
+        f"{'🟢' if f'cogs.{name}' in bot.extensions else '⚪'} `{name}`"
+        for name in available_extensions()
+    ]
+    embed = discord.Embed(
+        title="🧩 Extensions",
+        description="\n".join(lines) or "No extensions found",
+        color=discord.Color.blue(),
+        timestamp=datetime.utcnow()
+    )
+    embed.set_footer(text="!ext load|unload|reload <name> • !ext sync • caches and queues survive a reload")
+    await ctx.send(embed=embed)
+
+async def manage_extension(ctx, action, name):
+    """Load, unload or reload one extension and report the outcome"""
+    name = name.lower()
+    if name not in available_extensions():
+        await ctx.send(f"❌ Unknown extension. Use one of: {', '.join(available_extensions())}")
+        return
+    
+    method = {'load': bot.load_extension, 'unload': bot.unload_extension, 'reload': bot.reload_extension}[action]
+    start = time.perf_counter()
+    try:
+        await method(f"cogs.{name}")
+    except commands.ExtensionError as e:
+        logger.error(f"Failed to {action} extension {name}: {e}")
+        await ctx.send(f"❌ Could not {action} `{name}`: {e}")
+        return
+    elapsed = time.perf_counter() - start
+    
+    # Log the action
+    db.log_admin_action(
+        admin_id=ctx.author.id,
+        admin_username=str(ctx.author),
+        action='extension',
+        reason=f"{action.title()}ed extension {name}",
+        guild_id=ctx.guild.id
+    )
+    
+    await ctx.send(f"✅ {action.title()}ed `{name}` in {elapsed * 1000:.0f} ms.")
+    logger.info(f"{ctx.author} {action}ed extension {name}")
+
+@list_extensions.command(name='load')
+@is_admin()
+async def load_extension(ctx, name: str):
+    """Load an extension (Admin only)"""
+    await manage_extension(ctx, 'load', name)
+
+@list_extensions.command(name='unload')
+@is_admin()
+async def unload_extension(ctx, name: str):
+    """Unload an extension (Admin only)"""
+    await manage_extension(ctx, 'unload', name)
+
+@list_extensions.command(name='reload')
+@is_admin()
+async def reload_extension(ctx, name: str):
+    """Reload an extension's code without restarting the bot (Admin only)"""
+    await manage_extension(ctx, 'reload', name)
+
+@list_extensions.command(name='sync')
+@is_admin()
+async def sync_extension_commands(ctx):
+    """Re-register the slash commands after an extension added, removed or changed one (Admin only)"""
+    try:
+        count = await sync_app_commands()
+        await ctx.send(f"✅ Synced {count} slash commands.")
+    except Exception as e:
+        logger.error(f"Error syncing slash commands: {e}")
+        await ctx.send("An error occurred while syncing slash commands.")
+
+# Error Handling
+@bot.event
+async def on_command_error(ctx, error):
+    """Handle command errors"""
+    if isinstance(error, commands.CommandNotFound):
+        return  # Ignore unknown commands
+    elif isinstance(error, commands.MissingPermissions):
+        await ctx.send("You don't have permission to use this command.")
+    elif isinstance(error, commands.MissingRequiredArgument):
+        await ctx.send("Missing required argument. Use `!help` for command usage.")
+    elif isinstance(error, commands.BadArgument):
+        await ctx.send("Invalid argument provided. Use `!help` for command usage.")
+    else:
+        logger.error(f"Unhandled error: {error}")
+        await ctx.send("An unexpected error occurred.")
+
+def run():
+    """Run the bot until it is shut down"""
+    if not BOT_TOKEN:
+        logger.error("BOT_TOKEN not found in environment variables")
+        sys.exit(1)
+    
+    try:
+        bot.run(BOT_TOKEN)
+    except Exception as e:
+        logger.error(f"Failed to start bot: {e}")
+        sys.exit(1)
+    finally:
+        # Safe to repeat if graceful_shutdown already closed it
+        db.close_connection()
\ No newline at end of file
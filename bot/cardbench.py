@@ -0,0 +1,116 @@
+"""Throughput benchmark for the rank and leaderboard cards
+
+Usage:
+    python bot/cardbench.py [--cards 200] [--workers 1 2 4] [--font path.ttf]
+
+Reports cards/s for rendering inline (what the event loop would pay per card),
+through the CardRenderer process pool at each worker count, and for cache hits.
+Needs no Discord or MongoDB connection; avatars are generated locally.
+"""
+import argparse
+import asyncio
+import io
+import logging
+import os
+import random
+import sys
+import time
+
+from PIL import Image
+
+# Add the bot directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from cards import CardRenderer, render_leaderboard, render_rank_card
+
+logger = logging.getLogger(__name__)
+
+def sample_avatar(size=256):
+    """A noisy PNG avatar, about as expensive to decode as a real one"""
+    image = Image.effect_noise((size, size), 64).convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def sample_rank_card(i, avatar, font_path):
+    level = random.randint(1, 80)
+    return {
+        'name': f"Benchmark Member {i}",
+        'level': level,
+        'rank': random.randint(1, 100000),
+        'xp': level * 1000 + random.randint(0, 999),
+        'level_xp': level * 1000,
+        'next_level_xp': (level + 1) * 1000,
+        'messages': random.randint(0, 50000),
+        'avatar': avatar,
+        'accent': None,
+        'font_path': font_path
+    }
+
+def sample_leaderboard(i, font_path):
+    rows = [(i * 10 + j + 1, f"Member {i * 10 + j}", 50 - j, 100000 - j * 1000, random.random()) for j in range(10)]
+    return {'title': "Server Leaderboard", 'subtitle': f"Page {i + 1}", 'rows': rows, 'font_path': font_path}
+
+def bench_inline(cards):
+    """Render every card in this process, returns cards/s"""
+    start = time.perf_counter()
+    for kind, card in cards:
+        (render_rank_card if kind == 'rank' else render_leaderboard)(card)
+    return len(cards) / (time.perf_counter() - start)
+
+async def bench_pool(cards, workers):
+    """Render every card through a CardRenderer with unique keys, returns (cards/s, cache hits/s)"""
+    renderer = CardRenderer(workers=workers, cache_size=len(cards) + 1)
+    
+    def builder(card):
+        async def build():
+            return card
+        return build
+    
+    try:
+        # Start the worker processes outside the timed section
+        await renderer.render(cards[0][0], ('warmup',), builder(cards[0][1]))
+        
+        start = time.perf_counter()
+        await asyncio.gather(*(renderer.render(kind, (i,), builder(card)) for i, (kind, card) in enumerate(cards)))
+        rendered = len(cards) / (time.perf_counter() - start)
+        
+        start = time.perf_counter()
+        for i, (kind, card) in enumerate(cards):
+            await renderer.render(kind, (i,), builder(card))
+        cached = len(cards) / (time.perf_counter() - start)
+        return rendered, cached
+    finally:
+        renderer.shutdown()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark rank and leaderboard card rendering")
+    parser.add_argument('--cards', type=int, default=200, help="Cards per run (9 rank cards to 1 leaderboard)")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, os.cpu_count() or 1])
+    parser.add_argument('--font', default=os.getenv('CARD_FONT_PATH', ''), help="TrueType font (Pillow's bundled font by default)")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(
+        level=getattr(logging, os.getenv('LOGGING_LEVEL', 'INFO')),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    avatar = sample_avatar()
+    cards = [
+        ('leaderboard', sample_leaderboard(i, args.font)) if i % 10 == 9 else ('rank', sample_rank_card(i, avatar, args.font))
+        for i in range(args.cards)
+    ]
+    
+    inline = bench_inline(cards)
+    print(f"{'mode':<18} {'cards/s':>10} {'ms/card':>9}  ({args.cards} cards, {os.cpu_count()} CPUs)")
+    print(f"{'inline':<18} {inline:>10.1f} {1000 / inline:>9.2f}")
+    
+    cached = None
+    for workers in sorted(set(args.workers)):
+        rendered, cached = asyncio.run(bench_pool(cards, workers))
+        print(f"{f'pool x{workers}':<18} {rendered:>10.1f} {1000 / rendered:>9.2f}")
+    if cached:
+        print(f"{'cache hit':<18} {cached:>10.1f} {1000 / cached:>9.3f}")
+
+if __name__ == "__main__":
+    main()
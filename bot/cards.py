@@ -0,0 +1,246 @@
+import asyncio
+import io
+import logging
+import multiprocessing
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+logger = logging.getLogger(__name__)
+
+# Colours shared by every card
+BACKGROUND = (35, 39, 42)
+PANEL = (47, 49, 54)
+TEXT = (255, 255, 255)
+MUTED = (185, 187, 190)
+ACCENT = (88, 101, 242)
+BAR_TRACK = (72, 75, 81)
+MEDALS = {1: (255, 196, 0), 2: (192, 192, 192), 3: (205, 127, 50)}
+
+RANK_CARD_SIZE = (934, 282)
+AVATAR_SIZE = 200
+BOARD_WIDTH = 800
+BOARD_ROW_HEIGHT = 64
+BOARD_HEADER_HEIGHT = 80
+
+@lru_cache(maxsize=32)
+def load_font(size, font_path=''):
+    """A TrueType font at a size (per process), Pillow's bundled font when no path is set"""
+    if font_path:
+        try:
+            return ImageFont.truetype(font_path, size)
+        except OSError as e:
+            logger.warning(f"Could not load card font {font_path}, using the default: {e}")
+    return ImageFont.load_default(size=size)
+
+def fit_text(draw, text, font, max_width):
+    """Shorten text with an ellipsis until it fits max_width pixels"""
+    if draw.textlength(text, font=font) <= max_width:
+        return text
+    while text and draw.textlength(text + "…", font=font) > max_width:
+        text = text[:-1]
+    return text + "…"
+
+def draw_progress_bar(draw, box, fraction, color):
+    """Rounded progress bar filled to fraction (0-1)"""
+    left, top, right, bottom = box
+    radius = (bottom - top) // 2
+    draw.rounded_rectangle(box, radius=radius, fill=BAR_TRACK)
+    fraction = max(0.0, min(1.0, fraction))
+    if fraction > 0:
+        filled = left + max(2 * radius, int((right - left) * fraction))
+        draw.rounded_rectangle((left, top, filled, bottom), radius=radius, fill=color)
+
+def circular_avatar(avatar_bytes, size):
+    """Avatar image cropped to a circle, or a plain disc when there is none"""
+    mask = Image.new('L', (size, size), 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, size - 1, size - 1), fill=255)
+    if avatar_bytes:
+        try:
+            avatar = Image.open(io.BytesIO(avatar_bytes)).convert('RGBA').resize((size, size), Image.LANCZOS)
+        except Exception:
+            avatar = Image.new('RGBA', (size, size), ACCENT)
+    else:
+        avatar = Image.new('RGBA', (size, size), ACCENT)
+    avatar.putalpha(mask)
+    return avatar
+
+def encode_png(image):
+    """PNG bytes of a card; fast zlib level, the cards are mostly flat colour and still compress well"""
+    buffer = io.BytesIO()
+    image.convert('RGB').save(buffer, format='PNG', compress_level=1)
+    return buffer.getvalue()
+
+def render_rank_card(card):
+    """Render a rank card to PNG bytes (runs in a worker process)
+    
+    card holds name, level, rank, xp, level_xp (XP at the start of the level),
+    next_level_xp, messages, avatar (image bytes or None), accent (RGB) and font_path.
+    """
+    image = Image.new('RGBA', RANK_CARD_SIZE, BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    draw.rounded_rectangle((16, 16, RANK_CARD_SIZE[0] - 16, RANK_CARD_SIZE[1] - 16), radius=24, fill=PANEL)
+    accent = tuple(card.get('accent') or ACCENT)
+    font_path = card.get('font_path', '')
+    
+    avatar_top = (RANK_CARD_SIZE[1] - AVATAR_SIZE) // 2
+    image.alpha_composite(circular_avatar(card.get('avatar'), AVATAR_SIZE), (40, avatar_top))
+    
+    left = 40 + AVATAR_SIZE + 40
+    right = RANK_CARD_SIZE[0] - 50
+    name_font = load_font(44, font_path)
+    stat_font = load_font(30, font_path)
+    small_font = load_font(24, font_path)
+    
+    # Rank and level in the top right, the name takes whatever width is left
+    stats = f"RANK #{card['rank']}" if card.get('rank') else "UNRANKED"
+    stats += f"   LEVEL {card['level']}"
+    stats_width = draw.textlength(stats, font=stat_font)
+    draw.text((right - stats_width, 52), stats, font=stat_font, fill=accent)
+    name = fit_text(draw, card['name'], name_font, right - left - stats_width - 30)
+    draw.text((left, 44), name, font=name_font, fill=TEXT)
+    
+    # XP within the current level
+    level_span = max(1, card['next_level_xp'] - card['level_xp'])
+    progress = card['xp'] - card['level_xp']
+    xp_text = f"{card['xp']:,} / {card['next_level_xp']:,} XP"
+    draw.text((right - draw.textlength(xp_text, font=small_font), 130), xp_text, font=small_font, fill=MUTED)
+    draw.text((left, 130), f"{card['messages']:,} messages", font=small_font, fill=MUTED)
+    draw_progress_bar(draw, (left, 175, right, 215), progress / level_span, accent)
+    
+    return encode_png(image)
+
+def render_leaderboard(board):
+    """Render a leaderboard page to PNG bytes (runs in a worker process)
+    
+    board holds title, subtitle, font_path and rows of (position, name, level,
+    xp, progress) where progress is the fraction of the current level completed.
+    """
+    rows = board['rows']
+    height = BOARD_HEADER_HEIGHT + BOARD_ROW_HEIGHT * len(rows) + 20
+    image = Image.new('RGBA', (BOARD_WIDTH, height), BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    font_path = board.get('font_path', '')
+    title_font = load_font(36, font_path)
+    row_font = load_font(26, font_path)
+    small_font = load_font(20, font_path)
+    
+    draw.text((30, 22), board['title'], font=title_font, fill=TEXT)
+    if board.get('subtitle'):
+        subtitle_width = draw.textlength(board['subtitle'], font=small_font)
+        draw.text((BOARD_WIDTH - 30 - subtitle_width, 34), board['subtitle'], font=small_font, fill=MUTED)
+    
+    for i, (position, name, level, xp, progress) in enumerate(rows):
+        top = BOARD_HEADER_HEIGHT + i * BOARD_ROW_HEIGHT
+        draw.rounded_rectangle((20, top, BOARD_WIDTH - 20, top + BOARD_ROW_HEIGHT - 8), radius=12, fill=PANEL)
+        color = MEDALS.get(position, TEXT)
+        draw.text((38, top + 14), f"#{position}", font=row_font, fill=color)
+        
+        stats = f"Lv {level}  ·  {xp:,} XP"
+        stats_width = draw.textlength(stats, font=small_font)
+        draw.text((BOARD_WIDTH - 40 - stats_width, top + 10), stats, font=small_font, fill=MUTED)
+        draw_progress_bar(draw, (BOARD_WIDTH - 40 - stats_width, top + 38, BOARD_WIDTH - 40, top + 46), progress, ACCENT)
+        draw.text((120, top + 14), fit_text(draw, name, row_font, BOARD_WIDTH - 200 - stats_width - 40), font=row_font, fill=TEXT)
+    
+    return encode_png(image)
+
+RENDERERS = {'rank': render_rank_card, 'leaderboard': render_leaderboard}
+
+def worker_context():
+    """Multiprocessing context for render workers
+    
+    Not fork: the bot process already runs threads (pymongo monitors, to_thread
+    workers) whose locks a forked child could inherit held. A fork server started
+    with this module preloaded forks each worker with Pillow already imported;
+    spawn is the fallback where there is no fork server. Either way a worker
+    re-runs the main script, so entry points keep their top level to an import.
+    """
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload(['cards'])
+    return context
+
+class CardRenderer:
+    """Renders cards in a process pool and keeps the PNGs in an LRU cache
+    
+    Most of Pillow's drawing and the text layout hold the GIL, so a thread pool
+    would still stall the gateway; worker processes keep the CPU work off the
+    event loop entirely. Callers pick the cache key: it must change whenever the card
+    would look different (for rank cards: user, XP bucket, avatar hash).
+    Concurrent requests for the same key share one render.
+    """
+    def __init__(self, workers=2, cache_size=256):
+        self.workers = workers
+        self.cache_size = cache_size
+        self.executor = None  # Started on first render, so disabled cards cost no processes
+        self.cache = OrderedDict()  # key -> PNG bytes
+        self.pending = {}  # key -> future of a render in progress
+        self.hits = 0
+        self.misses = 0
+        self.render_time = 0.0  # Seconds spent rendering, summed over misses
+    
+    def __len__(self):
+        return len(self.cache)
+    
+    def cached_bytes(self):
+        return sum(len(png) for png in self.cache.values())
+    
+    async def render(self, kind, key, build):
+        """PNG bytes for a card, from the cache or rendered in the pool
+        
+        build is a coroutine function returning the card data; it only runs on a
+        cache miss, so avatar downloads are skipped for cached cards.
+        """
+        key = (kind,) + tuple(key)
+        png = self.cache.get(key)
+        if png is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return png
+        
+        future = self.pending.get(key)
+        if future is not None:
+            self.hits += 1  # Shares a render already in progress
+        else:
+            self.misses += 1
+            future = asyncio.ensure_future(self._render(kind, key, build))
+            self.pending[key] = future
+            future.add_done_callback(lambda _: self.pending.pop(key, None))
+        return await asyncio.shield(future)
+    
+    async def _render(self, kind, key, build):
+        data = await build()
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=worker_context())
+        
+        start = time.perf_counter()
+        png = await asyncio.get_running_loop().run_in_executor(self.executor, RENDERERS[kind], data)
+        self.render_time += time.perf_counter() - start
+        
+        self.cache[key] = png
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return png
+    
+    def clear(self):
+        self.cache.clear()
+    
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'cached': len(self.cache),
+            'cached_kb': self.cached_bytes() / 1024,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'avg_render_ms': self.render_time / self.misses * 1000 if self.misses else 0.0
+        }
+    
+    def shutdown(self):
+        """Stop the worker processes once their current card is done"""
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
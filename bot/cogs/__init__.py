@@ -0,0 +1,3 @@
+# Discord Bot Extensions
+# Each module is loaded with bot.load_extension("cogs.<name>") and gets the
+# shared services through bot.services, see bot/services.py
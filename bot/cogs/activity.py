@@ -0,0 +1,210 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+
+import discord
+from discord.ext import commands, tasks
+
+from config import *
+from hyperloglog import HyperLogLog
+from services import is_admin, parse_leaderboard_period
+
+logger = logging.getLogger(__name__)
+
+HEATMAP_SHADES = " ░▒▓█"
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+def new_activity_bucket():
+    """In-memory activity of one guild for one UTC day"""
+    return {'hours': [0] * 24, 'channels': Counter(), 'users': HyperLogLog(ACTIVITY_HLL_PRECISION)}
+
+def merge_activity_bucket(into, bucket):
+    for hour, count in enumerate(bucket['hours']):
+        into['hours'][hour] += count
+    into['channels'].update(bucket['channels'])
+    if into['users'].m == bucket['users'].m:
+        into['users'].merge(bucket['users'])
+
+def unique_users(days, first_day, last_day):
+    """Estimated distinct active users over [first_day, last_day] from the daily sketches"""
+    sketches = [bucket['users'] for day, bucket in days.items() if first_day <= day <= last_day]
+    if len({sketch.m for sketch in sketches}) > 1:
+        # ACTIVITY_HLL_PRECISION changed within the range, count only the current precision
+        sketches = [sketch for sketch in sketches if sketch.p == ACTIVITY_HLL_PRECISION]
+    return HyperLogLog.union(sketches, ACTIVITY_HLL_PRECISION).count()
+
+def build_activity_heatmap(days):
+    """Render messages per weekday and UTC hour as a text heatmap"""
+    grid = [[0] * 24 for _ in range(7)]
+    for day, bucket in days.items():
+        for hour, count in enumerate(bucket['hours']):
+            grid[day.weekday()][hour] += count
+    
+    peak = max(max(row) for row in grid)
+    if not peak:
+        return "No data"
+    
+    lines = ["    " + "".join(f"{hour:<6}" for hour in range(0, 24, 6))]
+    for weekday, row in zip(WEEKDAYS, grid):
+        cells = "".join(HEATMAP_SHADES[-(-count * (len(HEATMAP_SHADES) - 1) // peak)] for count in row)
+        lines.append(f"{weekday} {cells}")
+    return "```\n" + "\n".join(lines) + "\n```"
+
+class Activity(commands.Cog):
+    """Activity analytics: per-channel and per-hour message counts and unique active users"""
+    def __init__(self, bot, services):
+        self.bot = bot
+        self.services = services
+        self.db = services.db
+    
+    async def cog_load(self):
+        self.services.add_message_stage('activity_stats', self.record_activity_stage)
+        self.activity_flush_loop.start()
+    
+    async def cog_unload(self):
+        self.services.remove_message_stage('activity_stats')
+        self.activity_flush_loop.cancel()
+        # Buckets stay in services.activity_buckets, a reloaded cog keeps counting into them
+        await self.flush_activity()
+    
+    async def drain(self):
+        """Flush activity buckets on shutdown (to MongoDB, or to the spool if it is unavailable)"""
+        self.activity_flush_loop.cancel()
+        pending = len(self.services.activity_buckets)
+        await self.flush_activity()
+        return {'activity buckets': f"{pending} flushed"}
+    
+    async def record_activity_stage(self, message):
+        """Count a message by hour and channel and add its author to the day's unique-user sketch"""
+        now = datetime.utcnow()
+        key = (message.guild.id, datetime(now.year, now.month, now.day))
+        bucket = self.services.activity_buckets.get(key)
+        if bucket is None:
+            bucket = self.services.activity_buckets[key] = new_activity_bucket()
+        
+        # Threads count towards their parent channel
+        channel_id = getattr(message.channel, 'parent_id', None) or message.channel.id
+        bucket['hours'][now.hour] += 1
+        bucket['channels'][channel_id] += 1
+        bucket['users'].add(message.author.id)
+    
+    async def flush_activity(self):
+        """Write all pending activity buckets to the database in one bulk write
+        
+        The buckets are swapped out and merged back on the event loop, where
+        the message stage counts into them; only the write runs in a thread.
+        """
+        pending, self.services.activity_buckets = self.services.activity_buckets, {}
+        if not pending:
+            return 0
+        
+        try:
+            await asyncio.to_thread(self.db.record_activity, [
+                (guild_id, day, bucket['hours'], {str(channel_id): count for channel_id, count in bucket['channels'].items()}, bucket['users'].to_bytes())
+                for (guild_id, day), bucket in pending.items()
+            ])
+        except Exception as e:
+            # Merge the failed batch back so it is retried on the next flush
+            for key, bucket in pending.items():
+                merge_activity_bucket(self.services.activity_buckets.setdefault(key, new_activity_bucket()), bucket)
+            logger.error(f"Error flushing {len(pending)} activity buckets: {e}")
+            return 0
+        
+        logger.debug(f"Flushed {len(pending)} activity buckets")
+        return len(pending)
+    
+    @tasks.loop(seconds=ACTIVITY_FLUSH_INTERVAL)
+    async def activity_flush_loop(self):
+        """Periodically flush activity buckets"""
+        await self.flush_activity()
+    
+    def load_activity(self, guild_id, first_day, last_day):
+        """Daily activity for [first_day, last_day] from the database plus what is not flushed yet
+        
+        Returns (days, sketch_bytes): day -> bucket, and how many bytes of sketches were read.
+        """
+        days = {}
+        sketch_bytes = 0
+        for doc in self.db.get_activity(guild_id, first_day, last_day):
+            hours = doc.get('hours', {})
+            users = doc.get('users') or bytes(1 << ACTIVITY_HLL_PRECISION)
+            sketch_bytes += len(users)
+            days[doc['day']] = {
+                'hours': [hours.get(str(hour), 0) for hour in range(24)],
+                'channels': Counter({int(channel_id): count for channel_id, count in doc.get('channels', {}).items()}),
+                'users': HyperLogLog.from_bytes(users)
+            }
+        
+        for (bucket_guild_id, day), bucket in list(self.services.activity_buckets.items()):
+            if bucket_guild_id == guild_id and first_day <= day <= last_day:
+                merge_activity_bucket(days.setdefault(day, new_activity_bucket()), bucket)
+        
+        return days, sketch_bytes
+    
+    @commands.command(name='activity')
+    @is_admin()
+    async def activity(self, ctx, period: str = 'week', end: str = None):
+        """Show message heatmap, busiest channels and DAU/WAU/MAU for a period (Admin only)"""
+        try:
+            start_day, end_day = parse_leaderboard_period(period, end)
+        except ValueError:
+            await ctx.send("❌ Invalid period. Use `today`, `week`, `month`, `<n>d` or `YYYY-MM-DD [YYYY-MM-DD]`.")
+            return
+        
+        if end_day < start_day:
+            start_day, end_day = end_day, start_day
+        
+        if (end_day - start_day).days + 1 > ACTIVITY_MAX_RANGE_DAYS:
+            await ctx.send(f"❌ Range cannot exceed {ACTIVITY_MAX_RANGE_DAYS} days.")
+            return
+        
+        try:
+            # WAU and MAU look back from the last day, which can reach before the range
+            first_day = min(start_day, end_day - timedelta(days=29))
+            all_days, sketch_bytes = await asyncio.to_thread(self.load_activity, ctx.guild.id, first_day, end_day)
+            days = {day: bucket for day, bucket in all_days.items() if day >= start_day}
+            
+            messages = sum(sum(bucket['hours']) for bucket in days.values())
+            if not messages:
+                await ctx.send("No activity was recorded in that period.")
+                return
+            
+            range_days = (end_day - start_day).days + 1
+            dau = unique_users(all_days, end_day, end_day)
+            wau = unique_users(all_days, end_day - timedelta(days=6), end_day)
+            mau = unique_users(all_days, end_day - timedelta(days=29), end_day)
+            average_dau = sum(unique_users(all_days, day, day) for day in days) / range_days
+            
+            embed = discord.Embed(
+                title="📈 Server Activity",
+                color=discord.Color.blue(),
+                timestamp=datetime.utcnow()
+            )
+            embed.add_field(name="Messages", value=f"{messages:,}", inline=True)
+            embed.add_field(name="Unique Users", value=f"~{unique_users(all_days, start_day, end_day):,}", inline=True)
+            embed.add_field(name="Avg DAU", value=f"~{average_dau:,.0f}", inline=True)
+            embed.add_field(name=f"DAU ({end_day.strftime('%m-%d')})", value=f"~{dau:,}", inline=True)
+            embed.add_field(name="WAU", value=f"~{wau:,}", inline=True)
+            embed.add_field(name="MAU", value=f"~{mau:,}" + (f" (DAU/MAU {dau / mau:.0%})" if mau else ""), inline=True)
+            
+            embed.add_field(name="Messages by Weekday and Hour (UTC)", value=build_activity_heatmap(days), inline=False)
+            
+            channels = Counter()
+            for bucket in days.values():
+                channels.update(bucket['channels'])
+            channel_text = "\n".join(
+                f"<#{channel_id}> - {count:,} ({count / messages:.0%})"
+                for channel_id, count in channels.most_common(5)
+            )
+            embed.add_field(name="Busiest Channels", value=channel_text or "No data", inline=False)
+            
+            embed.set_footer(text=f"{start_day.strftime('%Y-%m-%d')} → {end_day.strftime('%Y-%m-%d')} (UTC) • from {sketch_bytes / 1024:.0f} KB of sketches")
+            await ctx.send(embed=embed)
+        
+        except Exception as e:
+            logger.error(f"Error showing activity: {e}")
+            await ctx.send("An error occurred while fetching activity statistics.")
+
+async def setup(bot):
+    await bot.add_cog(Activity(bot, bot.services))
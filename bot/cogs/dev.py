@@ -0,0 +1,353 @@
+import asyncio
+import logging
+from datetime import datetime
+
+import discord
+from discord.ext import commands
+
+from config import *
+from minhash import MinHashIndex
+from services import is_admin
+
+logger = logging.getLogger(__name__)
+
+def build_resources_embed(title, resources, page, footer):
+    """Build the embed for one page of resources"""
+    embed = discord.Embed(
+        title=title,
+        color=discord.Color.blue()
+    )
+    
+    for resource in resources:
+        value = f"{resource['content'][:100]}{'...' if len(resource['content']) > 100 else ''}"
+        if resource.get('url'):
+            value += f"\n{resource['url']}"
+        value += f"\n*Shared by {resource['username']}*"
+        embed.add_field(name=resource['title'], value=value, inline=False)
+    
+    embed.set_footer(text=f"Page {page + 1} • {footer}")
+    return embed
+
+def build_bugs_embed(status, reports, page, total):
+    """Build the embed for one page of bug reports"""
+    embed = discord.Embed(
+        title=f"🐛 {status.title()} Bug Reports",
+        color=discord.Color.red(),
+        timestamp=datetime.utcnow()
+    )
+    
+    for report in reports:
+        description = report['description']
+        value = f"{description[:150]}{'...' if len(description) > 150 else ''}\n*Reported by {report['username']} on {report['timestamp'].strftime('%Y-%m-%d')}*"
+        if report.get('duplicate_of'):
+            value += f"\n🔗 Likely duplicate of `{report['duplicate_of']}`"
+        embed.add_field(name=f"`{report['_id']}`", value=value, inline=False)
+    
+    embed.set_footer(text=f"Page {page + 1}/{-(-total // BUGS_PAGE_SIZE)} • {total} {status} reports")
+    return embed
+
+class ResourcePageView(discord.ui.View):
+    """Prev/Next buttons for a resource listing or search"""
+    def __init__(self, author_id, title, footer, fetch_page):
+        super().__init__(timeout=180)
+        self.author_id = author_id
+        self.title = title
+        self.footer = footer
+        self.fetch_page = fetch_page
+        self.page = 0
+    
+    async def interaction_check(self, interaction):
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("Run the command yourself to browse resources.", ephemeral=True)
+            return False
+        return True
+    
+    async def show_page(self, interaction, page):
+        try:
+            resources = self.fetch_page(page) if page >= 0 else []
+            if not resources:
+                await interaction.response.send_message("No more resources in that direction.", ephemeral=True)
+                return
+            
+            self.page = page
+            embed = build_resources_embed(self.title, resources, page, self.footer)
+            await interaction.response.edit_message(embed=embed, view=self)
+            
+        except Exception as e:
+            logger.error(f"Error paginating resources: {e}")
+            await interaction.response.send_message("An error occurred while fetching resources.", ephemeral=True)
+    
+    @discord.ui.button(label="◀ Prev", style=discord.ButtonStyle.primary)
+    async def previous_page(self, interaction, button):
+        await self.show_page(interaction, self.page - 1)
+    
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.primary)
+    async def next_page(self, interaction, button):
+        await self.show_page(interaction, self.page + 1)
+
+class BugPageView(discord.ui.View):
+    """Prev/Next buttons for a bug report listing
+    
+    Pages are fetched with keyset pagination from the first or last report on
+    screen, so every page is one indexed range read however deep it is.
+    """
+    def __init__(self, author_id, cog, status, total, reports):
+        super().__init__(timeout=180)
+        self.author_id = author_id
+        self.cog = cog
+        self.status = status
+        self.total = total
+        self.reports = reports
+        self.page = 0
+    
+    async def interaction_check(self, interaction):
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("Run the command yourself to browse bug reports.", ephemeral=True)
+            return False
+        return True
+    
+    async def show_page(self, interaction, page, after=None, before=None):
+        try:
+            reports = self.cog.db.get_bug_reports(
+                interaction.guild.id, status=self.status, limit=BUGS_PAGE_SIZE, after=after, before=before
+            ) if page >= 0 else []
+            if not reports:
+                await interaction.response.send_message("No more bug reports in that direction.", ephemeral=True)
+                return
+            
+            self.page = page
+            self.reports = reports
+            embed = build_bugs_embed(self.status, reports, page, self.total)
+            await interaction.response.edit_message(embed=embed, view=self)
+            
+        except Exception as e:
+            logger.error(f"Error paginating bug reports: {e}")
+            await interaction.response.send_message("An error occurred while fetching bug reports.", ephemeral=True)
+    
+    @discord.ui.button(label="◀ Prev", style=discord.ButtonStyle.primary)
+    async def previous_page(self, interaction, button):
+        first = self.reports[0]
+        await self.show_page(interaction, self.page - 1, before=(first['timestamp'], first['_id']))
+    
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.primary)
+    async def next_page(self, interaction, button):
+        last = self.reports[-1]
+        await self.show_page(interaction, self.page + 1, after=(last['timestamp'], last['_id']))
+
+class Dev(commands.Cog):
+    """Bug reports with near-duplicate detection, and shared resources"""
+    def __init__(self, bot, services):
+        self.bot = bot
+        self.services = services
+        self.db = services.db
+    
+    async def cog_load(self):
+        self.services.add_startup_step('bug_index', self.load_bug_indexes)
+    
+    def get_bug_index(self, guild_id):
+        """Get the near-duplicate index of active bug reports for a guild"""
+        if guild_id not in self.services.bug_indexes:
+            self.services.bug_indexes[guild_id] = MinHashIndex()
+        return self.services.bug_indexes[guild_id]
+    
+    async def load_bug_indexes(self):
+        """Build the in-memory duplicate indexes from active bug reports"""
+        # Each cursor batch is a blocking round trip, so the reports are fetched in a thread
+        reports = await asyncio.to_thread(lambda: list(self.db.get_active_bug_reports(BUG_ACTIVE_STATUSES)))
+        count = 0
+        for report in reports:
+            self.get_bug_index(report.get('guild_id')).add(str(report['_id']), report.get('description', ''))
+            count += 1
+            # Yield to the event loop while indexing a large backlog
+            if count % 500 == 0:
+                await asyncio.sleep(0)
+        logger.info(f"Indexed {count} active bug reports for duplicate detection")
+    
+    @commands.command(name='fixmybug')
+    async def submit_bug(self, ctx, *, description: str = None):
+        """Submit a bug report"""
+        if not description:
+            await ctx.send("Please provide a bug description. Usage: `!fixmybug <description>`")
+            return
+        
+        try:
+            # Check for a likely duplicate among active reports (reports without words are never matched)
+            bug_index = self.get_bug_index(ctx.guild.id)
+            signature = bug_index.signature(description)
+            matches = bug_index.query(signature=signature, threshold=BUG_DUPLICATE_THRESHOLD) if signature else []
+            duplicate_of, similarity = matches[0] if matches else (None, None)
+            
+            # Store bug report
+            result = self.db.store_bug_report(
+                user_id=ctx.author.id,
+                username=str(ctx.author),
+                bug_description=description,
+                guild_id=ctx.guild.id,
+                duplicate_of=duplicate_of,
+                similarity=similarity
+            )
+            if signature:
+                bug_index.add(str(result.inserted_id), signature=signature)
+            
+            # Send to bug channel
+            bug_channel = discord.utils.get(ctx.guild.channels, name=BUG_CHANNEL)
+            if bug_channel:
+                embed = discord.Embed(
+                    title="🐛 New Bug Report",
+                    description=description,
+                    color=discord.Color.red(),
+                    timestamp=datetime.utcnow()
+                )
+                embed.add_field(name="Reported by", value=ctx.author.mention, inline=True)
+                embed.add_field(name="Bug ID", value=str(result.inserted_id), inline=True)
+                if duplicate_of:
+                    embed.add_field(name="Likely Duplicate Of", value=f"`{duplicate_of}` ({similarity:.0%} similar)", inline=False)
+                embed.set_footer(text=f"Report ID: {result.inserted_id}")
+                
+                await bug_channel.send(embed=embed)
+            
+            # Confirm to user
+            embed = discord.Embed(
+                title="Bug Report Submitted ✅",
+                description=f"Your bug report has been submitted and posted to #{BUG_CHANNEL}!",
+                color=discord.Color.green()
+            )
+            embed.add_field(name="Report ID", value=str(result.inserted_id), inline=False)
+            if duplicate_of:
+                embed.add_field(name="Possible Duplicate", value=f"This looks similar to report `{duplicate_of}`, it has been linked for the maintainers.", inline=False)
+            await ctx.send(embed=embed)
+            
+            logger.info(f"Bug report submitted by {ctx.author}: {description[:50]}...")
+        
+        except Exception as e:
+            logger.error(f"Error submitting bug report: {e}")
+            await ctx.send("An error occurred while submitting your bug report.")
+    
+    @commands.command(name='bugs')
+    @is_admin()
+    async def list_bugs(self, ctx, status: str = 'open'):
+        """List bug reports by status, newest first, with page buttons (Admin only)"""
+        status = status.lower()
+        if status not in BUG_STATUSES:
+            await ctx.send(f"❌ Unknown status. Use one of: {', '.join(BUG_STATUSES)}")
+            return
+        
+        try:
+            reports = self.db.get_bug_reports(ctx.guild.id, status=status, limit=BUGS_PAGE_SIZE)
+            
+            if not reports:
+                await ctx.send(f"No **{status}** bug reports.")
+                return
+            
+            total = self.db.count_bug_reports(status=status, guild_id=ctx.guild.id)
+            view = BugPageView(ctx.author.id, self, status, total, reports)
+            await ctx.send(embed=build_bugs_embed(status, reports, 0, total), view=view)
+        
+        except Exception as e:
+            logger.error(f"Error listing bug reports: {e}")
+            await ctx.send("An error occurred while fetching bug reports.")
+    
+    @commands.command(name='bugstatus')
+    @is_admin()
+    async def set_bug_status(self, ctx, bug_id: str, status: str):
+        """Update a bug report's status (Admin only)"""
+        status = status.lower()
+        if status not in BUG_STATUSES:
+            await ctx.send(f"❌ Unknown status. Use one of: {', '.join(BUG_STATUSES)}")
+            return
+        
+        try:
+            report = self.db.get_bug_report(bug_id, guild_id=ctx.guild.id)
+        except Exception:
+            report = None
+        
+        if not report:
+            await ctx.send(f"❌ Bug report `{bug_id}` not found.")
+            return
+        
+        try:
+            self.db.update_bug_status(bug_id, status, guild_id=ctx.guild.id)
+            
+            # Keep the duplicate index limited to active reports
+            bug_index = self.get_bug_index(ctx.guild.id)
+            if status in BUG_ACTIVE_STATUSES:
+                bug_index.add(bug_id, report['description'])
+            else:
+                bug_index.remove(bug_id)
+            
+            # Log the action
+            self.db.log_admin_action(
+                admin_id=ctx.author.id,
+                admin_username=str(ctx.author),
+                action='bugstatus',
+                target_id=report['user_id'],
+                target_username=report['username'],
+                reason=f"Bug {bug_id} status changed from {report['status']} to {status}",
+                guild_id=ctx.guild.id
+            )
+            
+            embed = discord.Embed(
+                title="✅ Bug Status Updated",
+                description=f"Bug `{bug_id}` is now **{status}** (was {report['status']}).",
+                color=discord.Color.green()
+            )
+            await ctx.send(embed=embed)
+            
+            logger.info(f"{ctx.author} set bug {bug_id} status to {status}")
+        
+        except Exception as e:
+            logger.error(f"Error updating bug status: {e}")
+            await ctx.send("An error occurred while updating the bug status.")
+    
+    @commands.group(name='resources', invoke_without_command=True)
+    async def show_resources(self, ctx, page: int = 1):
+        """Show recent resources"""
+        try:
+            page = max(page, 1) - 1
+            guild_id = ctx.guild.id
+            
+            def fetch_page(page):
+                return self.db.get_resources(limit=RESOURCES_PAGE_SIZE, guild_id=guild_id, page=page)
+            
+            resources = fetch_page(page)
+            
+            if not resources:
+                await ctx.send("No resources found.")
+                return
+            
+            view = ResourcePageView(ctx.author.id, "📚 Recent Resources", "Newest first", fetch_page)
+            view.page = page
+            await ctx.send(embed=build_resources_embed(view.title, resources, page, view.footer), view=view)
+        
+        except Exception as e:
+            logger.error(f"Error fetching resources: {e}")
+            await ctx.send("An error occurred while fetching resources.")
+    
+    @show_resources.command(name='search')
+    async def search_resources(self, ctx, *, terms: str = None):
+        """Search resources by title and content"""
+        if not terms:
+            await ctx.send("Please provide search terms. Usage: `!resources search <terms>`")
+            return
+        
+        try:
+            guild_id = ctx.guild.id
+            
+            def fetch_page(page):
+                return self.db.search_resources(guild_id, terms, limit=RESOURCES_PAGE_SIZE, page=page)
+            
+            resources = fetch_page(0)
+            
+            if not resources:
+                await ctx.send(f"No resources found matching **{terms}**.")
+                return
+            
+            view = ResourcePageView(ctx.author.id, f"🔎 Resources matching \"{terms[:200]}\"", "Best matches first", fetch_page)
+            await ctx.send(embed=build_resources_embed(view.title, resources, 0, view.footer), view=view)
+        
+        except Exception as e:
+            logger.error(f"Error searching resources: {e}")
+            await ctx.send("An error occurred while searching resources.")
+
+async def setup(bot):
+    await bot.add_cog(Dev(bot, bot.services))
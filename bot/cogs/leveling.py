@@ -0,0 +1,1620 @@
+import asyncio
+import gzip
+import io
+import logging
+import random
+import re
+import tempfile
+import time
+from datetime import datetime
+
+import discord
+from discord import app_commands
+from discord.ext import commands, tasks
+
+from config import *
+from database import DatabaseUnavailable
+from leveling import recompute_levels
+from services import IndexedMember, is_admin, iter_guild_members, member_autocomplete, parse_leaderboard_period, resolve_members
+
+logger = logging.getLogger(__name__)
+
+def calculate_level_from_xp(xp):
+    """Calculate level based on XP using dynamic formula"""
+    if xp < LEVEL_UP_BASE:
+        return 1
+    
+    level = 1
+    required_xp = LEVEL_UP_BASE
+    
+    while xp >= required_xp:
+        level += 1
+        required_xp = int(LEVEL_UP_BASE * (level ** LEVEL_UP_MULTIPLIER))
+    
+    return level - 1
+
+def calculate_xp_for_level(level):
+    """Calculate required XP for a specific level"""
+    if level <= 1:
+        return 0
+    
+    total_xp = 0
+    for i in range(2, level + 1):
+        total_xp += int(LEVEL_UP_BASE * (i ** LEVEL_UP_MULTIPLIER))
+    
+    return total_xp
+
+def calculate_xp_to_next_level(current_xp, current_level):
+    """Calculate XP needed to reach next level"""
+    next_level_xp = calculate_xp_for_level(current_level + 1)
+    return max(0, next_level_xp - current_xp)
+
+def calculate_level_color(level):
+    """Calculate progressively darker red color for level roles"""
+    # Start with a light red and make it darker as level increases
+    # Base red color: #FF4444 (bright red)
+    # Target dark red: #800000 (dark red)
+    
+    # Clamp level to reasonable range for color calculation
+    level = min(level, MAX_LEVEL_ROLES)
+    
+    # Calculate darkness factor (0.0 to 1.0)
+    # Level 1 = lightest, higher levels = darker
+    darkness_factor = min((level - 1) / 50.0, 1.0)  # Spread over 50 levels
+    
+    # RGB values for red progression
+    # Start: #FF4444 (255, 68, 68)
+    # End:   #800000 (128, 0, 0)
+    start_r, start_g, start_b = 255, 68, 68
+    end_r, end_g, end_b = 128, 0, 0
+    
+    # Interpolate between start and end colors
+    r = int(start_r - (start_r - end_r) * darkness_factor)
+    g = int(start_g - (start_g - end_g) * darkness_factor)
+    b = int(start_b - (start_b - end_b) * darkness_factor)
+    
+    # Convert to hex color
+    color_hex = (r << 16) | (g << 8) | b
+    return color_hex
+
+def level_role_band(level):
+    """First level of the role band containing a level (the level itself when bands are off)"""
+    return ((level - 1) // LEVEL_ROLE_BAND_SIZE) * LEVEL_ROLE_BAND_SIZE + 1
+
+def level_role_bands():
+    """First level of every role band up to MAX_LEVEL_ROLES"""
+    return range(1, MAX_LEVEL_ROLES + 1, LEVEL_ROLE_BAND_SIZE)
+
+def level_role_name(level):
+    """Current name format of the level role covering a level"""
+    band = level_role_band(level)
+    if LEVEL_ROLE_BAND_SIZE == 1:
+        return f"{LEVEL_ROLE_PREFIX} {band} (XP {calculate_xp_for_level(band):,})"
+    band_end = min(band + LEVEL_ROLE_BAND_SIZE - 1, MAX_LEVEL_ROLES)
+    return f"{LEVEL_ROLE_PREFIX} {band}-{band_end} (XP {calculate_xp_for_level(band):,})"
+
+def parse_level_role(role):
+    """Return the (first) level of a level role, else None
+    
+    Recognises the old "Level N", new "Level N (XP x)" and banded "Level N-M (XP x)" formats.
+    """
+    prefix = f"{LEVEL_ROLE_PREFIX} "
+    if not role.name.startswith(prefix):
+        return None
+    
+    level_str = role.name[len(prefix):]
+    if " (XP " in level_str:
+        level_str = level_str.split(" (XP ", 1)[0]
+    elif " " in level_str:
+        return None
+    
+    try:
+        return int(level_str.split("-", 1)[0])
+    except ValueError:
+        return None
+
+def is_level_role(role):
+    """Check if a role is a level role in any naming format or band size"""
+    return parse_level_role(role) is not None
+
+def plan_level_roles(member, desired_role):
+    """Compute a member's full role list with exactly the desired level role
+    
+    Returns None when the member's roles are already correct.
+    """
+    current = [role for role in member.roles if not role.is_default()]
+    desired = [role for role in current if not is_level_role(role)]
+    if desired_role:
+        desired.append(desired_role)
+    
+    if set(desired) == set(current):
+        return None
+    return desired
+
+def build_level_distribution_chart(histogram, max_rows=10, bar_width=20):
+    """Render a level histogram as a text bar chart, grouping levels into at most max_rows bands"""
+    if not histogram:
+        return "No data"
+    
+    max_level = max(histogram)
+    band_size = max(1, -(-max_level // max_rows))  # Ceiling division
+    
+    bands = {}
+    for level, count in histogram.items():
+        band = (level - 1) // band_size
+        bands[band] = bands.get(band, 0) + count
+    
+    largest = max(bands.values())
+    lines = []
+    for band in range(max(bands) + 1):
+        count = bands.get(band, 0)
+        low = band * band_size + 1
+        high = low + band_size - 1
+        label = f"Lv {low}" if band_size == 1 else f"Lv {low}-{high}"
+        bar = "█" * round(count / largest * bar_width) if count else ""
+        lines.append(f"{label:>11} │{bar} {count:,}")
+    
+    return "```\n" + "\n".join(lines) + "\n```"
+
+def leaderboard_keys(entries):
+    """Footer suffix holding the (xp, user_id) keys of a page's first and last entries, in hex"""
+    first, last = entries[0], entries[-1]
+    return f"{first['xp']:x}.{first['user_id']:x}-{last['xp']:x}.{last['user_id']:x}"
+
+class LeaderboardView(discord.ui.View):
+    """Persistent navigation buttons for leaderboard messages
+    
+    The current page and the keys of its first and last entries are read back
+    from the embed footer, so Prev and Next stay single keyset reads on old
+    messages after a restart or once the page cache has dropped the page.
+    """
+    def __init__(self, cog):
+        super().__init__(timeout=None)
+        self.cog = cog
+    
+    @staticmethod
+    def current_page(interaction):
+        """(page, first key, last key) of the message's page
+        
+        Messages whose footer has no keys count as the first page, so paging
+        restarts from the top instead of seeking to a page without a cursor.
+        """
+        embeds = interaction.message.embeds if interaction.message else []
+        if embeds and embeds[0].footer and embeds[0].footer.text:
+            text = embeds[0].footer.text
+            match = re.match(r"Page (\d+)", text)
+            if match:
+                keys = re.search(r"([0-9a-f]+)\.([0-9a-f]+)-([0-9a-f]+)\.([0-9a-f]+)$", text)
+                if keys:
+                    first_xp, first_user_id, last_xp, last_user_id = (int(value, 16) for value in keys.groups())
+                    return int(match.group(1)) - 1, (first_xp, first_user_id), (last_xp, last_user_id)
+        return 0, None, None
+    
+    async def show_page(self, interaction, page, after=None, before=None):
+        try:
+            entries = self.cog.get_leaderboard_page(interaction.guild.id, page, after=after, before=before) if page >= 0 else []
+            if not entries:
+                await interaction.response.send_message("No more entries in that direction.", ephemeral=True)
+                return
+            
+            embed, file = await self.cog.build_leaderboard_embed(interaction.guild, page, entries)
+            await interaction.response.edit_message(embed=embed, attachments=[file] if file else [], view=self)
+            
+        except Exception as e:
+            logger.error(f"Error paginating leaderboard: {e}")
+            await interaction.response.send_message("An error occurred while fetching the leaderboard.", ephemeral=True)
+    
+    @discord.ui.button(label="⏮ First", style=discord.ButtonStyle.secondary, custom_id="leaderboard:first")
+    async def first_page(self, interaction, button):
+        await self.show_page(interaction, 0)
+    
+    @discord.ui.button(label="◀ Prev", style=discord.ButtonStyle.primary, custom_id="leaderboard:prev")
+    async def previous_page(self, interaction, button):
+        page, first, _ = self.current_page(interaction)
+        await self.show_page(interaction, page - 1, before=first)
+    
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.primary, custom_id="leaderboard:next")
+    async def next_page(self, interaction, button):
+        page, _, last = self.current_page(interaction)
+        await self.show_page(interaction, page + 1, after=last)
+
+class Leveling(commands.Cog):
+    """XP gain, levels, level roles and leaderboards"""
+    def __init__(self, bot, services):
+        self.bot = bot
+        self.services = services
+        self.db = services.db
+        self.settings = services.settings
+    
+    async def cog_load(self):
+        self.bot.add_view(LeaderboardView(self))
+        self.services.add_startup_step('level_role_ids', self.load_level_role_ids)
+        self.services.add_startup_step('leveling', self.setup_leveling_channel)
+        self.services.add_message_stage('xp', self.process_xp_gain)
+        self.xp_rollup_flush_loop.start()
+    
+    async def cog_unload(self):
+        self.services.remove_message_stage('xp')
+        self.xp_rollup_flush_loop.cancel()
+        # Rollups stay in services.xp_rollups, a reloaded cog keeps accumulating into them
+        await self.flush_xp_rollups()
+    
+    async def drain(self):
+        """Flush daily XP rollups on shutdown (to MongoDB, or to the spool if it is unavailable)"""
+        self.xp_rollup_flush_loop.cancel()
+        pending = len(self.services.xp_rollups)
+        await self.flush_xp_rollups()
+        return {'XP rollups': f"{pending} flushed"}
+    
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        """Assign the Level 1 role to new members"""
+        if not ENABLE_LEVEL_ROLES:
+            return
+        
+        try:
+            level_1_role = await self.get_or_create_level_role(member.guild, 1)
+            if level_1_role and level_1_role not in member.roles:
+                await member.add_roles(level_1_role, reason="Auto-assigned Level 1 role to new member")
+                logger.info(f"Assigned Level 1 role to new member: {member}")
+        except Exception as e:
+            logger.error(f"Error assigning Level 1 role to new member {member}: {e}")
+    
+    async def setup_leveling_channel(self):
+        """Set up the Level category and level-up channel"""
+        if not self.bot.guilds:
+            return
+        
+        guild = self.bot.guilds[0]  # Use first guild
+        
+        # Find or create Level category
+        level_category = await self.services.get_or_create_category(
+            guild,
+            LEVEL_CATEGORY,
+            overwrites={
+                guild.default_role: discord.PermissionOverwrite(read_messages=True, send_messages=False),
+                guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_channels=True)
+            }
+        )
+        
+        # Find or create level-up channel
+        self.services.levelup_channel = discord.utils.get(guild.channels, name=LEVELUP_CHANNEL)
+        if not self.services.levelup_channel:
+            self.services.levelup_channel = await guild.create_text_channel(
+                name=LEVELUP_CHANNEL,
+                category=level_category,
+                overwrites={
+                    guild.default_role: discord.PermissionOverwrite(read_messages=True, send_messages=False),
+                    guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True)
+                }
+            )
+            
+            # Send welcome message to the channel
+            embed = discord.Embed(
+                title="🎉 Level Up Announcements",
+                description=f"This channel will announce when members level up in **{guild.name}**!",
+                color=discord.Color.gold()
+            )
+            embed.add_field(name="How it works", value="• Gain XP by sending messages\n• Level up when you reach XP thresholds\n• Get level roles automatically", inline=False)
+            embed.set_footer(text=f"Level system activated at {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC")
+            
+            await self.services.levelup_channel.send(embed=embed)
+        
+        logger.info(f"Level-up channel set up: #{self.services.levelup_channel.name}")
+    
+    def calculate_message_length_xp(self, message_content, guild_id=None):
+        """Calculate bonus XP based on message length (using the guild's settings)"""
+        if not message_content:
+            return 0
+        
+        message_length = len(message_content.strip())
+        
+        # Don't give XP for very short messages
+        if message_length < self.settings.get_cached(guild_id, 'MIN_MESSAGE_LENGTH'):
+            return 0
+        
+        # Calculate length bonus
+        length_bonus = int(message_length * self.settings.get_cached(guild_id, 'MESSAGE_LENGTH_MULTIPLIER'))
+        
+        # Cap the bonus to prevent abuse
+        length_bonus = min(length_bonus, self.settings.get_cached(guild_id, 'MAX_LENGTH_BONUS'))
+        
+        return length_bonus
+    
+    def remember_level_role(self, guild, level, role):
+        """Record a level role's id so later lookups are a single guild.get_role"""
+        self.services.level_role_ids.setdefault(guild.id, {})[level] = role.id
+        try:
+            self.db.set_level_role_ids(guild.id, {level: role.id})
+        except Exception as e:
+            logger.error(f"Failed to store level role id for level {level}: {e}")
+    
+    def cached_level_role(self, guild, band):
+        """The role stored for a band's id, if it still carries the band's current name
+        
+        Ids stored under another LEVEL_ROLE_BAND_SIZE (or an older name format)
+        are dropped, so the role is looked up or created under the current scheme.
+        """
+        role_ids = self.services.level_role_ids.get(guild.id, {})
+        role_id = role_ids.get(band)
+        role = guild.get_role(role_id) if role_id else None
+        if role and role.name == level_role_name(band):
+            return role
+        if role_id:
+            role_ids.pop(band, None)
+        return None
+    
+    def find_level_role(self, guild, level):
+        """Find an existing level role without creating it"""
+        level = level_role_band(level)
+        role = self.cached_level_role(guild, level)
+        if role:
+            return role
+        
+        role = discord.utils.get(guild.roles, name=level_role_name(level))
+        if not role and LEVEL_ROLE_BAND_SIZE == 1:
+            role = discord.utils.get(guild.roles, name=f"{LEVEL_ROLE_PREFIX} {level}")
+        return role
+    
+    async def get_or_create_level_role(self, guild, level):
+        """Get or create the level role (or band role) for the specified level"""
+        if not ENABLE_LEVEL_ROLES or level > MAX_LEVEL_ROLES:
+            return None
+        
+        # With banding every level in a band shares the role keyed by the band's first level
+        level = level_role_band(level)
+        
+        # Provisioned roles are found by id without scanning guild.roles
+        role = self.cached_level_role(guild, level)
+        if role:
+            return role
+        
+        # Calculate XP requirement for this level
+        role_name = level_role_name(level)
+        
+        # First try to find role with new format
+        role = discord.utils.get(guild.roles, name=role_name)
+        
+        # If not found, try old format for backward compatibility
+        if not role and LEVEL_ROLE_BAND_SIZE == 1:
+            old_role_name = f"{LEVEL_ROLE_PREFIX} {level}"
+            old_role = discord.utils.get(guild.roles, name=old_role_name)
+            
+            if old_role:
+                # Update old role to new format
+                try:
+                    await old_role.edit(name=role_name, reason="Updated role name to include XP requirement")
+                    role = old_role
+                    logger.info(f"Updated role name from '{old_role_name}' to '{role_name}'")
+                except Exception as e:
+                    logger.error(f"Failed to update role name for {old_role_name}: {e}")
+                    role = old_role  # Use old role if rename fails
+        
+        # Create new role if it doesn't exist
+        if not role:
+            try:
+                # Calculate the red shade for this level
+                level_color = calculate_level_color(level)
+                
+                # Create the role with the calculated red shade
+                role = await guild.create_role(
+                    name=role_name,
+                    color=discord.Color(level_color),
+                    reason=f"Auto-created level role for level {level}"
+                )
+                logger.info(f"Created new level role: {role_name} with color #{level_color:06x}")
+            except Exception as e:
+                logger.error(f"Failed to create level role {role_name}: {e}")
+                return None
+        
+        self.remember_level_role(guild, level, role)
+        return role
+    
+    async def provision_level_roles(self, guild, create=True, reorder=True, progress=None):
+        """Create or rename the full set of level roles (one per band) ahead of time
+        
+        Missing roles are created and old-format roles renamed concurrently (bounded
+        by LEVEL_ROLE_CONCURRENCY; discord.py waits out per-route rate limits), then
+        the hierarchy is set with a single edit_role_positions call so higher levels
+        sit above lower ones. The resulting role ids are stored for O(1) lookup.
+        """
+        bands = set(level_role_bands())
+        existing = {}
+        for role in guild.roles:
+            level = parse_level_role(role)
+            if level in bands:
+                # Prefer a role already in the new format if both exist
+                if level not in existing or role.name == level_role_name(level):
+                    existing[level] = role
+        
+        renames = [(level, role) for level, role in existing.items() if role.name != level_role_name(level)]
+        creates = [level for level in level_role_bands() if level not in existing] if create else []
+        result = {'existing': len(existing), 'created': 0, 'renamed': 0, 'errors': 0, 'reordered': False}
+        total = len(renames) + len(creates)
+        done = 0
+        roles = dict(existing)
+        semaphore = asyncio.Semaphore(LEVEL_ROLE_CONCURRENCY)
+        
+        async def run(level, coro, counter):
+            nonlocal done
+            async with semaphore:
+                try:
+                    roles[level] = await coro
+                    result[counter] += 1
+                except Exception as e:
+                    logger.error(f"Error provisioning level role {level}: {e}")
+                    result['errors'] += 1
+                finally:
+                    done += 1
+                    if progress and (done % 10 == 0 or done == total):
+                        await progress(done, total)
+        
+        jobs = [
+            run(level, role.edit(name=level_role_name(level), reason="Updated role name to include XP requirement"), 'renamed')
+            for level, role in renames
+        ]
+        jobs += [
+            run(level, guild.create_role(
+                name=level_role_name(level),
+                color=discord.Color(calculate_level_color(level)),
+                reason=f"Provisioned level role for level {level}"
+            ), 'created')
+            for level in creates
+        ]
+        await asyncio.gather(*jobs)
+        
+        # role.edit returns the updated role, keep the original object if it returned None
+        roles = {level: role or existing.get(level) for level, role in roles.items() if role or existing.get(level)}
+        
+        if reorder and roles:
+            ordered = [roles[level] for level in sorted(roles)]
+            # Keep the block where the existing level roles started, but below the bot's top role
+            base = min((role.position for role in existing.values()), default=1)
+            base = max(1, min(base, guild.me.top_role.position - len(ordered)))
+            positions = {role: base + i for i, role in enumerate(ordered)}
+            if any(role.position != position for role, position in positions.items()):
+                try:
+                    await guild.edit_role_positions(positions, reason="Ordered level roles by level")
+                    result['reordered'] = True
+                except Exception as e:
+                    logger.error(f"Failed to order level roles: {e}")
+                    result['errors'] += 1
+        
+        self.services.level_role_ids[guild.id] = {level: role.id for level, role in roles.items()}
+        self.db.set_level_role_ids(guild.id, self.services.level_role_ids[guild.id], replace=True)
+        return result
+    
+    async def load_level_role_ids(self):
+        """Load provisioned level role ids from the database"""
+        self.services.level_role_ids.update(self.db.get_level_role_ids())
+        logger.info(f"Loaded level role ids for {len(self.services.level_role_ids)} guilds")
+    
+    async def reconcile_member_level_role(self, member, level, reason=None):
+        """Bring a member's level roles in line with their level using one member.edit call
+        
+        Replaces the old remove_roles + add_roles pair, so a crash can never leave
+        a member with zero or two level roles. Returns True if the member was edited.
+        """
+        if not ENABLE_LEVEL_ROLES:
+            return False
+        
+        desired_role = await self.get_or_create_level_role(member.guild, level)
+        roles = plan_level_roles(member, desired_role)
+        if roles is None:
+            return False
+        
+        await member.edit(roles=roles, reason=reason or f"Level role set to level {level}")
+        logger.debug(f"Reconciled level role for {member} to level {level}")
+        return True
+    
+    async def update_user_level_role(self, member, old_level, new_level):
+        """Update user's level role (replace old with new in a single edit)"""
+        if not ENABLE_LEVEL_ROLES:
+            return
+        
+        try:
+            await self.reconcile_member_level_role(member, new_level, reason=f"Level changed from {old_level} to {new_level}")
+        except Exception as e:
+            logger.error(f"Error updating level role for {member}: {e}")
+    
+    async def announce_level_up(self, member, old_level, new_level, new_xp):
+        """Announce level up in the level-up channel"""
+        await self.services.wait_for_channels()
+        if not self.services.levelup_channel:
+            return
+        
+        try:
+            # Create level up embed
+            embed = discord.Embed(
+                title="🎉 Level Up!",
+                description=f"{member.mention} has reached **Level {new_level}**!",
+                color=discord.Color.gold(),
+                timestamp=datetime.utcnow()
+            )
+            
+            embed.set_author(
+                name=member.display_name,
+                icon_url=member.avatar.url if member.avatar else member.default_avatar.url
+            )
+            
+            embed.add_field(name="Previous Level", value=str(old_level), inline=True)
+            embed.add_field(name="New Level", value=str(new_level), inline=True)
+            embed.add_field(name="Total XP", value=f"{new_xp:,}", inline=True)
+            
+            # Calculate XP to next level
+            xp_to_next = calculate_xp_to_next_level(new_xp, new_level)
+            if xp_to_next > 0:
+                embed.add_field(name="XP to Next Level", value=f"{xp_to_next:,}", inline=True)
+            
+            embed.set_footer(text="Keep chatting to earn more XP!")
+            
+            await self.services.levelup_channel.send(embed=embed)
+            logger.info(f"Announced level up for {member} (Level {old_level} → {new_level})")
+        
+        except Exception as e:
+            logger.error(f"Error announcing level up for {member}: {e}")
+    
+    async def process_xp_gain(self, message):
+        """Process XP gain for a message"""
+        # Skip bots
+        if message.author.bot:
+            return
+        
+        user_id = message.author.id
+        guild_id = message.guild.id
+        current_time = datetime.utcnow()
+        
+        # Settings are read from the cache below; a guild whose entry expired is
+        # reloaded in a thread first, so the event loop never waits on MongoDB
+        if self.settings.expired(guild_id):
+            await asyncio.to_thread(self.settings.overrides, guild_id)
+        
+        # Reject repeated and low-effort messages before any other database access
+        if self.settings.get_cached(guild_id, 'ENABLE_SPAM_FILTER'):
+            reason = self.services.spam_filter.check(guild_id, user_id, message.content)
+            if reason:
+                logger.debug(f"No XP for {message.author}: {reason}")
+                return
+        
+        # Check cooldown
+        cooldown_key = f"{user_id}_{guild_id}"
+        if cooldown_key in self.services.user_cooldowns:
+            time_diff = (current_time - self.services.user_cooldowns[cooldown_key]).total_seconds()
+            if time_diff < self.settings.get_cached(guild_id, 'XP_COOLDOWN'):
+                return  # Still in cooldown
+        
+        try:
+            # Calculate XP gain (base + random bonus + message length bonus)
+            base_xp = self.settings.get_cached(guild_id, 'XP_PER_MESSAGE')
+            bonus_xp = random.randint(self.settings.get_cached(guild_id, 'XP_BONUS_MIN'), self.settings.get_cached(guild_id, 'XP_BONUS_MAX'))
+            length_xp = self.calculate_message_length_xp(message.content, guild_id)
+            xp_gained = base_xp + bonus_xp + length_xp
+            
+            # Set the cooldown before yielding to the database thread so a burst of messages earns XP once
+            self.services.user_cooldowns[cooldown_key] = current_time
+            
+            # The reads and writes run in a thread, the event loop keeps dispatching other messages
+            current_level, new_level, new_xp = await asyncio.to_thread(self.apply_xp_gain, user_id, guild_id, xp_gained)
+            self.record_xp_rollup(guild_id, user_id, xp_gained, current_time)
+            if current_level is None:
+                return
+            
+            # Check for level up
+            if new_level > current_level:
+                # Update role
+                await self.update_user_level_role(message.author, current_level, new_level)
+                
+                # Announce level up
+                await self.announce_level_up(message.author, current_level, new_level, new_xp)
+                
+                logger.info(f"{message.author} leveled up from {current_level} to {new_level} (XP: {new_xp})")
+        
+        except Exception as e:
+            logger.error(f"Error processing XP gain for {message.author}: {e}")
+    
+    def apply_xp_gain(self, user_id, guild_id, xp_gained):
+        """Add XP to a user in the database (runs in a thread), returns (old level, new level, new XP)
+        
+        While MongoDB is unavailable the XP is spooled without a level and
+        (None, None, None) is returned; the level catches up on the first message after recovery.
+        """
+        try:
+            user_data = self.db.get_user_xp(user_id, guild_id)
+        except DatabaseUnavailable:
+            self.db.update_user_xp(user_id, guild_id, xp_gained)
+            return None, None, None
+        
+        current_level = user_data['level']
+        new_xp = user_data['xp'] + xp_gained
+        new_level = calculate_level_from_xp(new_xp)
+        self.db.update_user_xp(user_id, guild_id, xp_gained, new_level if new_level != current_level else None)
+        return current_level, new_level, new_xp
+    
+    def record_xp_rollup(self, guild_id, user_id, xp_gained, when=None):
+        """Accumulate XP into the in-memory daily rollup bucket for a user"""
+        when = when or datetime.utcnow()
+        day = datetime(when.year, when.month, when.day)
+        bucket = self.services.xp_rollups.setdefault((guild_id, user_id, day), [0, 0])
+        bucket[0] += xp_gained
+        bucket[1] += 1
+    
+    async def flush_xp_rollups(self):
+        """Write all pending daily XP rollups to the database in one bulk write
+        
+        The rollups are swapped out and merged back on the event loop, where
+        record_xp_rollup adds to them; only the write runs in a thread.
+        """
+        pending, self.services.xp_rollups = self.services.xp_rollups, {}
+        if not pending:
+            return 0
+        
+        try:
+            await asyncio.to_thread(self.db.increment_daily_xp, [(*key, xp, messages) for key, (xp, messages) in pending.items()])
+        except Exception as e:
+            # Merge the failed batch back so it is retried on the next flush
+            for key, (xp, messages) in pending.items():
+                bucket = self.services.xp_rollups.setdefault(key, [0, 0])
+                bucket[0] += xp
+                bucket[1] += messages
+            logger.error(f"Error flushing {len(pending)} daily XP rollups: {e}")
+            return 0
+        
+        logger.debug(f"Flushed {len(pending)} daily XP rollups")
+        return len(pending)
+    
+    @tasks.loop(seconds=XP_ROLLUP_FLUSH_INTERVAL)
+    async def xp_rollup_flush_loop(self):
+        """Periodically flush daily XP rollups"""
+        await self.flush_xp_rollups()
+    
+    def prune_user_cooldowns(self):
+        """Drop expired XP cooldowns and enforce USER_COOLDOWN_CACHE_SIZE"""
+        now = datetime.utcnow()
+        expired = [
+            key for key, last in self.services.user_cooldowns.items()
+            if (now - last).total_seconds() >= self.settings.get_cached(int(key.split('_')[1]), 'XP_COOLDOWN')
+        ]
+        for key in expired:
+            del self.services.user_cooldowns[key]
+        
+        overflow = len(self.services.user_cooldowns) - USER_COOLDOWN_CACHE_SIZE
+        if overflow > 0:
+            for key in sorted(self.services.user_cooldowns, key=self.services.user_cooldowns.get)[:overflow]:
+                del self.services.user_cooldowns[key]
+        
+        return len(expired) + max(overflow, 0)
+    
+    @commands.hybrid_command(name='level', aliases=['rank'])
+    @app_commands.describe(member="Member to look up (defaults to you)")
+    @app_commands.autocomplete(member=member_autocomplete)
+    async def check_level(self, ctx, member: IndexedMember = None):
+        """Check your or someone else's level and XP"""
+        target = member or ctx.author
+        
+        try:
+            user_data = self.db.get_user_xp(target.id, ctx.guild.id)
+            current_xp = user_data['xp']
+            current_level = user_data['level']
+            messages_count = user_data['messages_count']
+            
+            # Calculate XP for current and next level
+            current_level_xp = calculate_xp_for_level(current_level)
+            next_level_xp = calculate_xp_for_level(current_level + 1)
+            xp_to_next = next_level_xp - current_xp
+            xp_progress = current_xp - current_level_xp
+            xp_needed = next_level_xp - current_level_xp
+            
+            # Get user's rank
+            rank = self.db.get_user_rank(target.id, ctx.guild.id)
+            
+            if ENABLE_IMAGE_CARDS:
+                try:
+                    png = await self.render_rank_card(target, user_data, rank)
+                    await ctx.send(file=discord.File(io.BytesIO(png), filename='rank.png'))
+                    return
+                except Exception as e:
+                    logger.warning(f"Rank card rendering failed for {target}, sending an embed instead: {e}")
+            
+            embed = discord.Embed(
+                title="📊 Level Statistics",
+                color=discord.Color.blue(),
+                timestamp=datetime.utcnow()
+            )
+            
+            embed.set_author(
+                name=target.display_name,
+                icon_url=target.avatar.url if target.avatar else target.default_avatar.url
+            )
+            
+            embed.add_field(name="Level", value=f"**{current_level}**", inline=True)
+            embed.add_field(name="Rank", value=f"**#{rank}**" if rank else "Unranked", inline=True)
+            embed.add_field(name="Total XP", value=f"{current_xp:,}", inline=True)
+            
+            embed.add_field(name="Messages Sent", value=f"{messages_count:,}", inline=True)
+            embed.add_field(name="XP to Next Level", value=f"{xp_to_next:,}", inline=True)
+            
+            # Progress bar
+            if xp_needed > 0:
+                progress_percent = int((xp_progress / xp_needed) * 100)
+                progress_bar = "█" * (progress_percent // 10) + "░" * (10 - (progress_percent // 10))
+                embed.add_field(name="Progress to Next Level", value=f"`{progress_bar}` {progress_percent}%", inline=False)
+            
+            embed.set_footer(text="Keep chatting to earn more XP!")
+            
+            await ctx.send(embed=embed)
+        
+        except Exception as e:
+            logger.error(f"Error checking level for {target}: {e}")
+            await ctx.send("An error occurred while checking level information.")
+    
+    async def render_rank_card(self, member, user_data, rank):
+        """Rank card PNG for a member, reused from the card cache until their XP leaves its bucket"""
+        level = user_data['level']
+        avatar = member.display_avatar
+        accent = member.color.to_rgb() if member.color.value else None
+        key = (member.guild.id, member.id, user_data['xp'] // max(1, CARD_XP_BUCKET), avatar.key, level, rank, member.display_name, accent)
+        
+        async def build():
+            try:
+                avatar_bytes = await avatar.replace(size=256, format='png').read()
+            except discord.HTTPException:
+                avatar_bytes = None
+            return {
+                'name': member.display_name,
+                'level': level,
+                'rank': rank,
+                'xp': user_data['xp'],
+                'level_xp': calculate_xp_for_level(level),
+                'next_level_xp': calculate_xp_for_level(level + 1),
+                'messages': user_data['messages_count'],
+                'avatar': avatar_bytes,
+                'accent': accent,
+                'font_path': CARD_FONT_PATH
+            }
+        
+        return await self.services.card_renderer.render('rank', key, build)
+    
+    async def render_leaderboard_card(self, guild, page, entries, members):
+        """Leaderboard page PNG, cached for as long as the page's entries and names are unchanged"""
+        rows = []
+        for position, user_data in enumerate(entries, page * LEADERBOARD_PAGE_SIZE + 1):
+            user = members.get(user_data['user_id'])
+            level = user_data['level']
+            level_xp = calculate_xp_for_level(level)
+            progress = (user_data['xp'] - level_xp) / max(1, calculate_xp_for_level(level + 1) - level_xp)
+            rows.append((position, user.display_name if user else f"User {user_data['user_id']}", level, user_data['xp'], progress))
+        
+        async def build():
+            return {
+                'title': "Server Leaderboard",
+                'subtitle': f"{guild.name} · Page {page + 1}",
+                'rows': rows,
+                'font_path': CARD_FONT_PATH
+            }
+        
+        key = (guild.id, page, guild.name, tuple(rows))
+        return await self.services.card_renderer.render('leaderboard', key, build)
+    
+    def get_leaderboard_page(self, guild_id, page, after=None, before=None):
+        """Get a leaderboard page (0-based), served from the page cache when fresh
+        
+        Pages are fetched with keyset pagination: the Next and Prev buttons pass
+        the last or first (xp, user_id) key of the page on screen as `after` or
+        `before`, and the previous page serves as the cursor otherwise, so each
+        page is a single indexed range read no matter how deep it is. There is
+        no jump to an arbitrary page: reaching it would mean skipping every
+        entry before it.
+        """
+        key = (guild_id, page)
+        cached = self.services.leaderboard_cache.get(key)
+        if cached and time.monotonic() - cached[0] < LEADERBOARD_CACHE_TTL:
+            self.services.leaderboard_cache.move_to_end(key)
+            return cached[1]
+        
+        previous = self.services.leaderboard_cache.get((guild_id, page - 1)) if page > 0 else None
+        if page == 0:
+            entries = self.db.get_leaderboard_page(guild_id, LEADERBOARD_PAGE_SIZE)
+        elif after is not None:
+            entries = self.db.get_leaderboard_page(guild_id, LEADERBOARD_PAGE_SIZE, after=after)
+        elif before is not None:
+            entries = self.db.get_leaderboard_page(guild_id, LEADERBOARD_PAGE_SIZE, before=before)
+        else:
+            # A stale neighbour is still a valid cursor; without one (Next on a page 1
+            # whose footer predates the keys) the previous page is read first
+            previous_entries = previous[1] if previous else self.get_leaderboard_page(guild_id, page - 1)
+            if not previous_entries:
+                return []
+            last = previous_entries[-1]
+            entries = self.db.get_leaderboard_page(guild_id, LEADERBOARD_PAGE_SIZE, after=(last['xp'], last['user_id']))
+        
+        self.services.leaderboard_cache[key] = (time.monotonic(), entries)
+        self.services.leaderboard_cache.move_to_end(key)
+        while len(self.services.leaderboard_cache) > LEADERBOARD_CACHE_SIZE:
+            self.services.leaderboard_cache.popitem(last=False)
+        
+        return entries
+    
+    async def build_leaderboard_embed(self, guild, page, entries):
+        """Build the embed for one leaderboard page, returns (embed, PNG file or None)"""
+        members = await resolve_members(guild, [user_data['user_id'] for user_data in entries])
+        embed = discord.Embed(
+            title="🏆 Server Leaderboard",
+            color=discord.Color.gold(),
+            timestamp=datetime.utcnow()
+        )
+        # The footer carries the page number and keyset cursors for LeaderboardView, cards or not
+        embed.set_footer(text=f"Page {page + 1} • Guild: {guild.name} • {leaderboard_keys(entries)}")
+        
+        if ENABLE_IMAGE_CARDS:
+            try:
+                png = await self.render_leaderboard_card(guild, page, entries, members)
+                embed.set_image(url="attachment://leaderboard.png")
+                return embed, discord.File(io.BytesIO(png), filename='leaderboard.png')
+            except Exception as e:
+                logger.warning(f"Leaderboard card rendering failed, sending text instead: {e}")
+        
+        leaderboard_text = ""
+        for i, user_data in enumerate(entries, page * LEADERBOARD_PAGE_SIZE + 1):
+            user = members.get(user_data['user_id'])
+            username = user.display_name if user else f"User {user_data['user_id']}"
+            
+            medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
+            leaderboard_text += f"{medal} **{username}** - Level {user_data['level']} ({user_data['xp']:,} XP)\n"
+        
+        embed.description = leaderboard_text
+        return embed, None
+    
+    @commands.command(name='leaderboard', aliases=['lb', 'top'])
+    async def leaderboard(self, ctx):
+        """Show the server leaderboard (page with the buttons)"""
+        try:
+            leaderboard_data = self.get_leaderboard_page(ctx.guild.id, 0)
+            
+            if not leaderboard_data:
+                await ctx.send("No users found on the leaderboard.")
+                return
+            
+            embed, file = await self.build_leaderboard_embed(ctx.guild, 0, leaderboard_data)
+            await ctx.send(embed=embed, file=file, view=LeaderboardView(self))
+        
+        except Exception as e:
+            logger.error(f"Error showing leaderboard: {e}")
+            await ctx.send("An error occurred while fetching the leaderboard.")
+    
+    def get_period_leaderboard(self, guild_id, start_day, end_day):
+        """Get a period leaderboard, cached for XP_ROLLUP_CACHE_TTL seconds"""
+        key = (guild_id, start_day, end_day)
+        cached = self.services.period_leaderboard_cache.get(key)
+        if cached and time.monotonic() - cached[0] < XP_ROLLUP_CACHE_TTL:
+            return cached[1]
+        
+        entries = self.db.get_period_leaderboard(guild_id, start_day, end_day, LEADERBOARD_PAGE_SIZE)
+        
+        # Drop expired results so the cache only holds recently used ranges
+        now = time.monotonic()
+        for stale_key in [k for k, (fetched_at, _) in self.services.period_leaderboard_cache.items() if now - fetched_at >= XP_ROLLUP_CACHE_TTL]:
+            del self.services.period_leaderboard_cache[stale_key]
+        self.services.period_leaderboard_cache[key] = (now, entries)
+        
+        return entries
+    
+    @commands.command(name='topxp', aliases=['weekly', 'monthly'])
+    async def period_leaderboard(self, ctx, period: str = None, end: str = None):
+        """Show the XP leaderboard for a period (today, week, month, <n>d or a date range)"""
+        if period is None:
+            period = 'month' if ctx.invoked_with == 'monthly' else 'week'
+        
+        try:
+            start_day, end_day = parse_leaderboard_period(period, end)
+        except ValueError:
+            await ctx.send("❌ Invalid period. Use `today`, `week`, `month`, `<n>d` or `YYYY-MM-DD [YYYY-MM-DD]`.")
+            return
+        
+        if end_day < start_day:
+            start_day, end_day = end_day, start_day
+        
+        if (end_day - start_day).days + 1 > XP_ROLLUP_MAX_RANGE_DAYS:
+            await ctx.send(f"❌ Range cannot exceed {XP_ROLLUP_MAX_RANGE_DAYS} days.")
+            return
+        
+        try:
+            entries = self.get_period_leaderboard(ctx.guild.id, start_day, end_day)
+            
+            if not entries:
+                await ctx.send("No XP was earned in that period.")
+                return
+            
+            embed = discord.Embed(
+                title="📅 XP Leaderboard",
+                description="",
+                color=discord.Color.gold(),
+                timestamp=datetime.utcnow()
+            )
+            
+            members = await resolve_members(ctx.guild, [user_data['user_id'] for user_data in entries])
+            for i, user_data in enumerate(entries, 1):
+                user = members.get(user_data['user_id'])
+                username = user.display_name if user else f"User {user_data['user_id']}"
+                
+                medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
+                embed.description += f"{medal} **{username}** - {user_data['xp']:,} XP ({user_data['messages']:,} messages)\n"
+            
+            embed.set_footer(text=f"{start_day.strftime('%Y-%m-%d')} → {end_day.strftime('%Y-%m-%d')} (UTC) • Guild: {ctx.guild.name}")
+            
+            await ctx.send(embed=embed)
+        
+        except Exception as e:
+            logger.error(f"Error showing period leaderboard: {e}")
+            await ctx.send("An error occurred while fetching the leaderboard.")
+    
+    @commands.hybrid_command(name='resetlevel')
+    @is_admin()
+    @app_commands.autocomplete(member=member_autocomplete)
+    async def reset_user_level(self, ctx, member: IndexedMember):
+        """Reset a user's level and XP (Admin only)"""
+        await ctx.defer()
+        try:
+            # Reset in database
+            self.db.reset_user_xp(member.id, ctx.guild.id)
+            
+            # Replace all level roles (both old and new formats) with Level 1
+            await self.reconcile_member_level_role(member, 1, reason=f"Level reset by {ctx.author}")
+            
+            # Log the action
+            self.db.log_admin_action(
+                admin_id=ctx.author.id,
+                admin_username=str(ctx.author),
+                action='resetlevel',
+                target_id=member.id,
+                target_username=str(member),
+                guild_id=ctx.guild.id
+            )
+            
+            embed = discord.Embed(
+                title="✅ Level Reset",
+                description=f"**{member.display_name}**'s level and XP have been reset to Level 1.",
+                color=discord.Color.green()
+            )
+            await ctx.send(embed=embed)
+            
+            logger.info(f"{ctx.author} reset level for {member}")
+        
+        except Exception as e:
+            logger.error(f"Error resetting level for {member}: {e}")
+            await ctx.send("An error occurred while resetting the user's level.")
+    
+    @commands.hybrid_command(name='setlevel')
+    @is_admin()
+    @app_commands.autocomplete(member=member_autocomplete)
+    async def set_user_level(self, ctx, member: IndexedMember, level: int):
+        """Set a user's level to a specific value (Admin only)"""
+        await ctx.defer()
+        try:
+            # Validate level
+            if level < 1:
+                await ctx.send("❌ Level must be at least 1.")
+                return
+            
+            if level > MAX_LEVEL_ROLES:
+                await ctx.send(f"❌ Level cannot exceed {MAX_LEVEL_ROLES}.")
+                return
+            
+            # Get current user data
+            current_data = self.db.get_user_xp(member.id, ctx.guild.id)
+            old_level = current_data['level']
+            
+            if level == old_level:
+                await ctx.send(f"**{member.display_name}** is already at Level {level}.")
+                return
+            
+            # Calculate required XP for the target level
+            required_xp = calculate_xp_for_level(level)
+            
+            # Update database with new level and XP
+            self.db.update_user_xp(
+                user_id=member.id,
+                guild_id=ctx.guild.id,
+                xp_gained=required_xp - current_data['xp'],  # Adjust XP to match level
+                new_level=level
+            )
+            
+            # Update level roles
+            await self.reconcile_member_level_role(member, level, reason=f"Level set to {level} by {ctx.author}")
+            
+            # Log the action
+            self.db.log_admin_action(
+                admin_id=ctx.author.id,
+                admin_username=str(ctx.author),
+                action='setlevel',
+                target_id=member.id,
+                target_username=str(member),
+                reason=f"Level changed from {old_level} to {level}",
+                guild_id=ctx.guild.id
+            )
+            
+            # Create response embed
+            embed = discord.Embed(
+                title="✅ Level Updated",
+                color=discord.Color.blue(),
+                timestamp=datetime.utcnow()
+            )
+            
+            embed.set_author(
+                name=member.display_name,
+                icon_url=member.avatar.url if member.avatar else member.default_avatar.url
+            )
+            
+            embed.add_field(name="Previous Level", value=str(old_level), inline=True)
+            embed.add_field(name="New Level", value=str(level), inline=True)
+            embed.add_field(name="New XP", value=f"{required_xp:,}", inline=True)
+            
+            # Calculate XP to next level
+            if level < MAX_LEVEL_ROLES:
+                xp_to_next = calculate_xp_to_next_level(required_xp, level)
+                embed.add_field(name="XP to Next Level", value=f"{xp_to_next:,}", inline=True)
+            
+            embed.set_footer(text=f"Level set by {ctx.author.display_name}")
+            
+            await ctx.send(embed=embed)
+            
+            # Announce level change in level-up channel if it's an upgrade
+            if level > old_level:
+                await self.announce_level_up(member, old_level, level, required_xp)
+            
+            logger.info(f"{ctx.author} set {member}'s level from {old_level} to {level}")
+        
+        except ValueError:
+            await ctx.send("❌ Please provide a valid level number.")
+        except Exception as e:
+            logger.error(f"Error setting level for {member}: {e}")
+            await ctx.send("An error occurred while setting the user's level.")
+    
+    @commands.hybrid_command(name='addxp')
+    @is_admin()
+    @app_commands.autocomplete(member=member_autocomplete)
+    async def add_user_xp(self, ctx, member: IndexedMember, xp_amount: int):
+        """Add XP points to a specific user (Admin only)"""
+        await ctx.defer()
+        try:
+            # Validate XP amount
+            if xp_amount == 0:
+                await ctx.send("❌ XP amount cannot be zero.")
+                return
+            
+            if abs(xp_amount) > 10000:
+                await ctx.send("❌ XP amount cannot exceed ±10,000 at once.")
+                return
+            
+            # Get current user data
+            current_data = self.db.get_user_xp(member.id, ctx.guild.id)
+            old_xp = current_data['xp']
+            old_level = current_data['level']
+            
+            # Calculate new XP (don't let it go below 0)
+            new_xp = max(0, old_xp + xp_amount)
+            new_level = calculate_level_from_xp(new_xp)
+            
+            # Update database
+            self.db.update_user_xp(
+                user_id=member.id,
+                guild_id=ctx.guild.id,
+                xp_gained=new_xp - old_xp,  # Actual XP change (might be different if capped at 0)
+                new_level=new_level if new_level != old_level else None
+            )
+            
+            # Handle level changes
+            level_changed = new_level != old_level
+            if level_changed and ENABLE_LEVEL_ROLES:
+                await self.update_user_level_role(member, old_level, new_level)
+            
+            # Log the action
+            action_type = 'addxp' if xp_amount > 0 else 'removexp'
+            self.db.log_admin_action(
+                admin_id=ctx.author.id,
+                admin_username=str(ctx.author),
+                action=action_type,
+                target_id=member.id,
+                target_username=str(member),
+                reason=f"{'Added' if xp_amount > 0 else 'Removed'} {abs(xp_amount)} XP",
+                guild_id=ctx.guild.id
+            )
+            
+            # Create response embed
+            embed = discord.Embed(
+                title="✅ XP Updated",
+                color=discord.Color.green() if xp_amount > 0 else discord.Color.orange(),
+                timestamp=datetime.utcnow()
+            )
+            
+            embed.set_author(
+                name=member.display_name,
+                icon_url=member.avatar.url if member.avatar else member.default_avatar.url
+            )
+            
+            # Show XP change
+            xp_change_text = f"+{xp_amount:,}" if xp_amount > 0 else f"{xp_amount:,}"
+            embed.add_field(name="XP Change", value=xp_change_text, inline=True)
+            embed.add_field(name="Previous XP", value=f"{old_xp:,}", inline=True)
+            embed.add_field(name="New XP", value=f"{new_xp:,}", inline=True)
+            
+            # Show level information
+            if level_changed:
+                embed.add_field(name="Previous Level", value=str(old_level), inline=True)
+                embed.add_field(name="New Level", value=str(new_level), inline=True)
+                
+                # Add level change indicator
+                if new_level > old_level:
+                    embed.add_field(name="Level Change", value="📈 Level Up!", inline=True)
+                else:
+                    embed.add_field(name="Level Change", value="📉 Level Down", inline=True)
+            else:
+                embed.add_field(name="Current Level", value=str(new_level), inline=True)
+                
+                # Show XP to next level
+                if new_level < MAX_LEVEL_ROLES:
+                    xp_to_next = calculate_xp_to_next_level(new_xp, new_level)
+                    embed.add_field(name="XP to Next Level", value=f"{xp_to_next:,}", inline=True)
+            
+            embed.set_footer(text=f"XP adjusted by {ctx.author.display_name}")
+            
+            await ctx.send(embed=embed)
+            
+            # Announce level up if applicable
+            if level_changed and new_level > old_level:
+                await self.announce_level_up(member, old_level, new_level, new_xp)
+            
+            action_word = "added" if xp_amount > 0 else "removed"
+            logger.info(f"{ctx.author} {action_word} {abs(xp_amount)} XP to {member} (Level {old_level}→{new_level})")
+        
+        except ValueError:
+            await ctx.send("❌ Please provide a valid XP amount (number).")
+        except Exception as e:
+            logger.error(f"Error adding XP to {member}: {e}")
+            await ctx.send("An error occurred while updating the user's XP.")
+    
+    @commands.command(name='updateroles')
+    @is_admin()
+    async def update_role_names(self, ctx):
+        """Update all level role names to include XP requirements (Admin only)"""
+        await self.run_level_role_provisioning(ctx, create=False)
+    
+    @commands.command(name='provisionroles')
+    @is_admin()
+    async def provision_roles(self, ctx):
+        """Create, rename and order all level roles ahead of time (Admin only)"""
+        if not ENABLE_LEVEL_ROLES:
+            await ctx.send("❌ Level roles are disabled in the configuration.")
+            return
+        
+        await self.run_level_role_provisioning(ctx, create=True)
+    
+    async def run_level_role_provisioning(self, ctx, create):
+        """Run provision_level_roles with a progress embed"""
+        action = 'provisionroles' if create else 'updateroles'
+        try:
+            # Send initial message
+            embed = discord.Embed(
+                title="🔄 Provisioning Level Roles" if create else "🔄 Updating Role Names",
+                description=f"Preparing level roles 1-{MAX_LEVEL_ROLES}..." if create else "Starting role name update process...",
+                color=discord.Color.blue()
+            )
+            embed.add_field(name="Status", value="Scanning roles...", inline=False)
+            status_msg = await ctx.send(embed=embed)
+            
+            async def progress(done, total):
+                progress_percent = int((done / total) * 100)
+                embed.set_field_at(0, name="Status", value=f"Updating roles... {progress_percent}% ({done}/{total})", inline=False)
+                await status_msg.edit(embed=embed)
+            
+            start = time.perf_counter()
+            result = await self.provision_level_roles(ctx.guild, create=create, reorder=create, progress=progress)
+            elapsed = time.perf_counter() - start
+            
+            # Final status
+            embed = discord.Embed(
+                title="✅ Level Roles Provisioned" if create else "✅ Role Names Updated",
+                color=discord.Color.green()
+            )
+            embed.add_field(name="Existing Roles", value=str(result['existing']), inline=True)
+            if create:
+                embed.add_field(name="Created", value=str(result['created']), inline=True)
+            embed.add_field(name="Renamed", value=str(result['renamed']), inline=True)
+            if create:
+                embed.add_field(name="Hierarchy", value="Reordered" if result['reordered'] else "Already in order", inline=True)
+            
+            if result['errors'] > 0:
+                embed.add_field(name="Errors", value=str(result['errors']), inline=True)
+                embed.color = discord.Color.orange()
+            
+            embed.set_footer(text=f"Completed in {elapsed:.1f}s at {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC")
+            await status_msg.edit(embed=embed)
+            
+            # Log the action
+            self.db.log_admin_action(
+                admin_id=ctx.author.id,
+                admin_username=str(ctx.author),
+                action=action,
+                reason=f"Created {result['created']} and renamed {result['renamed']} level roles",
+                guild_id=ctx.guild.id
+            )
+            
+            logger.info(f"{ctx.author} ran {action}: {result} in {elapsed:.1f}s")
+        
+        except Exception as e:
+            logger.error(f"Error in {action} command: {e}")
+            embed = discord.Embed(
+                title="❌ Update Failed",
+                description="An error occurred while updating level roles.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+    
+    @commands.command(name='recomputelevels')
+    @is_admin()
+    async def recompute_guild_levels(self, ctx, option: str = None):
+        """Recompute every stored level against the current XP curve (Admin only)"""
+        apply = option == 'apply'
+        
+        try:
+            status_msg = await ctx.send(f"🔄 {'Recomputing' if apply else 'Dry-running recompute of'} levels for all members...")
+            
+            # Stream the role-change plan to disk, it can be as large as the guild
+            with tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode='w+') as plan_file:
+                summary = await asyncio.to_thread(recompute_levels, self.db, ctx.guild.id, apply, 5000, plan_file)
+                
+                embed = discord.Embed(
+                    title="✅ Levels Recomputed" if apply else "📋 Level Recompute Dry Run",
+                    description=f"Curve: Base {LEVEL_UP_BASE} × Level^{LEVEL_UP_MULTIPLIER}",
+                    color=discord.Color.green() if apply else discord.Color.blue(),
+                    timestamp=datetime.utcnow()
+                )
+                embed.add_field(name="Members Scanned", value=f"{summary['scanned']:,}", inline=True)
+                embed.add_field(name="Level Changes", value=f"{summary['changed']:,}", inline=True)
+                embed.add_field(name="Up / Down", value=f"{summary['level_ups']:,} / {summary['level_downs']:,}", inline=True)
+                
+                transitions = "\n".join(
+                    f"Level {old_level} → {new_level}: {count:,}"
+                    for (old_level, new_level), count in summary['transitions'].most_common(10)
+                )
+                if transitions:
+                    embed.add_field(name="Most Common Transitions", value=f"```\n{transitions}\n```", inline=False)
+                if not apply and summary['changed']:
+                    embed.set_footer(text="Run !recomputelevels apply to write these changes")
+                
+                files = []
+                if summary['changed']:
+                    plan_file.seek(0)
+                    compressed = io.BytesIO(gzip.compress(plan_file.read().encode('utf-8')))
+                    files.append(discord.File(compressed, filename=f"role-plan-{ctx.guild.id}.jsonl.gz"))
+                
+                await status_msg.delete()
+                await ctx.send(embed=embed, files=files)
+            
+            if apply:
+                self.services.leaderboard_cache.clear()
+                
+                # Log the action
+                self.db.log_admin_action(
+                    admin_id=ctx.author.id,
+                    admin_username=str(ctx.author),
+                    action='recomputelevels',
+                    reason=f"Recomputed {summary['changed']} levels (Base {LEVEL_UP_BASE}, multiplier {LEVEL_UP_MULTIPLIER})",
+                    guild_id=ctx.guild.id
+                )
+            
+            logger.info(f"{ctx.author} {'applied' if apply else 'dry-ran'} level recompute: {summary['changed']} changes")
+        
+        except Exception as e:
+            logger.error(f"Error recomputing levels: {e}")
+            await ctx.send("An error occurred while recomputing levels.")
+    
+    @commands.command(name='levelstats')
+    @is_admin()
+    async def level_stats(self, ctx, option: str = None):
+        """Show leveling system statistics (Admin only)"""
+        try:
+            if option == 'rebuild':
+                self.db.rebuild_level_stats(ctx.guild.id)
+                logger.info(f"{ctx.author} rebuilt level statistics for {ctx.guild.name}")
+            
+            stats = self.db.get_level_stats(ctx.guild.id)
+            
+            if not stats:
+                await ctx.send("No leveling statistics available.")
+                return
+            
+            embed = discord.Embed(
+                title="📈 Leveling System Statistics",
+                color=discord.Color.blue(),
+                timestamp=datetime.utcnow()
+            )
+            
+            embed.add_field(name="Total Users", value=f"{stats['total_users']:,}", inline=True)
+            embed.add_field(name="Total XP Earned", value=f"{stats['total_xp']:,}", inline=True)
+            embed.add_field(name="Total Messages", value=f"{stats['total_messages']:,}", inline=True)
+            embed.add_field(name="Average Level", value=f"{stats['avg_level']:.1f}", inline=True)
+            embed.add_field(name="Highest Level", value=f"{stats['max_level']}", inline=True)
+            embed.add_field(name="Level Distribution", value=build_level_distribution_chart(stats['level_histogram']), inline=False)
+            
+            # System configuration (with this guild's overrides)
+            setting = lambda name: self.settings.get(ctx.guild.id, name)
+            config_text = f"""
+            **XP per Message:** {setting('XP_PER_MESSAGE')} + {setting('XP_BONUS_MIN')}-{setting('XP_BONUS_MAX')} bonus
+            **Message Length Bonus:** {setting('MESSAGE_LENGTH_MULTIPLIER')}x per char (max {setting('MAX_LENGTH_BONUS')})
+            **Min Message Length:** {setting('MIN_MESSAGE_LENGTH')} characters
+            **Cooldown:** {setting('XP_COOLDOWN')}s
+            **Level Formula:** Base {LEVEL_UP_BASE} × Level^{LEVEL_UP_MULTIPLIER}
+            **Level Roles:** {'Enabled (Red Gradient)' if ENABLE_LEVEL_ROLES else 'Disabled'}
+            """
+            embed.add_field(name="System Configuration", value=config_text, inline=False)
+            
+            embed.set_footer(text=f"Guild: {ctx.guild.name}")
+            
+            await ctx.send(embed=embed)
+        
+        except Exception as e:
+            logger.error(f"Error showing level stats: {e}")
+            await ctx.send("An error occurred while fetching leveling statistics.")
+    
+    @commands.command(name='synclevelroles')
+    @is_admin()
+    async def sync_level_roles(self, ctx):
+        """Sync level roles for users who don't have them (Admin only)"""
+        try:
+            if not ENABLE_LEVEL_ROLES:
+                await ctx.send("❌ Level roles are disabled in the configuration.")
+                return
+            
+            # Send initial message
+            embed = discord.Embed(
+                title="🔄 Syncing Level Roles",
+                description="Starting level role synchronization process...",
+                color=discord.Color.blue()
+            )
+            status_msg = await ctx.send(embed=embed)
+            
+            guild = ctx.guild
+            
+            # Stream members and collect the ones missing a level role
+            members_without_roles = []
+            total_members = 0
+            
+            # Check each member for level roles
+            async for member in iter_guild_members(guild):
+                total_members += 1
+                if member.bot:
+                    continue  # Skip bots
+                
+                # Check if member has any level role (both old and new formats)
+                has_level_role = any(is_level_role(role) for role in member.roles)
+                
+                if not has_level_role:
+                    # Get their level from database
+                    user_data = self.db.get_user_xp(member.id, guild.id)
+                    if user_data:
+                        members_without_roles.append((member, user_data['level']))
+            
+            members_to_sync = len(members_without_roles)
+            
+            # Update status
+            embed = discord.Embed(
+                title="🔄 Syncing Level Roles",
+                description=f"Found **{members_to_sync}** members without level roles out of **{total_members}** total members.",
+                color=discord.Color.orange()
+            )
+            embed.add_field(name="Status", value="Processing members...", inline=False)
+            await status_msg.edit(embed=embed)
+            
+            if members_to_sync == 0:
+                embed = discord.Embed(
+                    title="✅ Sync Complete",
+                    description="All members already have appropriate level roles!",
+                    color=discord.Color.green()
+                )
+                await status_msg.edit(embed=embed)
+                return
+            
+            # Process members
+            synced_count = 0
+            errors = 0
+            
+            for i, (member, level) in enumerate(members_without_roles):
+                try:
+                    # Set the appropriate level role in a single edit
+                    if await self.reconcile_member_level_role(member, level, reason=f"Level role sync by {ctx.author}"):
+                        synced_count += 1
+                    
+                    # Update status every 10 members or on last member
+                    if (i + 1) % 10 == 0 or i == len(members_without_roles) - 1:
+                        progress_percent = int(((i + 1) / len(members_without_roles)) * 100)
+                        embed.description = f"Found **{members_to_sync}** members without level roles out of **{total_members}** total members."
+                        embed.set_field_at(0, name="Status", value=f"Processing members... {progress_percent}% ({i + 1}/{len(members_without_roles)})", inline=False)
+                        await status_msg.edit(embed=embed)
+                    
+                    # Small delay to avoid rate limits
+                    if i % 5 == 0:
+                        await asyncio.sleep(0.2)
+                
+                except Exception as e:
+                    logger.error(f"Error syncing level role for {member} (Level {level}): {e}")
+                    errors += 1
+            
+            # Final status
+            embed = discord.Embed(
+                title="✅ Level Role Sync Complete",
+                description="Level role synchronization completed successfully!",
+                color=discord.Color.green()
+            )
+            embed.add_field(name="Total Members", value=str(total_members), inline=True)
+            embed.add_field(name="Members Needing Roles", value=str(members_to_sync), inline=True)
+            embed.add_field(name="Roles Assigned", value=str(synced_count), inline=True)
+            
+            if errors > 0:
+                embed.add_field(name="Errors", value=str(errors), inline=True)
+                embed.color = discord.Color.orange()
+            
+            embed.set_footer(text=f"Sync completed at {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC")
+            await status_msg.edit(embed=embed)
+            
+            # Log the action
+            self.db.log_admin_action(
+                admin_id=ctx.author.id,
+                admin_username=str(ctx.author),
+                action='synclevelroles',
+                reason=f"Synced level roles for {synced_count} members",
+                guild_id=guild.id
+            )
+            
+            logger.info(f"{ctx.author} synced level roles for {synced_count} members (errors: {errors})")
+        
+        except Exception as e:
+            logger.error(f"Error in sync_level_roles command: {e}")
+            embed = discord.Embed(
+                title="❌ Sync Failed",
+                description="An error occurred during level role synchronization.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+    
+    @commands.command(name='reconcileroles')
+    @is_admin()
+    async def reconcile_level_roles(self, ctx, option: str = None):
+        """Reconcile every member's level role with their stored level (Admin only)
+        
+        Without `apply` this is a dry run that reports the API calls it would make.
+        """
+        if not ENABLE_LEVEL_ROLES:
+            await ctx.send("❌ Level roles are disabled in the configuration.")
+            return
+        
+        apply = option == 'apply'
+        
+        try:
+            embed = discord.Embed(
+                title="🔄 Reconciling Level Roles" if apply else "📋 Level Role Dry Run",
+                description="Comparing member roles with stored levels...",
+                color=discord.Color.blue()
+            )
+            embed.add_field(name="Status", value="Loading levels...", inline=False)
+            status_msg = await ctx.send(embed=embed)
+            
+            guild = ctx.guild
+            levels = self.db.get_guild_levels(guild.id)
+            
+            scanned = 0
+            edits = 0
+            legacy_calls = 0
+            roles_to_create = set()
+            errors = 0
+            
+            async for member in iter_guild_members(guild):
+                if member.bot:
+                    continue
+                scanned += 1
+                
+                level = levels.get(member.id, 1)
+                try:
+                    if apply:
+                        if await self.reconcile_member_level_role(member, level, reason=f"Level role reconciliation by {ctx.author}"):
+                            edits += 1
+                    else:
+                        desired_role = self.find_level_role(guild, level) if level <= MAX_LEVEL_ROLES else None
+                        if level <= MAX_LEVEL_ROLES and desired_role is None:
+                            roles_to_create.add(level_role_band(level))
+                            needs_edit = True
+                            needs_add = True
+                        else:
+                            needs_edit = plan_level_roles(member, desired_role) is not None
+                            needs_add = desired_role is not None and desired_role not in member.roles
+                        
+                        if needs_edit:
+                            edits += 1
+                            # The old path used one remove_roles and one add_roles call
+                            needs_remove = any(is_level_role(role) and role != desired_role for role in member.roles)
+                            legacy_calls += int(needs_remove) + int(needs_add)
+                except Exception as e:
+                    logger.error(f"Error reconciling level role for {member} (Level {level}): {e}")
+                    errors += 1
+                
+                if scanned % 250 == 0:
+                    embed.set_field_at(0, name="Status", value=f"Scanned {scanned:,} members, {edits:,} {'edited' if apply else 'need changes'}", inline=False)
+                    await status_msg.edit(embed=embed)
+            
+            embed = discord.Embed(
+                title="✅ Level Roles Reconciled" if apply else "📋 Level Role Dry Run",
+                color=discord.Color.green() if apply else discord.Color.blue(),
+                timestamp=datetime.utcnow()
+            )
+            embed.add_field(name="Members Scanned", value=f"{scanned:,}", inline=True)
+            embed.add_field(name="Members Edited" if apply else "Members Needing Changes", value=f"{edits:,}", inline=True)
+            
+            if not apply:
+                total_calls = edits + len(roles_to_create)
+                embed.add_field(name="Roles to Create", value=f"{len(roles_to_create):,}", inline=True)
+                embed.add_field(name="Total API Calls", value=f"**{total_calls:,}** ({edits:,} member edits + {len(roles_to_create):,} role creations)", inline=False)
+                embed.add_field(name="With remove + add", value=f"{legacy_calls + len(roles_to_create):,} API calls", inline=False)
+                embed.set_footer(text="Run !reconcileroles apply to make these changes")
+            
+            # Level roles from a previous naming or band scheme that no member should hold any more
+            obsolete = [
+                role for role in guild.roles
+                if is_level_role(role) and self.find_level_role(guild, parse_level_role(role)) != role
+            ]
+            if obsolete:
+                embed.add_field(name="Obsolete Level Roles", value=f"{len(obsolete)} (safe to delete once this run is applied)", inline=False)
+            
+            if errors > 0:
+                embed.add_field(name="Errors", value=str(errors), inline=True)
+                embed.color = discord.Color.orange()
+            
+            await status_msg.edit(embed=embed)
+            
+            if apply:
+                # Log the action
+                self.db.log_admin_action(
+                    admin_id=ctx.author.id,
+                    admin_username=str(ctx.author),
+                    action='reconcileroles',
+                    reason=f"Reconciled level roles for {edits} of {scanned} members",
+                    guild_id=guild.id
+                )
+            
+            logger.info(f"{ctx.author} {'applied' if apply else 'dry-ran'} level role reconciliation: {edits} edits (errors: {errors})")
+        
+        except Exception as e:
+            logger.error(f"Error in reconcile_level_roles command: {e}")
+            embed = discord.Embed(
+                title="❌ Reconciliation Failed",
+                description="An error occurred during level role reconciliation.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+    
+    @commands.command(name='spamstats')
+    @is_admin()
+    async def spam_stats(self, ctx):
+        """Show how many messages the XP spam filter has rejected (Admin only)"""
+        stats = self.services.spam_filter.stats()
+        checked = stats['checked']
+        
+        embed = discord.Embed(
+            title="🛡️ XP Spam Filter",
+            description="Enabled" if self.settings.get(ctx.guild.id, 'ENABLE_SPAM_FILTER') else "Disabled (`!config set ENABLE_SPAM_FILTER true` to enable)",
+            color=discord.Color.blue(),
+            timestamp=datetime.utcnow()
+        )
+        embed.add_field(name="Messages Checked", value=f"{checked:,}", inline=True)
+        embed.add_field(name="Accepted", value=f"{stats['accepted']:,}", inline=True)
+        embed.add_field(name="Avg Check Time", value=f"{stats['avg_check_us']:.1f} µs", inline=True)
+        
+        rejected = "\n".join(
+            f"**{label}:** {stats[reason]:,} ({stats[reason] / checked:.1%})" if checked else f"**{label}:** 0"
+            for reason, label in (('duplicate', 'Repeated by same user'), ('copypasta', 'Pasted by several users'), ('low_entropy', 'Low effort'))
+        )
+        embed.add_field(name="Rejected", value=rejected, inline=False)
+        embed.set_footer(text=f"Tracking {stats['tracked_users']:,} users since startup")
+        
+        await ctx.send(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(Leveling(bot, bot.services))
@@ -0,0 +1,235 @@
+import asyncio
+import logging
+from datetime import datetime
+
+import discord
+from discord.ext import commands
+
+from config import *
+from services import is_admin
+
+logger = logging.getLogger(__name__)
+
+class Logs(commands.Cog):
+    """Message logging: every message, edit and deletion mirrored to the message log channel"""
+    def __init__(self, bot, services):
+        self.bot = bot
+        self.services = services
+    
+    async def cog_load(self):
+        self.services.add_startup_step('message_logging', self.setup_message_logging_channel)
+        self.services.add_message_stage('message_log', self.log_user_message, run_when_blocked=True)
+    
+    async def cog_unload(self):
+        self.services.remove_message_stage('message_log')
+    
+    async def setup_message_logging_channel(self):
+        """Set up the message logging channel"""
+        if not self.bot.guilds:
+            return
+        
+        guild = self.bot.guilds[0]  # Use first guild
+        
+        # Find or create admin category (shared with the other setup steps)
+        admin_category = await self.services.get_or_create_category(
+            guild,
+            ADMIN_CATEGORY,
+            overwrites={
+                guild.default_role: discord.PermissionOverwrite(read_messages=False),
+                guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True)
+            }
+        )
+        
+        # Find or create message log channel
+        self.services.message_log_channel = discord.utils.get(guild.channels, name=MESSAGE_LOG_CHANNEL)
+        if not self.services.message_log_channel:
+            self.services.message_log_channel = await guild.create_text_channel(
+                name=MESSAGE_LOG_CHANNEL,
+                category=admin_category,
+                overwrites={
+                    guild.default_role: discord.PermissionOverwrite(read_messages=False),
+                    guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True)
+                }
+            )
+        
+        logger.info(f"Message logging channel set up: #{self.services.message_log_channel.name}")
+    
+    async def log_user_message(self, message):
+        """Log user message to the message logging channel"""
+        await self.services.wait_for_channels()
+        if not self.services.message_log_channel:
+            return
+        
+        try:
+            # Create embed for the message log
+            embed = discord.Embed(
+                color=discord.Color.blue(),
+                timestamp=message.created_at
+            )
+            
+            # Set author info
+            embed.set_author(
+                name=f"{message.author.display_name} ({message.author})",
+                icon_url=message.author.avatar.url if message.author.avatar else message.author.default_avatar.url
+            )
+            
+            # Add message content
+            content = message.content if message.content else "*[No text content]*"
+            if len(content) > 1024:
+                content = content[:1021] + "..."
+            embed.add_field(name="Message", value=content, inline=False)
+            
+            # Add channel info
+            embed.add_field(name="Channel", value=f"#{message.channel.name}", inline=True)
+            embed.add_field(name="User ID", value=str(message.author.id), inline=True)
+            embed.add_field(name="Message ID", value=str(message.id), inline=True)
+            
+            # Add attachments info if any
+            if message.attachments:
+                attachment_info = []
+                for attachment in message.attachments:
+                    attachment_info.append(f"[{attachment.filename}]({attachment.url})")
+                embed.add_field(
+                    name="Attachments", 
+                    value="\n".join(attachment_info[:5]), # Limit to 5 attachments
+                    inline=False
+                )
+            
+            # Add embeds info if any
+            if message.embeds:
+                embed.add_field(name="Embeds", value=f"{len(message.embeds)} embed(s)", inline=True)
+            
+            # Add reactions info if any
+            if message.reactions:
+                reactions = [f"{reaction.emoji}({reaction.count})" for reaction in message.reactions[:5]]
+                embed.add_field(name="Reactions", value=" ".join(reactions), inline=True)
+            
+            # Set footer
+            embed.set_footer(text=f"Guild: {message.guild.name}")
+            
+            # Send to message log channel
+            await self.services.message_log_channel.send(embed=embed)
+        
+        except Exception as e:
+            logger.error(f"Error logging message: {e}")
+    
+    @commands.Cog.listener()
+    async def on_message_delete(self, message):
+        """Log deleted messages"""
+        if message.author.bot:
+            return
+        
+        await self.services.wait_for_channels()
+        if not self.services.message_log_channel:
+            return
+        
+        try:
+            embed = discord.Embed(
+                title="🗑️ Message Deleted",
+                color=discord.Color.red(),
+                timestamp=datetime.utcnow()
+            )
+            
+            embed.set_author(
+                name=f"{message.author.display_name} ({message.author})",
+                icon_url=message.author.avatar.url if message.author.avatar else message.author.default_avatar.url
+            )
+            
+            content = message.content if message.content else "*[No text content]*"
+            if len(content) > 1024:
+                content = content[:1021] + "..."
+            embed.add_field(name="Deleted Message", value=content, inline=False)
+            
+            embed.add_field(name="Channel", value=f"#{message.channel.name}", inline=True)
+            embed.add_field(name="User ID", value=str(message.author.id), inline=True)
+            embed.add_field(name="Message ID", value=str(message.id), inline=True)
+            
+            if message.attachments:
+                attachment_info = []
+                for attachment in message.attachments:
+                    attachment_info.append(f"{attachment.filename} ({attachment.url})")
+                embed.add_field(name="Attachments", value="\n".join(attachment_info[:3]), inline=False)
+            
+            embed.set_footer(text=f"Guild: {message.guild.name}")
+            await self.services.message_log_channel.send(embed=embed)
+        
+        except Exception as e:
+            logger.error(f"Error logging deleted message: {e}")
+    
+    @commands.Cog.listener()
+    async def on_message_edit(self, before, after):
+        """Log edited messages"""
+        if before.author.bot or before.content == after.content:
+            return
+        
+        await self.services.wait_for_channels()
+        if not self.services.message_log_channel:
+            return
+        
+        try:
+            embed = discord.Embed(
+                title="✏️ Message Edited",
+                color=discord.Color.orange(),
+                timestamp=datetime.utcnow()
+            )
+            
+            embed.set_author(
+                name=f"{after.author.display_name} ({after.author})",
+                icon_url=after.author.avatar.url if after.author.avatar else after.author.default_avatar.url
+            )
+            
+            # Before content
+            before_content = before.content if before.content else "*[No text content]*"
+            if len(before_content) > 512:
+                before_content = before_content[:509] + "..."
+            embed.add_field(name="Before", value=before_content, inline=False)
+            
+            # After content
+            after_content = after.content if after.content else "*[No text content]*"
+            if len(after_content) > 512:
+                after_content = after_content[:509] + "..."
+            embed.add_field(name="After", value=after_content, inline=False)
+            
+            embed.add_field(name="Channel", value=f"#{after.channel.name}", inline=True)
+            embed.add_field(name="User ID", value=str(after.author.id), inline=True)
+            embed.add_field(name="Message ID", value=str(after.id), inline=True)
+            
+            embed.set_footer(text=f"Guild: {after.guild.name}")
+            await self.services.message_log_channel.send(embed=embed)
+        
+        except Exception as e:
+            logger.error(f"Error logging edited message: {e}")
+    
+    @commands.command(name='testlog')
+    @is_admin()
+    async def test_logging(self, ctx):
+        """Test Discord logging functionality (Admin only)"""
+        logger.info("Testing INFO level logging to Discord")
+        logger.warning("Testing WARNING level logging to Discord")
+        logger.error("Testing ERROR level logging to Discord")
+        
+        await ctx.send("✅ Test logs sent! Check the #bot-logs channel in Admin category.")
+    
+    @commands.command(name='testmessagelog')
+    @is_admin()
+    async def test_message_logging(self, ctx):
+        """Test message logging functionality (Admin only)"""
+        if not self.services.message_log_channel:
+            await ctx.send("❌ Message logging channel not set up yet.")
+            return
+        
+        # Send test messages to demonstrate logging
+        await ctx.send("🧪 Testing message logging...")
+        await asyncio.sleep(1)
+        await ctx.send("This message should be logged to #all-message-logs")
+        await asyncio.sleep(1)
+        
+        # Edit the message to test edit logging
+        msg = await ctx.send("This message will be edited...")
+        await asyncio.sleep(2)
+        await msg.edit(content="This message was edited! (Edit should be logged)")
+        
+        await ctx.send(f"✅ Message logging test complete! Check #{MESSAGE_LOG_CHANNEL} in Admin category.")
+
+async def setup(bot):
+    await bot.add_cog(Logs(bot, bot.services))
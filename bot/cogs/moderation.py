@@ -0,0 +1,688 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import logging
+import re
+import tempfile
+from datetime import datetime, timedelta
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from config import *
+from services import IndexedMember, available_role_autocomplete, is_admin, member_autocomplete, parse_time
+
+logger = logging.getLogger(__name__)
+
+class PurgeFilterFlags(commands.FlagConverter):
+    """Filters accepted by `!purge filter`"""
+    user: discord.Member = None
+    regex: str = None
+    attachments: bool = None
+    after: str = None
+    before: str = None
+    limit: int = 1000
+
+async def filtered_purge(channel, check, limit, after=None, before=None, skip_ids=(), progress=None):
+    """Stream channel history and delete every message matching check.
+    
+    Messages younger than 14 days are removed with bulk_delete in chunks of 100,
+    older ones fall back to rate-limited single deletes.
+    Returns a (scanned, bulk_deleted, single_deleted) tuple.
+    """
+    # Keep a small margin so a message does not age past the limit mid-request
+    bulk_cutoff = discord.utils.utcnow() - timedelta(days=14) + timedelta(minutes=5)
+    scanned = 0
+    bulk_deleted = 0
+    single_deleted = 0
+    batch = []
+    
+    async def flush_batch():
+        nonlocal bulk_deleted, batch
+        if batch:
+            await channel.delete_messages(batch)
+            bulk_deleted += len(batch)
+            batch = []
+    
+    async for message in channel.history(limit=limit, before=before, after=after, oldest_first=False):
+        scanned += 1
+        
+        if message.id not in skip_ids and check(message):
+            if message.created_at > bulk_cutoff:
+                batch.append(message)
+                if len(batch) >= 100:
+                    await flush_batch()
+            else:
+                # History is newest first, so everything left in the batch is younger
+                await flush_batch()
+                try:
+                    await message.delete()
+                    single_deleted += 1
+                except discord.NotFound:
+                    pass
+                await asyncio.sleep(PURGE_SINGLE_DELETE_DELAY)
+        
+        if progress and scanned % PURGE_PROGRESS_INTERVAL == 0:
+            await progress(scanned, bulk_deleted + single_deleted)
+    
+    await flush_batch()
+    return scanned, bulk_deleted, single_deleted
+
+class AuditFlags(commands.FlagConverter):
+    """Filters accepted by `!audit` and `!audit export`"""
+    admin: discord.User = None
+    target: discord.User = None
+    action: str = None
+    after: str = None
+    before: str = None
+    limit: int = 10
+    format: str = 'jsonl'
+
+AUDIT_CSV_FIELDS = ['timestamp', 'action', 'admin_id', 'admin_username', 'target_id', 'target_username', 'reason', 'guild_id']
+
+def write_audit_export(cursor, export_format, output):
+    """Stream an admin log cursor into a gzip-compressed JSONL or CSV file object, returns row count"""
+    rows = 0
+    with gzip.GzipFile(fileobj=output, mode='wb') as compressed:
+        text = io.TextIOWrapper(compressed, encoding='utf-8', newline='')
+        writer = None
+        if export_format == 'csv':
+            writer = csv.DictWriter(text, fieldnames=AUDIT_CSV_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+        
+        for entry in cursor:
+            entry['timestamp'] = entry['timestamp'].isoformat() if entry.get('timestamp') else None
+            if writer:
+                writer.writerow(entry)
+            else:
+                text.write(json.dumps(entry, default=str) + "\n")
+            rows += 1
+        
+        text.flush()
+        text.detach()
+    
+    return rows
+
+class Moderation(commands.Cog):
+    """Role requests, restricted channels, kick/ban/mute, purges and the audit log"""
+    def __init__(self, bot, services):
+        self.bot = bot
+        self.services = services
+        self.db = services.db
+    
+    async def cog_load(self):
+        self.services.add_startup_step('mute_timers', self.load_mute_timers)
+        self.services.add_message_stage('restricted_channel', self.restricted_channel_stage, blocking=True)
+    
+    async def cog_unload(self):
+        self.services.remove_message_stage('restricted_channel')
+    
+    async def drain(self):
+        """Cancel pending auto-unmutes on shutdown, they are persisted and rescheduled on the next start"""
+        for task in self.services.mute_tasks.values():
+            task.cancel()
+        return {'mute timers': f"{len(self.services.mute_tasks)} persisted"}
+    
+    async def restricted_channel_stage(self, message):
+        """Delete messages from members without an allowed role, returns True if the message was blocked"""
+        if message.guild is None or message.channel.name not in RESTRICTED_CHANNELS:
+            return False
+        
+        allowed_roles = RESTRICTED_CHANNELS[message.channel.name]
+        user_roles = [role.name for role in message.author.roles]
+        
+        if not any(role in user_roles for role in allowed_roles):
+            await message.delete()
+            await message.author.send(f"You don't have permission to post in #{message.channel.name}")
+            return True
+        return False
+    
+    @commands.hybrid_command(name='role')
+    @app_commands.describe(role_name="Role to request")
+    @app_commands.autocomplete(role_name=available_role_autocomplete)
+    async def request_role(self, ctx, *, role_name: str = None):
+        """Request a role"""
+        if not role_name:
+            await ctx.send("Please specify a role name. Available roles: " + ", ".join(AVAILABLE_ROLES))
+            return
+        
+        # Check if role exists in available roles (case-insensitive, using the configured spelling)
+        role_name = next((name for name in AVAILABLE_ROLES if name.casefold() == role_name.strip().casefold()), role_name)
+        if role_name not in AVAILABLE_ROLES:
+            await ctx.send(f"Role '{role_name}' is not available. Available roles: {', '.join(AVAILABLE_ROLES)}")
+            return
+        
+        # Check if user already has the role
+        user_roles = [role.name for role in ctx.author.roles]
+        if role_name in user_roles:
+            await ctx.send(f"You already have the '{role_name}' role!")
+            return
+        
+        # Find the role in the guild
+        guild_role = discord.utils.get(ctx.guild.roles, name=role_name)
+        if not guild_role:
+            await ctx.send(f"Role '{role_name}' doesn't exist on this server. Please contact an admin.")
+            return
+        
+        try:
+            # Assign the role
+            await ctx.author.add_roles(guild_role)
+            
+            # Store in database
+            self.db.store_role_request(
+                user_id=ctx.author.id,
+                username=str(ctx.author),
+                role_name=role_name,
+                guild_id=ctx.guild.id,
+                status='approved'
+            )
+            
+            # Update user roles in database
+            updated_roles = user_roles + [role_name]
+            self.db.update_user_roles(ctx.author.id, ctx.guild.id, updated_roles)
+            
+            embed = discord.Embed(
+                title="Role Assigned! ✅",
+                description=f"You have been given the **{role_name}** role!",
+                color=discord.Color.green()
+            )
+            await ctx.send(embed=embed)
+            
+            logger.info(f"Role '{role_name}' assigned to {ctx.author} ({ctx.author.id})")
+        
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to assign roles. Please contact an admin.")
+        except Exception as e:
+            logger.error(f"Error assigning role: {e}")
+            await ctx.send("An error occurred while assigning the role.")
+    
+    @commands.command(name='myroles')
+    async def my_roles(self, ctx):
+        """Show user's current roles"""
+        user_roles = [role.name for role in ctx.author.roles if role.name != '@everyone']
+        
+        if not user_roles:
+            await ctx.send("You don't have any special roles.")
+            return
+        
+        embed = discord.Embed(
+            title=f"{ctx.author.display_name}'s Roles",
+            description=", ".join(user_roles),
+            color=discord.Color.blue()
+        )
+        await ctx.send(embed=embed)
+    
+    @commands.hybrid_command(name='kick')
+    @is_admin()
+    @app_commands.autocomplete(member=member_autocomplete)
+    async def kick_member(self, ctx, member: IndexedMember, *, reason: str = "No reason provided"):
+        """Kick a member"""
+        try:
+            await member.kick(reason=reason)
+            
+            # Log the action
+            self.db.log_admin_action(
+                admin_id=ctx.author.id,
+                admin_username=str(ctx.author),
+                action='kick',
+                target_id=member.id,
+                target_username=str(member),
+                reason=reason,
+                guild_id=ctx.guild.id
+            )
+            
+            embed = discord.Embed(
+                title="Member Kicked",
+                description=f"**{member}** has been kicked.\n**Reason:** {reason}",
+                color=discord.Color.orange()
+            )
+            await ctx.send(embed=embed)
+            
+            logger.info(f"{ctx.author} kicked {member} for: {reason}")
+        
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to kick this member.")
+        except Exception as e:
+            logger.error(f"Error kicking member: {e}")
+            await ctx.send("An error occurred while kicking the member.")
+    
+    @commands.hybrid_command(name='ban')
+    @is_admin()
+    @app_commands.autocomplete(member=member_autocomplete)
+    async def ban_member(self, ctx, member: IndexedMember, *, reason: str = "No reason provided"):
+        """Ban a member"""
+        try:
+            await member.ban(reason=reason)
+            
+            # Log the action
+            self.db.log_admin_action(
+                admin_id=ctx.author.id,
+                admin_username=str(ctx.author),
+                action='ban',
+                target_id=member.id,
+                target_username=str(member),
+                reason=reason,
+                guild_id=ctx.guild.id
+            )
+            
+            embed = discord.Embed(
+                title="Member Banned",
+                description=f"**{member}** has been banned.\n**Reason:** {reason}",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            
+            logger.info(f"{ctx.author} banned {member} for: {reason}")
+        
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to ban this member.")
+        except Exception as e:
+            logger.error(f"Error banning member: {e}")
+            await ctx.send("An error occurred while banning the member.")
+    
+    @commands.command(name='unban')
+    @is_admin()
+    async def unban_member(self, ctx, user_id: int):
+        """Unban a member by ID"""
+        try:
+            user = await self.bot.fetch_user(user_id)
+            await ctx.guild.unban(user)
+            
+            # Log the action
+            self.db.log_admin_action(
+                admin_id=ctx.author.id,
+                admin_username=str(ctx.author),
+                action='unban',
+                target_id=user_id,
+                target_username=str(user),
+                guild_id=ctx.guild.id
+            )
+            
+            embed = discord.Embed(
+                title="Member Unbanned",
+                description=f"**{user}** has been unbanned.",
+                color=discord.Color.green()
+            )
+            await ctx.send(embed=embed)
+            
+            logger.info(f"{ctx.author} unbanned {user}")
+        
+        except discord.NotFound:
+            await ctx.send("User not found or not banned.")
+        except Exception as e:
+            logger.error(f"Error unbanning member: {e}")
+            await ctx.send("An error occurred while unbanning the member.")
+    
+    @commands.hybrid_command(name='mute')
+    @is_admin()
+    @app_commands.describe(time="Duration such as 30s, 10m, 2h or 1d")
+    @app_commands.autocomplete(member=member_autocomplete)
+    async def mute_member(self, ctx, member: IndexedMember, time: str = "10m", *, reason: str = "No reason provided"):
+        """Mute a member"""
+        await ctx.defer()
+        try:
+            # Parse time (simple implementation)
+            duration = parse_time(time)
+            
+            # Create or get muted role
+            muted_role = discord.utils.get(ctx.guild.roles, name="Muted")
+            if not muted_role:
+                muted_role = await ctx.guild.create_role(name="Muted", permissions=discord.Permissions(send_messages=False, speak=False))
+                
+                # Set permissions for all channels
+                for channel in ctx.guild.channels:
+                    await channel.set_permissions(muted_role, send_messages=False, speak=False)
+            
+            await member.add_roles(muted_role, reason=reason)
+            
+            # Auto-unmute after duration (persisted so a restart does not leave the member muted)
+            if duration:
+                unmute_at = datetime.utcnow() + timedelta(seconds=duration)
+                self.db.set_mute_timer(ctx.guild.id, member.id, ctx.channel.id, unmute_at)
+                self.schedule_unmute(ctx.guild.id, member.id, ctx.channel.id, unmute_at)
+            
+            # Log the action
+            self.db.log_admin_action(
+                admin_id=ctx.author.id,
+                admin_username=str(ctx.author),
+                action='mute',
+                target_id=member.id,
+                target_username=str(member),
+                reason=f"{reason} (Duration: {time})",
+                guild_id=ctx.guild.id
+            )
+            
+            embed = discord.Embed(
+                title="Member Muted",
+                description=f"**{member}** has been muted for **{time}**.\n**Reason:** {reason}",
+                color=discord.Color.orange()
+            )
+            await ctx.send(embed=embed)
+            
+            logger.info(f"{ctx.author} muted {member} for {time}: {reason}")
+        
+        except Exception as e:
+            logger.error(f"Error muting member: {e}")
+            await ctx.send("An error occurred while muting the member.")
+    
+    def schedule_unmute(self, guild_id, user_id, channel_id, unmute_at):
+        """Start (or replace) the task that lifts a timed mute"""
+        existing = self.services.mute_tasks.pop((guild_id, user_id), None)
+        if existing:
+            existing.cancel()
+        
+        task = asyncio.create_task(self.auto_unmute(guild_id, user_id, channel_id, unmute_at))
+        self.services.mute_tasks[(guild_id, user_id)] = task
+        task.add_done_callback(lambda done: self.services.mute_tasks.pop((guild_id, user_id), None) if self.services.mute_tasks.get((guild_id, user_id)) is done else None)
+    
+    async def auto_unmute(self, guild_id, user_id, channel_id, unmute_at):
+        """Wait until unmute_at, then remove the Muted role and the persisted timer"""
+        await asyncio.sleep(max(0.0, (unmute_at - datetime.utcnow()).total_seconds()))
+        try:
+            guild = self.bot.get_guild(guild_id)
+            member = guild and (guild.get_member(user_id) or await guild.fetch_member(user_id))
+            muted_role = guild and discord.utils.get(guild.roles, name="Muted")
+            if member and muted_role and muted_role in member.roles:
+                await member.remove_roles(muted_role, reason="Mute expired")
+                channel = guild.get_channel(channel_id)
+                if channel:
+                    await channel.send(f"**{member}** has been automatically unmuted.")
+        except Exception as e:
+            logger.error(f"Error auto-unmuting user {user_id}: {e}")
+        
+        self.db.remove_mute_timer(guild_id, user_id)
+    
+    async def load_mute_timers(self):
+        """Reschedule timed mutes persisted before the last shutdown"""
+        timers = self.db.get_mute_timers()
+        for timer in timers:
+            self.schedule_unmute(timer['guild_id'], timer['user_id'], timer.get('channel_id'), timer['unmute_at'])
+        logger.info(f"Rescheduled {len(timers)} mute timers")
+    
+    @commands.hybrid_command(name='unmute')
+    @is_admin()
+    @app_commands.autocomplete(member=member_autocomplete)
+    async def unmute_member(self, ctx, member: IndexedMember):
+        """Unmute a member"""
+        try:
+            muted_role = discord.utils.get(ctx.guild.roles, name="Muted")
+            if muted_role and muted_role in member.roles:
+                await member.remove_roles(muted_role)
+                
+                # Cancel any pending auto-unmute
+                timer = self.services.mute_tasks.pop((ctx.guild.id, member.id), None)
+                if timer:
+                    timer.cancel()
+                self.db.remove_mute_timer(ctx.guild.id, member.id)
+                
+                # Log the action
+                self.db.log_admin_action(
+                    admin_id=ctx.author.id,
+                    admin_username=str(ctx.author),
+                    action='unmute',
+                    target_id=member.id,
+                    target_username=str(member),
+                    guild_id=ctx.guild.id
+                )
+                
+                embed = discord.Embed(
+                    title="Member Unmuted",
+                    description=f"**{member}** has been unmuted.",
+                    color=discord.Color.green()
+                )
+                await ctx.send(embed=embed)
+                
+                logger.info(f"{ctx.author} unmuted {member}")
+            else:
+                await ctx.send("This member is not muted.")
+        
+        except Exception as e:
+            logger.error(f"Error unmuting member: {e}")
+            await ctx.send("An error occurred while unmuting the member.")
+    
+    @commands.group(name='purge', invoke_without_command=True)
+    @is_admin()
+    async def purge_messages(self, ctx, amount: int):
+        """Delete multiple messages"""
+        if amount < 1 or amount > 100:
+            await ctx.send("Please specify a number between 1 and 100.")
+            return
+        
+        try:
+            deleted = await ctx.channel.purge(limit=amount + 1)  # +1 to include the command message
+            
+            # Log the action
+            self.db.log_admin_action(
+                admin_id=ctx.author.id,
+                admin_username=str(ctx.author),
+                action='purge',
+                reason=f"Deleted {len(deleted)-1} messages in #{ctx.channel.name}",
+                guild_id=ctx.guild.id
+            )
+            
+            embed = discord.Embed(
+                title="Messages Purged",
+                description=f"Deleted **{len(deleted)-1}** messages.",
+                color=discord.Color.blue()
+            )
+            msg = await ctx.send(embed=embed)
+            
+            # Delete confirmation message after 5 seconds
+            await asyncio.sleep(5)
+            await msg.delete()
+            
+            logger.info(f"{ctx.author} purged {len(deleted)-1} messages in #{ctx.channel.name}")
+        
+        except Exception as e:
+            logger.error(f"Error purging messages: {e}")
+            await ctx.send("An error occurred while purging messages.")
+    
+    @purge_messages.command(name='filter')
+    @is_admin()
+    async def purge_filtered(self, ctx, *, flags: PurgeFilterFlags):
+        """Delete messages matching filters, e.g. `!purge filter user: @spammer regex: free nitro after: 2h limit: 3000`"""
+        if flags.limit < 1 or flags.limit > PURGE_MAX_SCAN:
+            await ctx.send(f"Please specify a scan limit between 1 and {PURGE_MAX_SCAN}.")
+            return
+        
+        if flags.user is None and flags.regex is None and flags.attachments is None and flags.after is None and flags.before is None:
+            await ctx.send("Please specify at least one filter: `user:`, `regex:`, `attachments:`, `after:` or `before:`.")
+            return
+        
+        pattern = None
+        if flags.regex:
+            try:
+                pattern = re.compile(flags.regex, re.IGNORECASE)
+            except re.error as e:
+                await ctx.send(f"❌ Invalid regex: {e}")
+                return
+        
+        # Time window is given as an age, e.g. `after: 2h` means "newer than 2 hours"
+        now = discord.utils.utcnow()
+        after = now - timedelta(seconds=parse_time(flags.after)) if flags.after else None
+        before = now - timedelta(seconds=parse_time(flags.before)) if flags.before else None
+        
+        def check(message):
+            if flags.user and message.author.id != flags.user.id:
+                return False
+            if pattern and not pattern.search(message.content or ""):
+                return False
+            if flags.attachments is not None and bool(message.attachments) != flags.attachments:
+                return False
+            return True
+        
+        try:
+            await ctx.message.delete()
+            
+            embed = discord.Embed(
+                title="🧹 Purging Messages",
+                description=f"Scanning up to **{flags.limit}** messages in #{ctx.channel.name}...",
+                color=discord.Color.orange()
+            )
+            embed.add_field(name="Status", value="Starting...", inline=False)
+            status_msg = await ctx.send(embed=embed)
+            
+            async def progress(scanned, deleted):
+                embed.set_field_at(0, name="Status", value=f"Scanned {scanned:,}/{flags.limit:,} messages, deleted {deleted:,}", inline=False)
+                await status_msg.edit(embed=embed)
+            
+            scanned, bulk_deleted, single_deleted = await filtered_purge(
+                ctx.channel,
+                check,
+                limit=flags.limit,
+                after=after,
+                before=before,
+                skip_ids={status_msg.id},
+                progress=progress
+            )
+            deleted = bulk_deleted + single_deleted
+            
+            filters = []
+            if flags.user:
+                filters.append(f"user={flags.user}")
+            if flags.regex:
+                filters.append(f"regex={flags.regex}")
+            if flags.attachments is not None:
+                filters.append(f"attachments={flags.attachments}")
+            if flags.after:
+                filters.append(f"after={flags.after}")
+            if flags.before:
+                filters.append(f"before={flags.before}")
+            
+            # Log the action
+            self.db.log_admin_action(
+                admin_id=ctx.author.id,
+                admin_username=str(ctx.author),
+                action='purge',
+                target_id=flags.user.id if flags.user else None,
+                target_username=str(flags.user) if flags.user else None,
+                reason=f"Deleted {deleted} of {scanned} scanned messages in #{ctx.channel.name} ({', '.join(filters)})",
+                guild_id=ctx.guild.id
+            )
+            
+            embed = discord.Embed(
+                title="Messages Purged",
+                description=f"Deleted **{deleted:,}** messages out of **{scanned:,}** scanned.",
+                color=discord.Color.blue()
+            )
+            embed.add_field(name="Bulk Deleted", value=f"{bulk_deleted:,}", inline=True)
+            embed.add_field(name="Deleted Individually", value=f"{single_deleted:,}", inline=True)
+            embed.add_field(name="Filters", value=", ".join(filters), inline=False)
+            await status_msg.edit(embed=embed)
+            
+            logger.info(f"{ctx.author} purged {deleted} filtered messages in #{ctx.channel.name} ({', '.join(filters)})")
+            
+            # Delete confirmation message after 10 seconds
+            await asyncio.sleep(10)
+            await status_msg.delete()
+        
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to delete messages in this channel.")
+        except Exception as e:
+            logger.error(f"Error purging filtered messages: {e}")
+            await ctx.send("An error occurred while purging messages.")
+    
+    def query_audit_logs(self, guild_id, flags, limit, batch_size=AUDIT_EXPORT_BATCH_SIZE):
+        """Build an admin log cursor from audit flags (ages like `after: 7d` mean newer than 7 days)"""
+        now = datetime.utcnow()
+        return self.db.find_admin_logs(
+            guild_id,
+            admin_id=flags.admin.id if flags.admin else None,
+            target_id=flags.target.id if flags.target else None,
+            action=flags.action.lower() if flags.action else None,
+            since=now - timedelta(seconds=parse_time(flags.after)) if flags.after else None,
+            until=now - timedelta(seconds=parse_time(flags.before)) if flags.before else None,
+            limit=limit,
+            batch_size=batch_size
+        )
+    
+    @commands.group(name='audit', invoke_without_command=True)
+    @is_admin()
+    async def audit_log(self, ctx, *, flags: AuditFlags):
+        """Query the admin audit log, e.g. `!audit admin: @mod action: ban after: 7d` (Admin only)"""
+        limit = min(max(flags.limit, 1), 25)
+        
+        try:
+            entries = list(self.query_audit_logs(ctx.guild.id, flags, limit, batch_size=limit))
+            
+            if not entries:
+                await ctx.send("No audit log entries match those filters.")
+                return
+            
+            embed = discord.Embed(
+                title="📜 Audit Log",
+                color=discord.Color.blue(),
+                timestamp=datetime.utcnow()
+            )
+            
+            lines = []
+            for entry in entries:
+                line = f"`{entry['timestamp'].strftime('%Y-%m-%d %H:%M')}` **{entry['action']}** by {entry['admin_username']}"
+                if entry.get('target_username'):
+                    line += f" → {entry['target_username']}"
+                if entry.get('reason'):
+                    line += f"\n└ {entry['reason'][:120]}"
+                lines.append(line)
+            
+            embed.description = "\n".join(lines)[:4000]
+            embed.set_footer(text=f"Showing {len(entries)} newest entries • !audit export for a full download")
+            await ctx.send(embed=embed)
+        
+        except Exception as e:
+            logger.error(f"Error querying audit log: {e}")
+            await ctx.send("An error occurred while querying the audit log.")
+    
+    @audit_log.command(name='export')
+    @is_admin()
+    async def audit_export(self, ctx, *, flags: AuditFlags):
+        """Export matching audit log entries as a compressed JSONL or CSV file (Admin only)"""
+        export_format = flags.format.lower()
+        if export_format not in ('jsonl', 'csv'):
+            await ctx.send("❌ Format must be `jsonl` or `csv`.")
+            return
+        
+        try:
+            status_msg = await ctx.send("📦 Exporting audit log...")
+            cursor = self.query_audit_logs(ctx.guild.id, flags, AUDIT_EXPORT_MAX_ROWS)
+            
+            # Spill to disk past 1 MB so large exports never sit in memory
+            with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as output:
+                rows = await asyncio.to_thread(write_audit_export, cursor, export_format, output)
+                size = output.tell()
+                
+                if rows == 0:
+                    await status_msg.edit(content="No audit log entries match those filters.")
+                    return
+                
+                if size > ctx.guild.filesize_limit:
+                    await status_msg.edit(content=f"❌ Export is {size / 1048576:.1f} MB, over this server's upload limit. Narrow the filters.")
+                    return
+                
+                output.seek(0)
+                filename = f"audit-{ctx.guild.id}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{export_format}.gz"
+                await ctx.send(
+                    content=f"✅ Exported **{rows:,}** audit log entries ({size / 1024:.1f} KiB compressed).",
+                    file=discord.File(output, filename=filename)
+                )
+                await status_msg.delete()
+            
+            # Log the action
+            self.db.log_admin_action(
+                admin_id=ctx.author.id,
+                admin_username=str(ctx.author),
+                action='auditexport',
+                reason=f"Exported {rows} audit log entries as {export_format}",
+                guild_id=ctx.guild.id
+            )
+            
+            logger.info(f"{ctx.author} exported {rows} audit log entries")
+        
+        except Exception as e:
+            logger.error(f"Error exporting audit log: {e}")
+            await ctx.send("An error occurred while exporting the audit log.")
+
+async def setup(bot):
+    await bot.add_cog(Moderation(bot, bot.services))
@@ -0,0 +1,302 @@
+import asyncio
+import logging
+import os
+import tracemalloc
+from datetime import datetime
+
+import discord
+from discord.ext import commands, tasks
+
+from config import *
+from services import is_admin
+from settings import TUNABLE_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+def get_resident_memory_mb():
+    """Current resident set size in MB (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+class Ops(commands.Cog):
+    """Operational commands: memory, database, pipeline and per-server settings"""
+    def __init__(self, bot, services):
+        self.bot = bot
+        self.services = services
+        self.db = services.db
+        self.settings = services.settings
+    
+    async def cog_load(self):
+        if ENABLE_TRACEMALLOC and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        self.memory_check_loop.start()
+        self.spool_replay_loop.start()
+    
+    async def cog_unload(self):
+        self.memory_check_loop.cancel()
+        self.spool_replay_loop.cancel()
+    
+    async def drain(self):
+        """Stop the periodic checks on shutdown, the spool itself is synced by the shutdown"""
+        self.memory_check_loop.cancel()
+        self.spool_replay_loop.cancel()
+        return {}
+    
+    def get_cache_sizes(self):
+        """Entry counts of every bot-owned and discord.py cache"""
+        return {
+            'XP cooldowns': len(self.services.user_cooldowns),
+            'Leaderboard pages': len(self.services.leaderboard_cache),
+            'Period leaderboards': len(self.services.period_leaderboard_cache),
+            'Rendered cards': len(self.services.card_renderer),
+            'Pending XP rollups': len(self.services.xp_rollups),
+            'Pending activity buckets': len(self.services.activity_buckets),
+            'Spam filter users': len(self.services.spam_filter),
+            'Pending log sends': len(self.services.discord_handler.pending_sends),
+            'Running message stages': len(self.services.message_stage_tasks),
+            'Cached messages': len(self.bot.cached_messages),
+            'Cached members': sum(len(guild.members) for guild in self.bot.guilds),
+            'Cached users': len(self.bot.users)
+        }
+    
+    async def check_memory(self):
+        """Prune caches, diff tracemalloc snapshots and enforce the memory budget"""
+        leveling = self.bot.get_cog('Leveling')
+        if leveling:
+            leveling.prune_user_cooldowns()
+        
+        rss_mb = get_resident_memory_mb()
+        if MEMORY_BUDGET_MB and rss_mb > MEMORY_BUDGET_MB:
+            # Over budget: drop everything that can be rebuilt from the database
+            self.services.leaderboard_cache.clear()
+            self.services.period_leaderboard_cache.clear()
+            self.services.card_renderer.clear()
+            self.services.spam_filter.clear()
+            if leveling:
+                await leveling.flush_xp_rollups()
+            logger.warning(f"Resident memory {rss_mb:.0f} MB exceeds budget of {MEMORY_BUDGET_MB} MB, cleared caches")
+        
+        self.services.memory_report['rss_mb'] = rss_mb
+        self.services.memory_report['checked_at'] = datetime.utcnow()
+        
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ))
+            if self.services.memory_snapshot is not None:
+                self.services.memory_report['top_diffs'] = snapshot.compare_to(self.services.memory_snapshot, 'lineno')[:10]
+            self.services.memory_snapshot = snapshot
+    
+    @tasks.loop(seconds=MEMORY_CHECK_INTERVAL)
+    async def memory_check_loop(self):
+        """Periodically check memory usage"""
+        await self.check_memory()
+    
+    @tasks.loop(seconds=SPOOL_REPLAY_INTERVAL)
+    async def spool_replay_loop(self):
+        """fsync buffered spool records and replay the spool once MongoDB is reachable"""
+        self.db.spool.sync()
+        try:
+            replayed = await asyncio.to_thread(self.db.replay_spool)
+            if replayed:
+                logger.info(f"Replayed {replayed} spooled database writes")
+        except Exception as e:
+            logger.error(f"Error replaying database spool: {e}")
+    
+    @commands.command(name='memory')
+    @is_admin()
+    async def memory_stats(self, ctx, option: str = None):
+        """Show memory usage, cache sizes and top allocation sites (Admin only)"""
+        try:
+            if option == 'now':
+                await self.check_memory()
+            
+            rss_mb = self.services.memory_report['rss_mb'] or get_resident_memory_mb()
+            
+            embed = discord.Embed(
+                title="🧠 Memory Usage",
+                color=discord.Color.orange() if MEMORY_BUDGET_MB and rss_mb > MEMORY_BUDGET_MB else discord.Color.blue(),
+                timestamp=datetime.utcnow()
+            )
+            embed.add_field(name="Resident Memory", value=f"{rss_mb:.1f} MB", inline=True)
+            embed.add_field(name="Budget", value=f"{MEMORY_BUDGET_MB} MB" if MEMORY_BUDGET_MB else "Disabled", inline=True)
+            embed.add_field(name="Dropped Log Sends", value=str(self.services.discord_handler.dropped), inline=True)
+            
+            cache_text = "\n".join(f"**{name}:** {size:,}" for name, size in self.get_cache_sizes().items())
+            embed.add_field(name="Cache Sizes", value=cache_text, inline=False)
+            
+            if ENABLE_IMAGE_CARDS:
+                cards = self.services.card_renderer.stats()
+                embed.add_field(
+                    name="Image Cards",
+                    value=f"{cards['cached']} cached ({cards['cached_kb']:.0f} KB), {cards['hit_rate']:.0%} hit rate, {cards['avg_render_ms']:.0f} ms per render",
+                    inline=False
+                )
+            
+            if tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                embed.add_field(name="Traced Memory", value=f"{current / 1048576:.1f} MB (peak {peak / 1048576:.1f} MB)", inline=False)
+                
+                diff_lines = []
+                for stat in self.services.memory_report['top_diffs']:
+                    frame = stat.traceback[0]
+                    diff_lines.append(f"{os.path.basename(frame.filename)}:{frame.lineno} {stat.size_diff / 1024:+.1f} KiB ({stat.count_diff:+d})")
+                diff_text = "\n".join(diff_lines) or "Waiting for a second snapshot"
+                embed.add_field(name="Top Allocation Growth", value=f"```\n{diff_text[:1000]}\n```", inline=False)
+            else:
+                embed.add_field(name="Allocation Tracing", value="Disabled (set `ENABLE_TRACEMALLOC=true`)", inline=False)
+            
+            checked_at = self.services.memory_report['checked_at']
+            embed.set_footer(text=f"Last check: {checked_at.strftime('%Y-%m-%d %H:%M:%S')} UTC" if checked_at else "No periodic check yet")
+            
+            await ctx.send(embed=embed)
+        
+        except Exception as e:
+            logger.error(f"Error showing memory stats: {e}")
+            await ctx.send("An error occurred while collecting memory statistics.")
+    
+    @commands.group(name='config', invoke_without_command=True)
+    @is_admin()
+    async def guild_config(self, ctx):
+        """Show this server's tunable settings and where each value comes from (Admin only)"""
+        try:
+            overrides = self.settings.overrides(ctx.guild.id)
+            
+            embed = discord.Embed(
+                title="🛠️ Server Configuration",
+                description="Changes take effect immediately. `!config set <setting> <value>` / `!config reset <setting>`",
+                color=discord.Color.blue(),
+                timestamp=datetime.utcnow()
+            )
+            for name, (_, description) in TUNABLE_SETTINGS.items():
+                value = self.settings.get(ctx.guild.id, name)
+                if isinstance(value, list):
+                    value = ", ".join(value)
+                source = "server override" if name in overrides else "default"
+                embed.add_field(name=name, value=f"`{value}` ({source})\n*{description}*", inline=False)
+            
+            await ctx.send(embed=embed)
+        
+        except Exception as e:
+            logger.error(f"Error showing server configuration: {e}")
+            await ctx.send("An error occurred while loading the server configuration.")
+    
+    @guild_config.command(name='set')
+    @is_admin()
+    async def guild_config_set(self, ctx, name: str, *, value: str):
+        """Override a setting for this server (Admin only)"""
+        name = name.upper()
+        try:
+            parsed = self.settings.set(ctx.guild.id, name, value)
+        except ValueError as e:
+            await ctx.send(f"❌ {e}. Use `!config` to list settings.")
+            return
+        except Exception as e:
+            logger.error(f"Error setting {name}: {e}")
+            await ctx.send("An error occurred while saving the setting.")
+            return
+        
+        # Log the action
+        self.db.log_admin_action(
+            admin_id=ctx.author.id,
+            admin_username=str(ctx.author),
+            action='config',
+            reason=f"Set {name} to {parsed}",
+            guild_id=ctx.guild.id
+        )
+        
+        await ctx.send(f"✅ **{name}** is now `{parsed}` for this server.")
+        logger.info(f"{ctx.author} set {name} to {parsed} in {ctx.guild.name}")
+    
+    @guild_config.command(name='reset')
+    @is_admin()
+    async def guild_config_reset(self, ctx, name: str):
+        """Remove a server override so the default applies again (Admin only)"""
+        name = name.upper()
+        try:
+            self.settings.reset(ctx.guild.id, name)
+        except ValueError as e:
+            await ctx.send(f"❌ {e}. Use `!config` to list settings.")
+            return
+        except Exception as e:
+            logger.error(f"Error resetting {name}: {e}")
+            await ctx.send("An error occurred while resetting the setting.")
+            return
+        
+        # Log the action
+        self.db.log_admin_action(
+            admin_id=ctx.author.id,
+            admin_username=str(ctx.author),
+            action='config',
+            reason=f"Reset {name} to the default",
+            guild_id=ctx.guild.id
+        )
+        
+        await ctx.send(f"✅ **{name}** is back to the default `{self.settings.get(ctx.guild.id, name)}`.")
+        logger.info(f"{ctx.author} reset {name} in {ctx.guild.name}")
+    
+    @commands.command(name='dbstatus')
+    @is_admin()
+    async def database_status(self, ctx, option: str = None):
+        """Show the MongoDB circuit breaker and write spool state (Admin only)"""
+        try:
+            if option == 'replay':
+                replayed = await asyncio.to_thread(self.db.replay_spool)
+                await ctx.send(f"🔁 Replayed **{replayed:,}** spooled writes.")
+            
+            breaker = self.db.breaker
+            pending = await asyncio.to_thread(self.db.spool.pending)
+            
+            embed = discord.Embed(
+                title="🗄️ Database Status",
+                color=discord.Color.green() if breaker.state == breaker.CLOSED else discord.Color.orange(),
+                timestamp=datetime.utcnow()
+            )
+            embed.add_field(name="Circuit Breaker", value=breaker.state.replace('_', ' ').title(), inline=True)
+            embed.add_field(name="Consecutive Failures", value=str(breaker.failures), inline=True)
+            embed.add_field(name="Spool Pending", value=f"{pending / 1024:.1f} KiB", inline=True)
+            embed.add_field(name="Spooled Since Start", value=f"{self.db.spool.appended:,}", inline=True)
+            embed.add_field(name="Replayed Since Start", value=f"{self.db.spool.replayed:,}", inline=True)
+            embed.add_field(name="Dead-Lettered Since Start", value=f"{self.db.spool.dead_lettered:,}", inline=True)
+            embed.set_footer(text="!dbstatus replay to replay the spool now")
+            
+            await ctx.send(embed=embed)
+        
+        except Exception as e:
+            logger.error(f"Error showing database status: {e}")
+            await ctx.send("An error occurred while checking the database status.")
+    
+    @commands.command(name='pipeline')
+    @is_admin()
+    async def pipeline_stats(self, ctx):
+        """Show per-stage timings of the message pipeline (Admin only)"""
+        if not self.services.message_stage_stats:
+            await ctx.send("No messages processed yet.")
+            return
+        
+        lines = []
+        for name, stats in self.services.message_stage_stats.items():
+            average_ms = stats['total'] / stats['runs'] * 1000 if stats['runs'] else 0
+            lines.append(f"{name:<20} {stats['runs']:>8,} runs  avg {average_ms:>7.2f} ms  max {stats['max'] * 1000:>8.1f} ms  errors {stats['errors']:,}")
+        
+        table = "\n".join(lines)
+        embed = discord.Embed(
+            title="⚙️ Message Pipeline",
+            description=f"```\n{table[:4000]}\n```",
+            color=discord.Color.blue(),
+            timestamp=datetime.utcnow()
+        )
+        embed.set_footer(text=f"{len(self.services.message_stage_tasks)} background stages running")
+        await ctx.send(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(Ops(bot, bot.services))
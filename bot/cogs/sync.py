@@ -0,0 +1,404 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+
+import discord
+from discord.ext import commands
+
+from config import *
+from services import is_admin, iter_guild_members, member_index_entry
+
+logger = logging.getLogger(__name__)
+
+async def extract_user_data(member):
+    """Extract comprehensive user data from Discord member object"""
+    try:
+        # Get avatar URL
+        avatar_url = None
+        if member.avatar:
+            avatar_url = member.avatar.url
+        elif member.default_avatar:
+            avatar_url = member.default_avatar.url
+        
+        # Get banner URL (if available)
+        banner_url = None
+        if hasattr(member, 'banner') and member.banner:
+            banner_url = member.banner.url
+        
+        # Get accent color
+        accent_color = None
+        if hasattr(member, 'accent_color') and member.accent_color:
+            accent_color = str(member.accent_color)
+        elif hasattr(member, 'color') and member.color:
+            accent_color = str(member.color)
+        
+        # Get activity information
+        activity = None
+        if hasattr(member, 'activity') and member.activity:
+            activity = {
+                'type': str(member.activity.type) if member.activity.type else None,
+                'name': member.activity.name if hasattr(member.activity, 'name') else None,
+                'details': member.activity.details if hasattr(member.activity, 'details') else None,
+                'state': member.activity.state if hasattr(member.activity, 'state') else None
+            }
+        elif hasattr(member, 'activities') and member.activities:
+            # Take the first activity if multiple
+            first_activity = member.activities[0]
+            activity = {
+                'type': str(first_activity.type) if first_activity.type else None,
+                'name': first_activity.name if hasattr(first_activity, 'name') else None,
+                'details': first_activity.details if hasattr(first_activity, 'details') else None,
+                'state': first_activity.state if hasattr(first_activity, 'state') else None
+            }
+        
+        return {
+            'avatar_url': avatar_url,
+            'banner_url': banner_url,
+            'accent_color': accent_color,
+            'activity': activity
+        }
+        
+    except Exception as e:
+        logger.error(f"Error extracting user data for {member}: {e}")
+        return {
+            'avatar_url': None,
+            'banner_url': None,
+            'accent_color': None,
+            'activity': None
+        }
+
+class Sync(commands.Cog):
+    """Member data: joins and leaves, activity tracking, the name index, the member count channel and !syncusers"""
+    def __init__(self, bot, services):
+        self.bot = bot
+        self.services = services
+        self.db = services.db
+    
+    async def cog_load(self):
+        self.services.add_startup_step('member_count', self.setup_member_count_channel)
+        self.services.add_startup_step('name_index', self.build_name_indexes)
+        self.services.add_message_stage('activity', self.update_activity_stage)
+    
+    async def cog_unload(self):
+        self.services.remove_message_stage('activity')
+    
+    async def setup_member_count_channel(self):
+        """Set up the member count channel in General category"""
+        if not self.bot.guilds:
+            return
+        
+        guild = self.bot.guilds[0]  # Use first guild
+        
+        # Find or create General category
+        general_category = await self.services.get_or_create_category(
+            guild,
+            GENERAL_CATEGORY,
+            overwrites={
+                guild.default_role: discord.PermissionOverwrite(read_messages=True, send_messages=False, connect=False),
+                guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_channels=True)
+            }
+        )
+        
+        # Find or create member count channel
+        self.services.member_count_channel = None
+        for channel in guild.channels:
+            if channel.name.startswith(MEMBER_COUNT_CHANNEL):
+                self.services.member_count_channel = channel
+                break
+        if not self.services.member_count_channel:
+            # Create the channel with initial member count
+            member_count = guild.member_count
+            channel_name = f"{MEMBER_COUNT_CHANNEL}-{member_count}"
+            
+            self.services.member_count_channel = await guild.create_text_channel(
+                name=channel_name,
+                category=general_category,
+                overwrites={
+                    guild.default_role: discord.PermissionOverwrite(read_messages=True, send_messages=False),
+                    guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_channels=True)
+                }
+            )
+            
+            # Send welcome message to the channel
+            embed = discord.Embed(
+                title="📊 Server Member Count",
+                description=f"This channel displays the current number of members in **{guild.name}**.",
+                color=discord.Color.blue()
+            )
+            embed.add_field(name="Current Members", value=f"**{member_count}** members", inline=False)
+            embed.add_field(name="Note", value="This channel is read-only and updates automatically when members join or leave.", inline=False)
+            embed.set_footer(text=f"Last updated: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC")
+            
+            await self.services.member_count_channel.send(embed=embed)
+        else:
+            # Update existing channel name if needed
+            await self.update_member_count_channel()
+        
+        logger.info(f"Member count channel set up: #{self.services.member_count_channel.name}")
+    
+    async def build_name_indexes(self):
+        """Index every guild's role and member names for autocomplete and member lookups
+        
+        Members are streamed in batches and merged with one sort per batch; joins,
+        leaves and renames that arrive meanwhile are applied by the listeners below.
+        """
+        for guild in self.bot.guilds:
+            index = self.services.name_index(guild.id)
+            for role in guild.roles:
+                index.add_role(role)
+            
+            start = time.perf_counter()
+            batch = []
+            async for member in iter_guild_members(guild):
+                batch.append(member_index_entry(member))
+                if len(batch) >= NAME_INDEX_BATCH_SIZE:
+                    index.members.add_many(batch)
+                    batch = []
+                    await asyncio.sleep(0)  # Let events through between batches on huge guilds
+            index.members.add_many(batch)
+            index.members_ready = True
+            
+            logger.info(f"Indexed {len(index.members)} member names and {len(index.roles)} role names for {guild.name} in {time.perf_counter() - start:.2f}s")
+    
+    async def update_member_count_channel(self):
+        """Update the member count channel name with current member count"""
+        if not self.services.member_count_channel or not self.bot.guilds:
+            return
+        
+        try:
+            guild = self.bot.guilds[0]
+            member_count = guild.member_count
+            new_channel_name = f"{MEMBER_COUNT_CHANNEL}-{member_count}"
+            
+            # Only update if the name is different
+            if self.services.member_count_channel.name != new_channel_name:
+                await self.services.member_count_channel.edit(name=new_channel_name)
+                logger.info(f"Updated member count channel name to: {new_channel_name}")
+        
+        except Exception as e:
+            logger.error(f"Error updating member count channel: {e}")
+    
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        """Welcome new members"""
+        self.services.name_index(member.guild.id).add_member(member)
+        try:
+            # Store user join data
+            self.db.store_user_join(
+                user_id=member.id,
+                username=str(member),
+                guild_id=member.guild.id,
+                join_date=member.joined_at or datetime.utcnow()
+            )
+            
+            # Send welcome message
+            welcome_channel = discord.utils.get(member.guild.channels, name=WELCOME_CHANNEL)
+            if welcome_channel:
+                embed = discord.Embed(
+                    title="Welcome to the server! 🎉",
+                    description=f"Hey {member.mention}! Welcome to **{member.guild.name}**!",
+                    color=discord.Color.green(),
+                    timestamp=datetime.utcnow()
+                )
+                embed.add_field(
+                    name="Getting Started",
+                    value=f"• Check out #{RULES_CHANNEL} for server rules\n• Use `!help` to see available commands\n• Use `!role <role_name>` to request roles",
+                    inline=False
+                )
+                embed.add_field(
+                    name="Available Roles",
+                    value=", ".join(AVAILABLE_ROLES),
+                    inline=False
+                )
+                # Note: Avatar access might need message_content intent
+                try:
+                    embed.set_thumbnail(url=member.avatar.url if member.avatar else member.default_avatar.url)
+                except:
+                    pass  # Skip avatar if intent not available
+                # Note: Member count might need members intent
+                try:
+                    embed.set_footer(text=f"Member #{member.guild.member_count}")
+                except:
+                    embed.set_footer(text="Welcome to the server!")
+                
+                await welcome_channel.send(embed=embed)
+            
+            logger.info(f"New member joined: {member} ({member.id})")
+            
+            # Update member count channel
+            await self.services.wait_for_channels()
+            await self.update_member_count_channel()
+        
+        except Exception as e:
+            logger.error(f"Error in on_member_join: {e}")
+    
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload):
+        """Handle member leaving"""
+        self.services.name_index(payload.guild_id).members.remove(payload.user.id)
+        try:
+            logger.info(f"Member left: {payload.user} ({payload.user.id})")
+            
+            # Update member count channel
+            await self.services.wait_for_channels()
+            await self.update_member_count_channel()
+        
+        except Exception as e:
+            logger.error(f"Error in on_member_remove: {e}")
+    
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        """Re-index a member whose nickname changed"""
+        if before.display_name != after.display_name:
+            self.services.name_index(after.guild.id).add_member(after)
+    
+    @commands.Cog.listener()
+    async def on_user_update(self, before, after):
+        """Re-index a user's memberships when their username or global name changed"""
+        if before.name == after.name and before.global_name == after.global_name:
+            return
+        for guild in after.mutual_guilds:
+            member = guild.get_member(after.id)
+            if member:
+                self.services.name_index(guild.id).add_member(member)
+    
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        self.services.name_index(role.guild.id).add_role(role)
+    
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        if before.name != after.name:
+            self.services.name_index(after.guild.id).add_role(after)
+    
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self.services.name_index(role.guild.id).roles.remove(role.id)
+    
+    async def update_activity_stage(self, message):
+        """Update user activity without blocking the event loop on the database round trip"""
+        await asyncio.to_thread(self.db.update_user_activity, message.author.id, message.guild.id)
+    
+    @commands.command(name='syncusers')
+    @is_admin()
+    async def sync_users(self, ctx):
+        """Sync all guild members to database (Admin only)"""
+        try:
+            # Send initial message
+            embed = discord.Embed(
+                title="🔄 Syncing Users",
+                description="Starting user synchronization process...",
+                color=discord.Color.blue()
+            )
+            status_msg = await ctx.send(embed=embed)
+            
+            guild = ctx.guild
+            if not guild:
+                await ctx.send("❌ This command can only be used in a server.")
+                return
+            
+            # Get users already in database
+            existing_users = set(self.db.get_users_in_database(guild.id))
+            logger.info(f"Found {len(existing_users)} existing users in database")
+            
+            total_members = guild.member_count or 0
+            
+            # Update status
+            embed = discord.Embed(
+                title="🔄 Syncing Users",
+                description=f"Scanning **{total_members}** members for users missing from the database.",
+                color=discord.Color.orange()
+            )
+            embed.add_field(name="Status", value="Processing users...", inline=False)
+            await status_msg.edit(embed=embed)
+            
+            # Stream members and sync the ones not in the database yet
+            scanned = 0
+            synced_count = 0
+            errors = 0
+            
+            async for member in iter_guild_members(guild):
+                scanned += 1
+                if member.id in existing_users:
+                    continue
+                
+                try:
+                    # Extract user information
+                    user_data = await extract_user_data(member)
+                    
+                    # Store in database
+                    self.db.store_user_profile(
+                        user_id=member.id,
+                        username=str(member),
+                        guild_id=guild.id,
+                        display_name=member.display_name,
+                        avatar_url=user_data['avatar_url'],
+                        banner_url=user_data['banner_url'],
+                        accent_color=user_data['accent_color'],
+                        created_at=member.created_at,
+                        joined_at=member.joined_at,
+                        premium_since=member.premium_since,
+                        nick=member.nick,
+                        roles=[role.name for role in member.roles if role.name != '@everyone'],
+                        status=str(member.status) if hasattr(member, 'status') else None,
+                        activity=user_data['activity'],
+                        is_bot=member.bot,
+                        is_system=member.system
+                    )
+                    
+                    synced_count += 1
+                    
+                    # Update status every 10 synced users
+                    if synced_count % 10 == 0:
+                        progress_percent = int((scanned / max(total_members, scanned)) * 100)
+                        embed.set_field_at(0, name="Status", value=f"Processing users... {progress_percent}% ({scanned}/{total_members} scanned, {synced_count} synced)", inline=False)
+                        await status_msg.edit(embed=embed)
+                    
+                    # Small delay to avoid rate limits
+                    if synced_count % 5 == 0:
+                        await asyncio.sleep(0.1)
+                
+                except Exception as e:
+                    logger.error(f"Error syncing user {member} ({member.id}): {e}")
+                    errors += 1
+            
+            # Final status
+            embed = discord.Embed(
+                title="✅ User Sync Complete",
+                description="Synchronization completed successfully!",
+                color=discord.Color.green()
+            )
+            embed.add_field(name="Total Members", value=str(scanned), inline=True)
+            embed.add_field(name="Already in DB", value=str(len(existing_users)), inline=True)
+            embed.add_field(name="Newly Synced", value=str(synced_count), inline=True)
+            
+            if errors > 0:
+                embed.add_field(name="Errors", value=str(errors), inline=True)
+                embed.color = discord.Color.orange()
+            
+            embed.set_footer(text=f"Sync completed at {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC")
+            await status_msg.edit(embed=embed)
+            
+            # Log the action
+            self.db.log_admin_action(
+                admin_id=ctx.author.id,
+                admin_username=str(ctx.author),
+                action='syncusers',
+                reason=f"Synced {synced_count} new users to database",
+                guild_id=guild.id
+            )
+            
+            logger.info(f"{ctx.author} synced {synced_count} users to database (errors: {errors})")
+        
+        except Exception as e:
+            logger.error(f"Error in sync_users command: {e}")
+            embed = discord.Embed(
+                title="❌ Sync Failed",
+                description="An error occurred during user synchronization.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(Sync(bot, bot.services))
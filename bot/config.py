@@ -7,6 +7,24 @@ load_dotenv()
 # Bot Configuration
 BOT_TOKEN = os.getenv('BOT_TOKEN')
 MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
+
+# MongoDB Client Configuration (read by database.py)
+MONGODB_MAX_POOL_SIZE = int(os.getenv('MONGODB_MAX_POOL_SIZE', '100'))      # Maximum connections per server
+MONGODB_MIN_POOL_SIZE = int(os.getenv('MONGODB_MIN_POOL_SIZE', '0'))        # Connections kept open when idle
+MONGODB_MAX_IDLE_TIME_MS = int(os.getenv('MONGODB_MAX_IDLE_TIME_MS', '0'))  # Close idle pooled connections after this, 0 to keep
+MONGODB_COMPRESSORS = os.getenv('MONGODB_COMPRESSORS', '')                  # Wire compression, e.g. "zlib" or "snappy,zlib"
+MONGODB_OPERATION_PROFILES = os.getenv('MONGODB_OPERATION_PROFILES', '')    # Overrides like "activity:acknowledged,leaderboard:acknowledged"
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGODB_SERVER_SELECTION_TIMEOUT_MS', '5000'))  # How long a call waits for a reachable server
+
+# Write Spool Configuration (read by database.py)
+SPOOL_PATH = os.getenv('SPOOL_PATH', 'logs/spool/writes.spool')             # Append-only file for writes made while MongoDB is down
+SPOOL_FSYNC_INTERVAL = float(os.getenv('SPOOL_FSYNC_INTERVAL', '1.0'))      # Maximum seconds before buffered records are fsynced
+SPOOL_FSYNC_BATCH = int(os.getenv('SPOOL_FSYNC_BATCH', '100'))              # fsync after this many buffered records
+SPOOL_REPLAY_INTERVAL = int(os.getenv('SPOOL_REPLAY_INTERVAL', '30'))       # Seconds between replay attempts
+SPOOL_REPLAY_BATCH = int(os.getenv('SPOOL_REPLAY_BATCH', '500'))            # Records applied per replay batch
+SPOOL_APPLIED_OPS = int(os.getenv('SPOOL_APPLIED_OPS', '16'))               # Op ids kept per document so replayed counters are applied once
+DB_BREAKER_THRESHOLD = int(os.getenv('DB_BREAKER_THRESHOLD', '3'))          # Consecutive failures before writes go straight to the spool
+DB_BREAKER_RESET = float(os.getenv('DB_BREAKER_RESET', '30'))               # Seconds before MongoDB is tried again
 GUILD_ID = int(os.getenv('GUILD_ID', '0'))
 
 # Channel Configuration
@@ -22,6 +40,8 @@ LEVELUP_CHANNEL = os.getenv('LEVELUP_CHANNEL', 'level-ups')
 # Bot Settings
 COMMAND_PREFIX = '!'
 BOT_PERMISSIONS = 8  # Administrator permissions
+LAZY_MEMBER_CACHE = os.getenv('LAZY_MEMBER_CACHE', 'false').lower() == 'true'  # Skip member chunking at startup for large guilds
+CHANNEL_READY_TIMEOUT = int(os.getenv('CHANNEL_READY_TIMEOUT', '30'))  # Seconds handlers wait for startup channel setup
 
 # Available roles that users can request
 AVAILABLE_ROLES = [
@@ -36,6 +56,16 @@ RESTRICTED_CHANNELS = {
     'rules': ['Admin', 'Moderator']
 }
 
+# Audit log
+AUDIT_EXPORT_MAX_ROWS = int(os.getenv('AUDIT_EXPORT_MAX_ROWS', '200000'))  # Maximum rows in one audit export
+AUDIT_EXPORT_BATCH_SIZE = int(os.getenv('AUDIT_EXPORT_BATCH_SIZE', '1000'))  # Documents fetched per cursor batch
+
+# Bug report triage
+BUG_STATUSES = ['open', 'in-progress', 'fixed', 'closed', 'wontfix', 'duplicate']
+BUG_ACTIVE_STATUSES = ['open', 'in-progress']  # Reports checked for duplicates
+BUG_DUPLICATE_THRESHOLD = float(os.getenv('BUG_DUPLICATE_THRESHOLD', '0.5'))  # Estimated Jaccard similarity to link a duplicate
+BUGS_PAGE_SIZE = int(os.getenv('BUGS_PAGE_SIZE', '10'))
+
 # Admin roles
 ADMIN_ROLES = ['Admin', 'Moderator']
 
@@ -55,12 +85,80 @@ LEVEL_UP_MULTIPLIER = float(os.getenv('LEVEL_UP_MULTIPLIER', '1.5'))  # Multipli
 ENABLE_LEVEL_ROLES = os.getenv('ENABLE_LEVEL_ROLES', 'true').lower() == 'true'
 LEVEL_ROLE_PREFIX = os.getenv('LEVEL_ROLE_PREFIX', 'Level')
 MAX_LEVEL_ROLES = int(os.getenv('MAX_LEVEL_ROLES', '100'))  # Maximum level roles to create
+LEVEL_ROLE_BAND_SIZE = max(1, int(os.getenv('LEVEL_ROLE_BAND_SIZE', '1')))  # Levels per level role (1 = one role per level)
+LEVEL_ROLE_CONCURRENCY = int(os.getenv('LEVEL_ROLE_CONCURRENCY', '5'))  # Concurrent role creates/renames when provisioning
+
+# Leaderboard Configuration
+LEADERBOARD_PAGE_SIZE = int(os.getenv('LEADERBOARD_PAGE_SIZE', '10'))          # Entries per leaderboard page
+LEADERBOARD_CACHE_TTL = int(os.getenv('LEADERBOARD_CACHE_TTL', '60'))          # Seconds a cached page stays fresh
+LEADERBOARD_CACHE_SIZE = int(os.getenv('LEADERBOARD_CACHE_SIZE', '500'))       # Maximum cached pages across guilds
+
+# Daily XP Rollup Configuration
+XP_ROLLUP_FLUSH_INTERVAL = int(os.getenv('XP_ROLLUP_FLUSH_INTERVAL', '60'))      # Seconds between rollup flushes
+XP_ROLLUP_RETENTION_DAYS = int(os.getenv('XP_ROLLUP_RETENTION_DAYS', '400'))     # Days to keep daily buckets
+XP_ROLLUP_MAX_RANGE_DAYS = int(os.getenv('XP_ROLLUP_MAX_RANGE_DAYS', '366'))     # Longest custom leaderboard range
+XP_ROLLUP_CACHE_TTL = int(os.getenv('XP_ROLLUP_CACHE_TTL', '300'))               # Seconds a period leaderboard stays cached
 
 # Message Length XP Configuration
 MIN_MESSAGE_LENGTH = int(os.getenv('MIN_MESSAGE_LENGTH', '5'))     # Minimum message length for XP
 MESSAGE_LENGTH_MULTIPLIER = float(os.getenv('MESSAGE_LENGTH_MULTIPLIER', '0.1'))  # XP multiplier per character
 MAX_LENGTH_BONUS = int(os.getenv('MAX_LENGTH_BONUS', '50'))        # Maximum bonus XP from message length
 
+# Spam Filter Configuration
+ENABLE_SPAM_FILTER = os.getenv('ENABLE_SPAM_FILTER', 'true').lower() == 'true'
+SPAM_HISTORY_SIZE = int(os.getenv('SPAM_HISTORY_SIZE', '10'))              # Recent message digests remembered per user
+SPAM_MAX_TRACKED_USERS = int(os.getenv('SPAM_MAX_TRACKED_USERS', '10000'))  # Users whose history is kept (least recent dropped)
+SPAM_BLOOM_BITS = int(os.getenv('SPAM_BLOOM_BITS', '1048576'))             # Size of each copy-paste Bloom filter in bits
+SPAM_BLOOM_WINDOW = int(os.getenv('SPAM_BLOOM_WINDOW', '600'))             # Seconds before the Bloom filter rotates
+SPAM_BLOOM_MIN_LENGTH = int(os.getenv('SPAM_BLOOM_MIN_LENGTH', '20'))      # Minimum length checked for cross-user copy-paste
+SPAM_MIN_ENTROPY = float(os.getenv('SPAM_MIN_ENTROPY', '2.0'))             # Minimum character entropy (bits) for longer messages
+
+# Purge Configuration
+PURGE_MAX_SCAN = int(os.getenv('PURGE_MAX_SCAN', '5000'))  # Maximum messages scanned by a filtered purge
+PURGE_SINGLE_DELETE_DELAY = float(os.getenv('PURGE_SINGLE_DELETE_DELAY', '1.0'))  # Delay between deletes of messages older than 14 days
+PURGE_PROGRESS_INTERVAL = int(os.getenv('PURGE_PROGRESS_INTERVAL', '200'))  # Update progress every N scanned messages
+
+# Resource Configuration
+RESOURCES_PAGE_SIZE = int(os.getenv('RESOURCES_PAGE_SIZE', '5'))    # Resources shown per page
+RESOURCE_CACHE_TTL = int(os.getenv('RESOURCE_CACHE_TTL', '120'))    # Seconds a cached resource query stays fresh
+RESOURCE_CACHE_SIZE = int(os.getenv('RESOURCE_CACHE_SIZE', '256'))  # Maximum cached resource queries
+
+# Memory Budget Configuration
+MEMORY_BUDGET_MB = int(os.getenv('MEMORY_BUDGET_MB', '0'))                       # Resident memory budget, 0 to disable
+MESSAGE_CACHE_SIZE = int(os.getenv('MESSAGE_CACHE_SIZE', '1000'))                # discord.py message cache size
+USER_COOLDOWN_CACHE_SIZE = int(os.getenv('USER_COOLDOWN_CACHE_SIZE', '50000'))   # Maximum tracked XP cooldowns
+DISCORD_LOG_MAX_PENDING = int(os.getenv('DISCORD_LOG_MAX_PENDING', '100'))       # Maximum in-flight Discord log sends
+MEMORY_CHECK_INTERVAL = int(os.getenv('MEMORY_CHECK_INTERVAL', '300'))           # Seconds between memory checks
+ENABLE_TRACEMALLOC = os.getenv('ENABLE_TRACEMALLOC', 'false').lower() == 'true'
+TRACEMALLOC_FRAMES = int(os.getenv('TRACEMALLOC_FRAMES', '5'))                   # Stack frames kept per allocation
+
+# Activity Analytics Configuration
+ACTIVITY_FLUSH_INTERVAL = int(os.getenv('ACTIVITY_FLUSH_INTERVAL', '300'))         # Seconds between activity bucket flushes
+ACTIVITY_HLL_PRECISION = int(os.getenv('ACTIVITY_HLL_PRECISION', '11'))           # Unique-user sketch size 2**p bytes (11: 2 KB, ~2.3% error)
+ACTIVITY_RETENTION_DAYS = int(os.getenv('ACTIVITY_RETENTION_DAYS', '400'))        # Days to keep daily activity documents
+ACTIVITY_MAX_RANGE_DAYS = int(os.getenv('ACTIVITY_MAX_RANGE_DAYS', '366'))        # Longest !activity range
+
+# Per-guild Settings Configuration
+CONFIG_CACHE_TTL = int(os.getenv('CONFIG_CACHE_TTL', '300'))  # Seconds a guild's settings stay cached (changes via !config apply at once)
+CONFIG_RETRY_TTL = int(os.getenv('CONFIG_RETRY_TTL', '10'))   # Seconds before settings that failed to load are read again
+
+# Shutdown Configuration
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', '20'))  # Seconds to drain in-memory work after SIGTERM
+
+# Extension Configuration
+EXTENSIONS = [name.strip() for name in os.getenv('EXTENSIONS', 'leveling,moderation,logs,dev,sync,ops,activity').split(',') if name.strip()]  # Extensions in bot/cogs loaded at startup
+
+# Image Card Configuration
+ENABLE_IMAGE_CARDS = os.getenv('ENABLE_IMAGE_CARDS', 'false').lower() == 'true'  # Send !level and !leaderboard as rendered PNG cards instead of text embeds
+CARD_RENDER_WORKERS = int(os.getenv('CARD_RENDER_WORKERS', '2'))  # Worker processes rendering cards off the event loop
+CARD_CACHE_SIZE = int(os.getenv('CARD_CACHE_SIZE', '256'))  # Rendered cards kept in memory (least recently used are evicted)
+CARD_XP_BUCKET = int(os.getenv('CARD_XP_BUCKET', '25'))  # A cached rank card is reused until the member's XP moves to another bucket of this size
+CARD_FONT_PATH = os.getenv('CARD_FONT_PATH', '')  # TrueType font for the cards, Pillow's bundled font when empty
+
+# Slash Command Configuration
+SYNC_APP_COMMANDS = os.getenv('SYNC_APP_COMMANDS', 'true').lower() == 'true'  # Register slash commands with Discord at startup
+NAME_INDEX_BATCH_SIZE = int(os.getenv('NAME_INDEX_BATCH_SIZE', '5000'))  # Members merged into the autocomplete name index per batch at startup
+
 # Discord logging settings
 ENABLE_DISCORD_LOGGING = os.getenv('ENABLE_DISCORD_LOGGING', 'true').lower() == 'true'
 LOG_LEVELS_TO_DISCORD = ['ERROR', 'WARNING', 'INFO']  # Log levels to send to Discord
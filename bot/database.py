@@ -1,30 +1,239 @@
-import os
-from pymongo import MongoClient
+from pymongo import MongoClient, ReadPreference, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, DuplicateKeyError
+from pymongo.write_concern import WriteConcern
 from datetime import datetime
+import functools
+import inspect
 import logging
+import time
+from collections import OrderedDict
+
+from bson import ObjectId
+
+from config import (
+    ACTIVITY_RETENTION_DAYS, DB_BREAKER_RESET, DB_BREAKER_THRESHOLD, MONGODB_COMPRESSORS, MONGODB_MAX_IDLE_TIME_MS,
+    MONGODB_MAX_POOL_SIZE, MONGODB_MIN_POOL_SIZE, MONGODB_OPERATION_PROFILES, MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+    MONGODB_URI, RESOURCE_CACHE_SIZE, RESOURCE_CACHE_TTL, SPOOL_APPLIED_OPS, SPOOL_FSYNC_BATCH, SPOOL_FSYNC_INTERVAL,
+    SPOOL_PATH, SPOOL_REPLAY_BATCH, XP_ROLLUP_RETENTION_DAYS
+)
+from hyperloglog import HyperLogLog
+from spool import CircuitBreaker, ReplayInterrupted, Spool
 
 logger = logging.getLogger(__name__)
 
+class DatabaseUnavailable(Exception):
+    """Raised by guarded reads while MongoDB is unreachable"""
+
+def spooled(method):
+    """Decorator for writes that can be deferred
+    
+    If MongoDB is unreachable (or the circuit breaker is open) the call is
+    appended to the on-disk spool instead and replayed later; it then returns None.
+    Methods taking `op_id` get one when their call is spooled, so a replay that is
+    interrupted and retried does not apply it twice. Live calls carry none and
+    leave no marker on the documents they write.
+    """
+    parameters = inspect.signature(method).parameters
+    takes_at = 'at' in parameters
+    takes_op_id = 'op_id' in parameters
+    
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if takes_at and kwargs.get('at') is None:
+            # Capture the time now so a replayed write keeps its original timestamp
+            kwargs['at'] = datetime.utcnow()
+        if self.breaker.allow():
+            try:
+                with self.breaker.attempt(ConnectionFailure):
+                    return method(self, *args, **kwargs)
+            except ConnectionFailure as e:
+                logger.warning(f"MongoDB unavailable during {method.__name__}, spooling write: {e}")
+        
+        if takes_op_id and kwargs.get('op_id') is None:
+            kwargs['op_id'] = ObjectId()
+        self.spool.append({'op': method.__name__, 'args': list(args), 'kwargs': kwargs})
+        return None
+    return wrapper
+
+def guarded(method):
+    """Decorator for hot-path reads: fail fast with DatabaseUnavailable while MongoDB is unreachable"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not self.breaker.allow():
+            raise DatabaseUnavailable("MongoDB circuit breaker is open")
+        try:
+            with self.breaker.attempt(ConnectionFailure):
+                return method(self, *args, **kwargs)
+        except ConnectionFailure as e:
+            raise DatabaseUnavailable(str(e)) from e
+    return wrapper
+
+# Consistency profiles: write concern and read preference applied per collection handle
+PROFILES = {
+    'fire_and_forget': {'write_concern': WriteConcern(w=0)},
+    'acknowledged': {'write_concern': WriteConcern(w=1)},
+    'majority': {'write_concern': WriteConcern(w='majority', wtimeout=5000)},
+    'secondary_reads': {'read_preference': ReadPreference.SECONDARY_PREFERRED}
+}
+
+# Which profile each kind of operation uses, overridable with
+# MONGODB_OPERATION_PROFILES="activity:acknowledged,leaderboard:acknowledged"
+OPERATION_PROFILES = {
+    'activity': 'fire_and_forget',  # Last-activity timestamps, cheap to lose
+    'audit': 'majority',  # Admin audit records must survive a failover
+    'leaderboard': 'secondary_reads',  # Rankings tolerate replication lag
+    'stats': 'secondary_reads'
+}
+
+def load_operation_profiles():
+    """Operation -> profile mapping with overrides from the environment applied"""
+    profiles = dict(OPERATION_PROFILES)
+    for item in MONGODB_OPERATION_PROFILES.split(','):
+        if ':' not in item:
+            continue
+        operation, profile = (part.strip() for part in item.split(':', 1))
+        if profile not in PROFILES:
+            logger.warning(f"Unknown MongoDB profile '{profile}' for {operation}, using {profiles.get(operation)}")
+            continue
+        profiles[operation] = profile
+    return profiles
+
+def level_stats_deltas(previous, xp_gained, new_level):
+    """update_level_stats arguments for one XP gain, given the user's document before it (None if new)"""
+    if previous is None:
+        return {'users': 1, 'xp': xp_gained, 'messages': 1, 'level_changes': {str(new_level or 1): 1}}
+    
+    old_level = previous.get('level', 1)
+    level_changes = {}
+    if new_level is not None and new_level != old_level:
+        level_changes = {str(old_level): -1, str(new_level): 1}
+    return {'xp': xp_gained, 'messages': 1, 'level_changes': level_changes}
+
 class Database:
     def __init__(self):
         self.client = None
         self.db = None
+        self.resource_cache = OrderedDict()  # (guild_id, query, page) -> (cached_at, results)
+        self.resource_cache_ttl = RESOURCE_CACHE_TTL
+        self.resource_cache_size = RESOURCE_CACHE_SIZE
+        self.operation_profiles = load_operation_profiles()
+        self.profiled_collections = {}  # (collection_name, profile) -> collection handle
+        self.indexes_ready = False
+        self.breaker = CircuitBreaker(
+            failure_threshold=DB_BREAKER_THRESHOLD,
+            reset_timeout=DB_BREAKER_RESET
+        )
+        self.spool = Spool(
+            SPOOL_PATH,
+            fsync_interval=SPOOL_FSYNC_INTERVAL,
+            fsync_batch=SPOOL_FSYNC_BATCH
+        )
+        self.spool_replay_batch = SPOOL_REPLAY_BATCH
+        self.applied_ops_kept = SPOOL_APPLIED_OPS
         self.connect()
     
     def connect(self):
-        """Connect to MongoDB"""
+        """Connect to MongoDB
+        
+        Never raises for an unreachable server: the circuit breaker opens and
+        writes go to the spool until the server is back.
+        """
         try:
-            mongo_uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
-            self.client = MongoClient(mongo_uri)
+            mongo_uri = MONGODB_URI
+            options = {
+                'maxPoolSize': MONGODB_MAX_POOL_SIZE,
+                'minPoolSize': MONGODB_MIN_POOL_SIZE,
+                'maxIdleTimeMS': MONGODB_MAX_IDLE_TIME_MS or None,
+            }
+            if MONGODB_COMPRESSORS:
+                options['compressors'] = MONGODB_COMPRESSORS
+            if 'serverselectiontimeoutms' not in mongo_uri.lower():
+                options['serverSelectionTimeoutMS'] = MONGODB_SERVER_SELECTION_TIMEOUT_MS
+            self.client = MongoClient(mongo_uri, **options)
+            self.profiled_collections = {}
             self.db = self.client['discord_bot']
-            logger.info("Connected to MongoDB successfully")
         except Exception as e:
             logger.error(f"Failed to connect to MongoDB: {e}")
             raise
+        
+        self.ensure_indexes()
+        if self.indexes_ready:
+            logger.info("Connected to MongoDB successfully")
+        else:
+            logger.warning("MongoDB is unreachable, writes will be spooled to disk until it recovers")
+    
+    def ensure_indexes(self):
+        """Create indexes required by the bot's queries (no-op if they already exist)"""
+        try:
+            user_levels = self.get_collection('user_levels')
+            user_levels.create_index([('user_id', 1), ('guild_id', 1)])
+            # Covers keyset-paginated leaderboard reads on (xp, user_id)
+            user_levels.create_index([('guild_id', 1), ('xp', -1), ('user_id', 1), ('level', 1)])
+            self.get_collection('level_stats').create_index('guild_id', unique=True)
+            self.get_collection('level_roles').create_index('guild_id', unique=True)
+            self.get_collection('guild_settings').create_index('guild_id', unique=True)
+            self.get_collection('mute_timers').create_index([('guild_id', 1), ('user_id', 1)], unique=True)
+            xp_daily = self.get_collection('xp_daily')
+            xp_daily.create_index([('guild_id', 1), ('day', 1), ('user_id', 1)], unique=True)
+            xp_daily.create_index('day', expireAfterSeconds=XP_ROLLUP_RETENTION_DAYS * 86400)
+            activity_daily = self.get_collection('activity_daily')
+            activity_daily.create_index([('guild_id', 1), ('day', 1)], unique=True)
+            activity_daily.create_index('day', expireAfterSeconds=ACTIVITY_RETENTION_DAYS * 86400)
+            admin_logs = self.get_collection('admin_logs')
+            admin_logs.create_index([('guild_id', 1), ('timestamp', -1)])
+            admin_logs.create_index([('guild_id', 1), ('admin_id', 1), ('timestamp', -1)])
+            admin_logs.create_index([('guild_id', 1), ('target_id', 1), ('timestamp', -1)])
+            admin_logs.create_index([('guild_id', 1), ('action', 1), ('timestamp', -1)])
+            # _id breaks timestamp ties for keyset-paginated !bugs listings
+            self.get_collection('bug_reports').create_index([('guild_id', 1), ('status', 1), ('timestamp', -1), ('_id', -1)])
+            resources = self.get_collection('resources')
+            resources.create_index([('guild_id', 1), ('timestamp', -1), ('_id', -1)])
+            resources.create_index([('title', 'text'), ('content', 'text')])
+            self.indexes_ready = True
+        except ConnectionFailure as e:
+            self.breaker.trip()
+            logger.warning(f"Failed to ensure MongoDB indexes: {e}")
+        except Exception as e:
+            logger.warning(f"Failed to ensure MongoDB indexes: {e}")
+    
+    def get_collection(self, collection_name, operation=None):
+        """Get a collection from the database, using the consistency profile for an operation kind"""
+        profile = self.operation_profiles.get(operation)
+        if profile is None:
+            return self.db[collection_name]
+        
+        key = (collection_name, profile)
+        collection = self.profiled_collections.get(key)
+        if collection is None:
+            collection = self.profiled_collections[key] = self.db[collection_name].with_options(**PROFILES[profile])
+        return collection
+    
+    def _apply_once(self, query, update, op_id):
+        """Query and update that change a document at most once per op id
+        
+        The op id is pushed onto the document in the same write and documents
+        already carrying it no longer match, so replaying a write that reached
+        MongoDB before is a no-op. Each document keeps its last SPOOL_APPLIED_OPS ids.
+        """
+        if op_id is None:
+            return query, update
+        return (
+            {**query, 'applied_ops': {'$ne': op_id}},
+            {**update, '$push': {'applied_ops': {'$each': [op_id], '$slice': -self.applied_ops_kept}}}
+        )
     
-    def get_collection(self, collection_name):
-        """Get a collection from the database"""
-        return self.db[collection_name]
+    def _bulk_write_once(self, collection, operations, op_id):
+        """Unordered bulk write of _apply_once upserts into a collection with a unique key
+        
+        An upsert whose document already carries the op id misses the filter and
+        collides with the unique index, so that duplicate key means it was applied before.
+        """
+        try:
+            return collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            if op_id is None or e.details.get('writeConcernErrors') or any(error['code'] != 11000 for error in e.details['writeErrors']):
+                raise
+            return e.details
     
     # Role Management
     def store_role_request(self, user_id, username, role_name, guild_id, status='pending'):
@@ -54,9 +263,10 @@ class Database:
         return list(collection.find({'user_id': user_id, 'status': 'approved'}))
     
     # Admin Logging
-    def log_admin_action(self, admin_id, admin_username, action, target_id=None, target_username=None, reason=None, guild_id=None):
-        """Log admin actions"""
-        collection = self.get_collection('admin_logs')
+    @spooled
+    def log_admin_action(self, admin_id, admin_username, action, target_id=None, target_username=None, reason=None, guild_id=None, at=None, op_id=None):
+        """Log admin actions (the op id doubles as _id, so a replayed entry is not logged twice)"""
+        collection = self.get_collection('admin_logs', 'audit')
         log_entry = {
             'admin_id': admin_id,
             'admin_username': admin_username,
@@ -65,16 +275,89 @@ class Database:
             'target_username': target_username,
             'reason': reason,
             'guild_id': guild_id,
-            'timestamp': datetime.utcnow()
+            'timestamp': at or datetime.utcnow()
         }
-        return collection.insert_one(log_entry)
+        if op_id is None:
+            return collection.insert_one(log_entry)
+        
+        log_entry['_id'] = op_id
+        try:
+            return collection.insert_one(log_entry)
+        except DuplicateKeyError:
+            return None
+    
+    def find_admin_logs(self, guild_id, admin_id=None, target_id=None, action=None, since=None, until=None, limit=0, batch_size=500):
+        """Get a cursor over a guild's admin logs, newest first
+        
+        Equality filters come before the timestamp sort key so each combination
+        is served by a (guild_id, <field>, timestamp) compound index. The cursor
+        fetches batch_size documents at a time, so callers can stream it.
+        """
+        collection = self.get_collection('admin_logs')
+        query = {'guild_id': guild_id}
+        if admin_id is not None:
+            query['admin_id'] = admin_id
+        if target_id is not None:
+            query['target_id'] = target_id
+        if action is not None:
+            query['action'] = action
+        if since is not None or until is not None:
+            query['timestamp'] = {}
+            if since is not None:
+                query['timestamp']['$gte'] = since
+            if until is not None:
+                query['timestamp']['$lt'] = until
+        
+        return collection.find(query, {'_id': 0}).sort('timestamp', -1).limit(limit).batch_size(batch_size)
+    
+    # Guild Settings
+    @guarded
+    def get_guild_settings(self, guild_id):
+        """Get a guild's setting overrides as {name: value}"""
+        doc = self.get_collection('guild_settings').find_one({'guild_id': guild_id}, {'_id': 0, 'settings': 1})
+        return doc.get('settings', {}) if doc else {}
+    
+    def set_guild_setting(self, guild_id, name, value):
+        """Store one setting override for a guild"""
+        return self.get_collection('guild_settings').update_one(
+            {'guild_id': guild_id},
+            {'$set': {f'settings.{name}': value, 'updated_at': datetime.utcnow()}},
+            upsert=True
+        )
+    
+    def unset_guild_setting(self, guild_id, name):
+        """Remove one setting override for a guild"""
+        return self.get_collection('guild_settings').update_one(
+            {'guild_id': guild_id},
+            {'$unset': {f'settings.{name}': ''}, '$set': {'updated_at': datetime.utcnow()}}
+        )
+    
+    # Mute Timers
+    def set_mute_timer(self, guild_id, user_id, channel_id, unmute_at):
+        """Persist when a member should be unmuted so the timer survives restarts"""
+        collection = self.get_collection('mute_timers')
+        return collection.update_one(
+            {'guild_id': guild_id, 'user_id': user_id},
+            {'$set': {'channel_id': channel_id, 'unmute_at': unmute_at}},
+            upsert=True
+        )
+    
+    def remove_mute_timer(self, guild_id, user_id):
+        """Delete a member's pending unmute"""
+        return self.get_collection('mute_timers').delete_one({'guild_id': guild_id, 'user_id': user_id})
+    
+    def get_mute_timers(self):
+        """Get all pending unmutes"""
+        return list(self.get_collection('mute_timers').find({}, {'_id': 0}))
     
     # User Management
-    def store_user_join(self, user_id, username, guild_id, join_date=None):
+    @spooled
+    def store_user_join(self, user_id, username, guild_id, join_date=None, at=None):
         """Store user join information"""
         collection = self.get_collection('users')
+        at = at or datetime.utcnow()
         if join_date is None:
-            join_date = datetime.utcnow()
+            join_date = at
         
         user_data = {
             'user_id': user_id,
@@ -82,7 +365,7 @@ class Database:
             'guild_id': guild_id,
             'join_date': join_date,
             'roles': [],
-            'last_activity': datetime.utcnow()
+            'last_activity': at
         }
         
         # Use upsert to avoid duplicates
@@ -92,12 +375,13 @@ class Database:
             upsert=True
         )
     
-    def update_user_activity(self, user_id, guild_id):
+    @spooled
+    def update_user_activity(self, user_id, guild_id, at=None):
         """Update user's last activity"""
-        collection = self.get_collection('users')
+        collection = self.get_collection('users', 'activity')
         return collection.update_one(
             {'user_id': user_id, 'guild_id': guild_id},
-            {'$set': {'last_activity': datetime.utcnow()}}
+            {'$max': {'last_activity': at or datetime.utcnow()}}
         )
     
     def update_user_roles(self, user_id, guild_id, roles):
@@ -158,6 +442,7 @@ class Database:
         return collection.find_one({'user_id': user_id, 'guild_id': guild_id})
     
     # Leveling System
+    @guarded
     def get_user_xp(self, user_id, guild_id):
         """Get user XP and level data"""
         collection = self.get_collection('user_levels')
@@ -175,13 +460,24 @@ class Database:
                 'created_at': datetime.utcnow()
             }
             collection.insert_one(default_data)
+            self.update_level_stats(guild_id, users=1, level_changes={'1': 1})
             return default_data
         
         return user_data
     
-    def update_user_xp(self, user_id, guild_id, xp_gained, new_level=None):
-        """Update user XP and optionally level"""
+    @spooled
+    def update_user_xp(self, user_id, guild_id, xp_gained, new_level=None, at=None, op_id=None):
+        """Update user XP and optionally level, keeping the guild's level stats in step
+        
+        Returns the user's document as it was before the update (None if it was
+        created or spooled). Live calls write the XP first and the level stats
+        second, spooled on their own if only that write fails. A replayed call
+        (op_id set) writes the stats first under the same op id, then the XP, so
+        an interruption at any point leaves a retry that applies each exactly once.
+        """
         collection = self.get_collection('user_levels')
+        at = at or datetime.utcnow()
+        user_query = {'user_id': user_id, 'guild_id': guild_id}
         
         update_data = {
             '$inc': {
@@ -189,26 +485,95 @@ class Database:
                 'messages_count': 1
             },
             '$set': {
-                'last_xp_gain': datetime.utcnow()
+                'last_xp_gain': at
             }
         }
         
         if new_level is not None:
             update_data['$set']['level'] = new_level
         
-        return collection.update_one(
-            {'user_id': user_id, 'guild_id': guild_id},
-            update_data,
-            upsert=True
-        )
+        if op_id is None:
+            previous = collection.find_one_and_update(
+                user_query,
+                update_data,
+                projection={'level': 1},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE
+            )
+            self.update_level_stats(guild_id, **level_stats_deltas(previous, xp_gained, new_level))
+            return previous
+        
+        previous = collection.find_one(user_query, {'level': 1, 'applied_ops': 1})
+        if previous is not None and op_id in previous.get('applied_ops', []):
+            return None  # Applied before, and the stats always go first
+        
+        # Unwrapped: inside a replay a connection failure must interrupt it, not spool a second record
+        Database.update_level_stats.__wrapped__(self, guild_id, op_id=op_id, **level_stats_deltas(previous, xp_gained, new_level))
+        
+        query, update = self._apply_once(user_query, update_data, op_id)
+        if previous is None:
+            # user_levels has no unique key to upsert against
+            inserted = collection.update_one(user_query, {'$setOnInsert': {
+                'xp': xp_gained,
+                'level': new_level or 1,
+                'messages_count': 1,
+                'last_xp_gain': at,
+                'created_at': at,
+                'applied_ops': [op_id]
+            }}, upsert=True)
+            if inserted.upserted_id is None:
+                collection.update_one(query, update)  # Created concurrently
+        else:
+            collection.update_one(query, update)
+        return previous
     
     def get_leaderboard(self, guild_id, limit=10):
         """Get XP leaderboard for a guild"""
-        collection = self.get_collection('user_levels')
+        collection = self.get_collection('user_levels', 'leaderboard')
         return list(collection.find(
             {'guild_id': guild_id}
         ).sort('xp', -1).limit(limit))
     
+    def get_guild_levels(self, guild_id):
+        """Map user_id to level for every user in a guild (covered by the leaderboard index)"""
+        collection = self.get_collection('user_levels')
+        cursor = collection.find({'guild_id': guild_id}, {'_id': 0, 'user_id': 1, 'level': 1})
+        return {doc['user_id']: doc.get('level', 1) for doc in cursor}
+    
+    def get_leaderboard_page(self, guild_id, limit=10, after=None, before=None):
+        """Get one leaderboard page using keyset pagination on (xp desc, user_id asc)
+        
+        `after` is the (xp, user_id) key of the last entry on the previous page,
+        `before` the key of the first entry on the next page; either way the page
+        is one indexed range read. With neither it returns the first page.
+        """
+        collection = self.get_collection('user_levels', 'leaderboard')
+        query = {'guild_id': guild_id}
+        if after is not None:
+            last_xp, last_user_id = after
+            query['$or'] = [
+                {'xp': {'$lt': last_xp}},
+                {'xp': last_xp, 'user_id': {'$gt': last_user_id}}
+            ]
+        elif before is not None:
+            first_xp, first_user_id = before
+            query['$or'] = [
+                {'xp': {'$gt': first_xp}},
+                {'xp': first_xp, 'user_id': {'$lt': first_user_id}}
+            ]
+            # Walk the index backwards from the key, then put the page back in leaderboard order
+            cursor = collection.find(
+                query,
+                {'_id': 0, 'user_id': 1, 'xp': 1, 'level': 1}
+            ).sort([('xp', 1), ('user_id', -1)]).limit(limit)
+            return list(cursor)[::-1]
+        
+        cursor = collection.find(
+            query,
+            {'_id': 0, 'user_id': 1, 'xp': 1, 'level': 1}
+        ).sort([('xp', -1), ('user_id', 1)]).limit(limit)
+        return list(cursor)
+    
     def get_user_rank(self, user_id, guild_id):
         """Get user's rank in the guild"""
         collection = self.get_collection('user_levels')
@@ -228,7 +593,7 @@ class Database:
     def reset_user_xp(self, user_id, guild_id):
         """Reset user's XP and level"""
         collection = self.get_collection('user_levels')
-        return collection.update_one(
+        previous = collection.find_one_and_update(
             {'user_id': user_id, 'guild_id': guild_id},
             {
                 '$set': {
@@ -238,30 +603,217 @@ class Database:
                     'last_xp_gain': None,
                     'reset_at': datetime.utcnow()
                 }
-            }
+            },
+            projection={'xp': 1, 'level': 1, 'messages_count': 1},
+            return_document=ReturnDocument.BEFORE
         )
+        
+        if previous:
+            old_level = previous.get('level', 1)
+            self.update_level_stats(
+                guild_id,
+                xp=-previous.get('xp', 0),
+                messages=-previous.get('messages_count', 0),
+                level_changes={str(old_level): -1, '1': 1} if old_level != 1 else {}
+            )
+        
+        return previous
     
-    def get_level_stats(self, guild_id):
-        """Get leveling statistics for a guild"""
+    @spooled
+    def update_level_stats(self, guild_id, users=0, xp=0, messages=0, level_changes=None, op_id=None):
+        """Apply deltas to the guild's running level statistics document
+        
+        level_changes maps levels (as strings, so the call can be spooled) to user count deltas.
+        """
+        increments = {}
+        if users:
+            increments['total_users'] = users
+        if xp:
+            increments['total_xp'] = xp
+        if messages:
+            increments['total_messages'] = messages
+        for level, delta in (level_changes or {}).items():
+            if delta:
+                increments[f'level_histogram.{level}'] = delta
+        
+        if not increments:
+            return None
+        
+        collection = self.get_collection('level_stats')
+        query, update = self._apply_once(
+            {'guild_id': guild_id},
+            {'$inc': increments, '$set': {'updated_at': datetime.utcnow()}},
+            op_id
+        )
+        try:
+            return collection.update_one(query, update, upsert=True)
+        except DuplicateKeyError:
+            if op_id is None:
+                raise
+            return None
+    
+    def rebuild_level_stats(self, guild_id):
+        """Recompute a guild's level statistics document from user_levels
+        
+        Only needed once for guilds that existed before running counters were
+        introduced, or to repair drift.
+        """
         collection = self.get_collection('user_levels')
         pipeline = [
             {'$match': {'guild_id': guild_id}},
             {'$group': {
-                '_id': None,
-                'total_users': {'$sum': 1},
-                'total_xp': {'$sum': '$xp'},
-                'total_messages': {'$sum': '$messages_count'},
-                'avg_level': {'$avg': '$level'},
-                'max_level': {'$max': '$level'}
+                '_id': '$level',
+                'users': {'$sum': 1},
+                'xp': {'$sum': '$xp'},
+                'messages': {'$sum': '$messages_count'}
             }}
         ]
         
-        result = list(collection.aggregate(pipeline))
-        return result[0] if result else None
+        stats = {
+            'guild_id': guild_id,
+            'total_users': 0,
+            'total_xp': 0,
+            'total_messages': 0,
+            'level_histogram': {},
+            'updated_at': datetime.utcnow()
+        }
+        for bucket in collection.aggregate(pipeline):
+            stats['total_users'] += bucket['users']
+            stats['total_xp'] += bucket['xp']
+            stats['total_messages'] += bucket['messages']
+            stats['level_histogram'][str(bucket['_id'] or 1)] = bucket['users']
+        
+        self.get_collection('level_stats').replace_one({'guild_id': guild_id}, stats, upsert=True)
+        return stats
+    
+    def get_level_stats(self, guild_id):
+        """Get leveling statistics for a guild from its running stats document"""
+        stats = self.get_collection('level_stats', 'stats').find_one({'guild_id': guild_id})
+        if stats is None:
+            stats = self.rebuild_level_stats(guild_id)
+        
+        histogram = {
+            int(level): count
+            for level, count in stats.get('level_histogram', {}).items()
+            if count > 0
+        }
+        if not histogram:
+            return None
+        
+        total_users = sum(histogram.values())
+        return {
+            'total_users': stats.get('total_users', total_users),
+            'total_xp': stats.get('total_xp', 0),
+            'total_messages': stats.get('total_messages', 0),
+            'avg_level': sum(level * count for level, count in histogram.items()) / total_users,
+            'max_level': max(histogram),
+            'level_histogram': dict(sorted(histogram.items()))
+        }
+    
+    # Level Roles
+    def get_level_role_ids(self):
+        """Get stored level role ids for all guilds as {guild_id: {level: role_id}}"""
+        collection = self.get_collection('level_roles')
+        return {
+            doc['guild_id']: {int(level): role_id for level, role_id in doc.get('roles', {}).items()}
+            for doc in collection.find({}, {'_id': 0, 'guild_id': 1, 'roles': 1})
+        }
+    
+    def set_level_role_ids(self, guild_id, role_ids, replace=False):
+        """Store level role ids for a guild, replacing the whole mapping if replace is set"""
+        collection = self.get_collection('level_roles')
+        roles = {str(level): role_id for level, role_id in role_ids.items()}
+        if replace:
+            update = {'$set': {'roles': roles, 'updated_at': datetime.utcnow()}}
+        else:
+            update = {'$set': {**{f'roles.{level}': role_id for level, role_id in roles.items()}, 'updated_at': datetime.utcnow()}}
+        return collection.update_one({'guild_id': guild_id}, update, upsert=True)
+    
+    # Daily XP Rollups
+    @spooled
+    def increment_daily_xp(self, rollups, op_id=None):
+        """Flush accumulated XP into per-(guild, user, day) rollup buckets
+        
+        `rollups` is a list of (guild_id, user_id, day, xp, messages) entries, where
+        day is a UTC midnight datetime. All buckets are written in one unordered bulk_write.
+        """
+        if not rollups:
+            return None
+        
+        collection = self.get_collection('xp_daily')
+        operations = [
+            UpdateOne(
+                *self._apply_once({'guild_id': guild_id, 'day': day, 'user_id': user_id}, {'$inc': {'xp': xp, 'messages': messages}}, op_id),
+                upsert=True
+            )
+            for guild_id, user_id, day, xp, messages in rollups
+        ]
+        return self._bulk_write_once(collection, operations, op_id)
+    
+    def get_period_leaderboard(self, guild_id, start_day, end_day, limit=10):
+        """Get the XP leaderboard for days in [start_day, end_day] from daily rollups"""
+        collection = self.get_collection('xp_daily', 'leaderboard')
+        pipeline = [
+            {'$match': {'guild_id': guild_id, 'day': {'$gte': start_day, '$lte': end_day}}},
+            {'$group': {'_id': '$user_id', 'xp': {'$sum': '$xp'}, 'messages': {'$sum': '$messages'}}},
+            {'$sort': {'xp': -1, '_id': 1}},
+            {'$limit': limit}
+        ]
+        return [
+            {'user_id': doc['_id'], 'xp': doc['xp'], 'messages': doc['messages']}
+            for doc in collection.aggregate(pipeline)
+        ]
+    
+    # Activity Analytics
+    @spooled
+    def record_activity(self, buckets, op_id=None):
+        """Merge in-memory activity buckets into per-(guild, day) documents
+        
+        `buckets` is a list of (guild_id, day, hours, channels, users) entries:
+        message counts per UTC hour (24 ints), message counts per channel id
+        (string keys) and the HyperLogLog registers of the day's active users.
+        Counters are $inc'd. The sketch is merged with the stored one and written
+        back, which is idempotent, so a replayed flush cannot inflate unique counts.
+        """
+        if not buckets:
+            return None
+        
+        collection = self.get_collection('activity_daily')
+        stored = {
+            (doc['guild_id'], doc['day']): doc.get('users')
+            for doc in collection.find(
+                {'$or': [{'guild_id': guild_id, 'day': day} for guild_id, day, *_ in buckets]},
+                {'guild_id': 1, 'day': 1, 'users': 1}
+            )
+        }
+        
+        operations = []
+        for guild_id, day, hours, channels, users in buckets:
+            sketch = HyperLogLog.from_bytes(users)
+            previous = stored.get((guild_id, day))
+            if previous and len(previous) == len(users):
+                sketch.merge(HyperLogLog.from_bytes(previous))
+            
+            increments = {f'hours.{hour}': count for hour, count in enumerate(hours) if count}
+            increments.update({f'channels.{channel_id}': count for channel_id, count in channels.items()})
+            increments['messages'] = sum(hours)
+            operations.append(UpdateOne(
+                *self._apply_once({'guild_id': guild_id, 'day': day}, {'$inc': increments, '$set': {'users': sketch.to_bytes()}}, op_id),
+                upsert=True
+            ))
+        return self._bulk_write_once(collection, operations, op_id)
+    
+    def get_activity(self, guild_id, start_day, end_day):
+        """Daily activity documents for days in [start_day, end_day], oldest first"""
+        collection = self.get_collection('activity_daily', 'stats')
+        return list(collection.find(
+            {'guild_id': guild_id, 'day': {'$gte': start_day, '$lte': end_day}},
+            {'_id': 0, 'day': 1, 'messages': 1, 'hours': 1, 'channels': 1, 'users': 1}
+        ).sort('day', 1))
     
     # Bug Reports
-    def store_bug_report(self, user_id, username, bug_description, guild_id):
-        """Store a bug report"""
+    def store_bug_report(self, user_id, username, bug_description, guild_id, duplicate_of=None, similarity=None):
+        """Store a bug report, optionally linked to the open report it likely duplicates"""
         collection = self.get_collection('bug_reports')
         bug_report = {
             'user_id': user_id,
@@ -271,19 +823,70 @@ class Database:
             'status': 'open',
             'timestamp': datetime.utcnow()
         }
+        if duplicate_of is not None:
+            bug_report['duplicate_of'] = duplicate_of
+            bug_report['duplicate_similarity'] = similarity
         return collection.insert_one(bug_report)
     
-    def get_bug_reports(self, status='open', limit=10):
-        """Get bug reports"""
+    def get_bug_reports(self, guild_id, status='open', limit=10, after=None, before=None):
+        """Get one page of a guild's bug reports, newest first, with keyset pagination on (timestamp, _id)
+        
+        `after` is the (timestamp, _id) key of the last report on the previous page,
+        `before` the key of the first report on the next page; either way the page
+        is one range read on the guild_id/status/timestamp index. Only the fields
+        the listing shows are fetched.
+        """
+        collection = self.get_collection('bug_reports')
+        query = {'guild_id': guild_id, 'status': status}
+        projection = {'description': 1, 'username': 1, 'timestamp': 1, 'duplicate_of': 1}
+        if after is not None:
+            last_timestamp, last_id = after
+            query['$or'] = [
+                {'timestamp': {'$lt': last_timestamp}},
+                {'timestamp': last_timestamp, '_id': {'$lt': last_id}}
+            ]
+        elif before is not None:
+            first_timestamp, first_id = before
+            query['$or'] = [
+                {'timestamp': {'$gt': first_timestamp}},
+                {'timestamp': first_timestamp, '_id': {'$gt': first_id}}
+            ]
+            cursor = collection.find(query, projection).sort([('timestamp', 1), ('_id', 1)]).limit(limit)
+            return list(cursor)[::-1]
+        
+        return list(collection.find(query, projection).sort([('timestamp', -1), ('_id', -1)]).limit(limit))
+    
+    def count_bug_reports(self, status='open', guild_id=None):
+        """Count bug reports with a status"""
         collection = self.get_collection('bug_reports')
-        return list(collection.find({'status': status}).sort('timestamp', -1).limit(limit))
+        query = {'status': status}
+        if guild_id is not None:
+            query['guild_id'] = guild_id
+        return collection.count_documents(query)
     
-    def update_bug_status(self, bug_id, status):
+    def get_active_bug_reports(self, statuses=('open',)):
+        """Stream the id, guild and description of every bug report with one of the given statuses"""
+        collection = self.get_collection('bug_reports')
+        return collection.find({'status': {'$in': list(statuses)}}, {'guild_id': 1, 'description': 1})
+    
+    def get_bug_report(self, bug_id, guild_id=None):
+        """Get a single bug report by id"""
+        collection = self.get_collection('bug_reports')
+        from bson import ObjectId
+        query = {'_id': ObjectId(bug_id)}
+        if guild_id is not None:
+            query['guild_id'] = guild_id
+        return collection.find_one(query)
+    
+    def update_bug_status(self, bug_id, status, guild_id=None):
         """Update bug report status"""
         collection = self.get_collection('bug_reports')
         from bson import ObjectId
+        query = {'_id': ObjectId(bug_id)}
+        if guild_id is not None:
+            query['guild_id'] = guild_id
         return collection.update_one(
-            {'_id': ObjectId(bug_id)},
+            query,
             {'$set': {'status': status, 'updated_at': datetime.utcnow()}}
         )
     
@@ -300,15 +903,126 @@ class Database:
             'guild_id': guild_id,
             'timestamp': datetime.utcnow()
         }
-        return collection.insert_one(resource)
+        result = collection.insert_one(resource)
+        self.invalidate_resource_cache(guild_id)
+        return result
     
-    def get_resources(self, limit=10):
-        """Get recent resources"""
+    def get_resources(self, limit=10, guild_id=None, page=0):
+        """Get recent resources, optionally for one guild, newest first"""
+        key = (guild_id, None, page)
+        cached = self._get_cached_resources(key)
+        if cached is not None:
+            return cached
+        
         collection = self.get_collection('resources')
-        return list(collection.find().sort('timestamp', -1).limit(limit))
+        query = {'guild_id': guild_id} if guild_id is not None else {}
+        results = list(
+            collection.find(query).sort([('timestamp', -1), ('_id', -1)]).skip(page * limit).limit(limit)
+        )
+        self._cache_resources(key, results)
+        return results
+    
+    def search_resources(self, guild_id, terms, limit=5, page=0):
+        """Full-text search over resource titles and content, best matches first"""
+        key = (guild_id, ' '.join(terms.lower().split()), page)
+        cached = self._get_cached_resources(key)
+        if cached is not None:
+            return cached
+        
+        collection = self.get_collection('resources')
+        results = list(
+            collection.find(
+                {'guild_id': guild_id, '$text': {'$search': terms}},
+                {'score': {'$meta': 'textScore'}}
+            ).sort([('score', {'$meta': 'textScore'}), ('timestamp', -1)]).skip(page * limit).limit(limit)
+        )
+        self._cache_resources(key, results)
+        return results
+    
+    def _get_cached_resources(self, key):
+        cached = self.resource_cache.get(key)
+        if cached is None:
+            return None
+        if time.monotonic() - cached[0] >= self.resource_cache_ttl:
+            del self.resource_cache[key]
+            return None
+        self.resource_cache.move_to_end(key)
+        return cached[1]
+    
+    def _cache_resources(self, key, results):
+        self.resource_cache[key] = (time.monotonic(), results)
+        self.resource_cache.move_to_end(key)
+        while len(self.resource_cache) > self.resource_cache_size:
+            self.resource_cache.popitem(last=False)
+    
+    def invalidate_resource_cache(self, guild_id=None):
+        """Drop cached resource queries for a guild and for the all-guilds listing"""
+        for key in [key for key in self.resource_cache if key[0] in (guild_id, None)]:
+            del self.resource_cache[key]
+    
+    # Write Spool
+    def replay_spool(self, batch_size=None):
+        """Write spooled operations back to MongoDB, returns how many were replayed
+        
+        Counters carry the op id given to the call when it was spooled (see
+        _apply_once), so a record that is replayed again after an interruption
+        is not counted twice.
+        """
+        if not self.spool.pending() or not self.breaker.allow():
+            return 0
+        
+        try:
+            with self.breaker.attempt(ConnectionFailure):
+                if not self.indexes_ready:
+                    self.ensure_indexes()
+                return self.spool.replay(self._apply_spooled, batch_size or self.spool_replay_batch)
+        except ConnectionFailure as e:
+            logger.warning(f"Spool replay interrupted, MongoDB still unavailable: {e}")
+            return 0
+    
+    def _apply_spooled(self, records):
+        """Apply one batch of spooled calls in order, merging last-activity updates into one bulk write
+        
+        Returns the (record, error) pairs that failed for a reason other than the
+        connection; raises ReplayInterrupted when MongoDB goes away mid-batch.
+        """
+        rejected = []
+        activity = {}  # (user_id, guild_id) -> latest activity time
+        first_activity = None  # Index of the first record whose activity update is not written yet
+        
+        for i, record in enumerate(records):
+            try:
+                method = getattr(type(self), record['op']).__wrapped__
+                args = record.get('args', [])
+                kwargs = record.get('kwargs', {})
+                
+                if record['op'] == 'update_user_activity':
+                    # $max is idempotent, so these are safe to merge and to repeat
+                    call = inspect.signature(method).bind(self, *args, **kwargs).arguments
+                    key = (call['user_id'], call['guild_id'])
+                    activity[key] = max(activity.get(key, call['at']), call['at'])
+                    if first_activity is None:
+                        first_activity = i
+                else:
+                    method(self, *args, **kwargs)
+            except ConnectionFailure as e:
+                raise ReplayInterrupted(i if first_activity is None else first_activity) from e
+            except Exception as e:
+                rejected.append((record, e))
+        
+        if activity:
+            try:
+                self.get_collection('users', 'activity').bulk_write([
+                    UpdateOne({'user_id': user_id, 'guild_id': guild_id}, {'$max': {'last_activity': at}})
+                    for (user_id, guild_id), at in activity.items()
+                ], ordered=False)
+            except ConnectionFailure as e:
+                raise ReplayInterrupted(first_activity) from e
+        return rejected
     
     def close_connection(self):
         """Close database connection"""
+        self.spool.close()
         if self.client:
             self.client.close()
             logger.info("Database connection closed")
@@ -0,0 +1,99 @@
+"""Latency benchmark for the Database consistency profiles
+
+Usage:
+    python bot/dbbench.py [--ops 2000] [--profiles fire_and_forget acknowledged majority]
+
+Run it against a replica set (the profiles only differ there), see
+"MongoDB Consistency Profiles" in the README for a local three-member set.
+Writes go to a throwaway `benchmark` collection that is dropped afterwards.
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+# Add the bot directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import Database, PROFILES
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_COLLECTION = 'benchmark'
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+def summarize(samples):
+    """p50/p95/p99/mean latencies in milliseconds"""
+    samples = sorted(sample * 1000 for sample in samples)
+    return {
+        'p50': percentile(samples, 0.50),
+        'p95': percentile(samples, 0.95),
+        'p99': percentile(samples, 0.99),
+        'mean': statistics.fmean(samples)
+    }
+
+def bench_writes(collection, ops):
+    """Time single update_one upserts, the shape of the bot's activity and XP writes"""
+    samples = []
+    for i in range(ops):
+        start = time.perf_counter()
+        collection.update_one({'_id': i % 500}, {'$inc': {'count': 1}, '$set': {'last': time.time()}}, upsert=True)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def bench_reads(collection, ops):
+    """Time a small sorted read, the shape of a leaderboard page"""
+    samples = []
+    for _ in range(ops):
+        start = time.perf_counter()
+        list(collection.find({}, {'count': 1}).sort('count', -1).limit(10))
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark MongoDB consistency profiles")
+    parser.add_argument('--ops', type=int, default=2000, help="Operations per profile")
+    parser.add_argument('--profiles', nargs='+', default=list(PROFILES), choices=list(PROFILES))
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(
+        level=getattr(logging, os.getenv('LOGGING_LEVEL', 'INFO')),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    db = Database()
+    base = db.get_collection(BENCHMARK_COLLECTION)
+    base.drop()
+    
+    try:
+        hello = db.client.admin.command('hello')
+        if 'setName' not in hello:
+            logger.warning("Not connected to a replica set, majority writes and secondary reads behave like the defaults")
+        
+        results = []
+        for profile in args.profiles:
+            collection = base.with_options(**PROFILES[profile])
+            writes = summarize(bench_writes(collection, args.ops))
+            reads = summarize(bench_reads(collection, args.ops))
+            results.append((profile, writes, reads))
+        
+        # w=0 writes are unacknowledged, wait for them to land before dropping the collection
+        db.client.admin.command('ping')
+        
+        print(f"{'profile':<18} {'write p50':>10} {'p95':>8} {'p99':>8} {'read p50':>10} {'p95':>8} {'p99':>8}  (ms, {args.ops} ops)")
+        for profile, writes, reads in results:
+            print(
+                f"{profile:<18} {writes['p50']:>10.3f} {writes['p95']:>8.3f} {writes['p99']:>8.3f} "
+                f"{reads['p50']:>10.3f} {reads['p95']:>8.3f} {reads['p99']:>8.3f}"
+            )
+    finally:
+        base.drop()
+        db.close_connection()
+
+if __name__ == "__main__":
+    main()
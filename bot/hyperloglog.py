@@ -0,0 +1,79 @@
+import math
+
+MASK64 = (1 << 64) - 1
+
+def mix64(value):
+    """SplitMix64 finalizer: spreads integer ids (Discord snowflakes) over 64 bits"""
+    value = (value + 0x9E3779B97F4A7C15) & MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+class HyperLogLog:
+    """HyperLogLog sketch of distinct integer ids
+    
+    2**p one-byte registers (2 KB at p=11) estimate how many distinct ids were
+    added with a standard error of about 1.04 / sqrt(2**p) (2.3% at p=11),
+    whether that is ten ids or ten million. Sketches merge with a register-wise
+    max, so daily sketches combine into weekly or monthly unique counts without
+    keeping the ids. Merging is idempotent: merging the same sketch twice
+    changes nothing.
+    """
+    def __init__(self, p=11, registers=None):
+        if not 4 <= p <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.m)
+        if len(self.registers) != self.m:
+            raise ValueError(f"expected {self.m} registers, got {len(self.registers)}")
+    
+    @classmethod
+    def from_bytes(cls, data):
+        """Sketch from stored registers, the precision follows from their count"""
+        p = len(data).bit_length() - 1
+        if len(data) != 1 << p:
+            raise ValueError(f"register count {len(data)} is not a power of two")
+        return cls(p, data)
+    
+    def to_bytes(self):
+        return bytes(self.registers)
+    
+    def add(self, item):
+        """Add an integer id"""
+        x = mix64(item)
+        index = x >> (64 - self.p)
+        rest = (x << self.p) & MASK64
+        # Position of the first 1-bit in the remaining 64 - p bits
+        rank = 64 - rest.bit_length() + 1 if rest else 64 - self.p + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+    
+    def merge(self, other):
+        """Fold another sketch of the same precision into this one"""
+        if other.m != self.m:
+            raise ValueError(f"cannot merge precision {other.p} into precision {self.p}")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+    
+    def count(self):
+        """Estimated number of distinct ids"""
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small range correction: linear counting over the empty registers
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+    
+    @classmethod
+    def union(cls, sketches, p=11):
+        """One sketch covering every sketch given (an empty one at precision p if there are none)"""
+        merged = None
+        for sketch in sketches:
+            if merged is None:
+                merged = cls(sketch.p, sketch.registers)
+            else:
+                merged.merge(sketch)
+        return merged if merged is not None else cls(p)
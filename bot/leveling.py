@@ -0,0 +1,146 @@
+"""Bulk level recompute for when the XP curve changes
+
+Usage:
+    python bot/leveling.py [--guild ID] [--apply] [--plan role-plan.jsonl]
+
+Without --apply this is a dry run that only reports what would change.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from collections import Counter
+
+import numpy as np
+from pymongo import UpdateOne
+
+# Add the bot directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import LEVEL_UP_BASE, LEVEL_UP_MULTIPLIER
+from database import Database
+
+logger = logging.getLogger(__name__)
+
+def level_thresholds(max_xp, base=LEVEL_UP_BASE, multiplier=LEVEL_UP_MULTIPLIER):
+    """XP thresholds where thresholds[k - 1] is the XP needed to report level k
+    
+    Matches calculate_level_from_xp: a user is at the highest level k with
+    xp >= int(base * k ** multiplier), and never below level 1.
+    """
+    thresholds = []
+    level = 1
+    while True:
+        threshold = int(base * (level ** multiplier))
+        thresholds.append(threshold)
+        if threshold > max_xp:
+            break
+        level += 1
+    return np.array(thresholds, dtype=np.int64)
+
+def levels_for_xp(xp, thresholds):
+    """Compute levels for an array of XP values at once"""
+    return np.maximum(np.searchsorted(thresholds, xp, side='right'), 1)
+
+def recompute_levels(db, guild_id=None, apply=False, chunk_size=5000, plan_file=None):
+    """Stream user_levels in chunks, recompute levels against the current curve
+    and (with apply) write only the changed documents via bulk_write.
+    
+    Every changed member is written to plan_file as a JSON line
+    {guild_id, user_id, old_level, new_level}, which is the role-change plan.
+    Returns a summary dict.
+    """
+    collection = db.get_collection('user_levels')
+    query = {'guild_id': guild_id} if guild_id is not None else {}
+    cursor = collection.find(query, {'guild_id': 1, 'user_id': 1, 'xp': 1, 'level': 1}).batch_size(chunk_size)
+    
+    thresholds = level_thresholds(0)
+    summary = {'scanned': 0, 'changed': 0, 'level_ups': 0, 'level_downs': 0, 'transitions': Counter()}
+    histogram_changes = {}  # guild_id -> {level: delta}
+    
+    def process(chunk):
+        nonlocal thresholds
+        xp = np.fromiter((doc.get('xp', 0) for doc in chunk), dtype=np.int64, count=len(chunk))
+        old_levels = np.fromiter((doc.get('level', 1) for doc in chunk), dtype=np.int64, count=len(chunk))
+        
+        # Grow the threshold table only when a chunk contains a new XP maximum
+        if len(xp) and xp.max() >= thresholds[-1]:
+            thresholds = level_thresholds(int(xp.max()))
+        
+        new_levels = levels_for_xp(xp, thresholds)
+        changed = np.nonzero(new_levels != old_levels)[0]
+        
+        operations = []
+        for i in changed:
+            doc = chunk[i]
+            old_level, new_level = int(old_levels[i]), int(new_levels[i])
+            operations.append(UpdateOne({'_id': doc['_id']}, {'$set': {'level': new_level}}))
+            
+            guild_changes = histogram_changes.setdefault(doc['guild_id'], Counter())
+            guild_changes[old_level] -= 1
+            guild_changes[new_level] += 1
+            
+            summary['transitions'][(old_level, new_level)] += 1
+            if plan_file:
+                plan_file.write(json.dumps({
+                    'guild_id': doc['guild_id'],
+                    'user_id': doc['user_id'],
+                    'old_level': old_level,
+                    'new_level': new_level
+                }) + "\n")
+        
+        if apply and operations:
+            collection.bulk_write(operations, ordered=False)
+        
+        summary['scanned'] += len(chunk)
+        summary['changed'] += len(changed)
+        summary['level_ups'] += int(np.count_nonzero(new_levels[changed] > old_levels[changed]))
+        summary['level_downs'] += int(np.count_nonzero(new_levels[changed] < old_levels[changed]))
+    
+    chunk = []
+    for doc in cursor:
+        chunk.append(doc)
+        if len(chunk) >= chunk_size:
+            process(chunk)
+            chunk = []
+    if chunk:
+        process(chunk)
+    
+    if apply:
+        for changed_guild_id, level_changes in histogram_changes.items():
+            db.update_level_stats(changed_guild_id, level_changes={str(level): delta for level, delta in level_changes.items()})
+    
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute stored levels against the current XP curve")
+    parser.add_argument('--guild', type=int, default=None, help="Only recompute this guild ID")
+    parser.add_argument('--apply', action='store_true', help="Write changed levels (default is a dry run)")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="Documents processed per vectorized chunk")
+    parser.add_argument('--plan', default=None, help="Write the role-change plan as JSONL to this path")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(
+        level=getattr(logging, os.getenv('LOGGING_LEVEL', 'INFO')),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    db = Database()
+    plan_file = open(args.plan, 'w') if args.plan else None
+    try:
+        summary = recompute_levels(db, args.guild, args.apply, args.chunk_size, plan_file)
+    finally:
+        if plan_file:
+            plan_file.close()
+        db.close_connection()
+    
+    logger.info(
+        f"{'Applied' if args.apply else 'Dry run'}: scanned {summary['scanned']:,} users, "
+        f"{summary['changed']:,} level changes ({summary['level_ups']:,} up, {summary['level_downs']:,} down)"
+    )
+    for (old_level, new_level), count in summary['transitions'].most_common(20):
+        logger.info(f"  Level {old_level} → {new_level}: {count:,} members")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import hashlib
+import random
+import re
+
+# Mersenne prime used for the universal hash family
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+def shingles(text, size=3):
+    """Split text into a set of word shingles (character shingles for very short text)"""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        joined = " ".join(words)
+        return {joined[i:i + 5] for i in range(max(1, len(joined) - 4))} if joined else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def hash_shingle(shingle):
+    """Stable 32-bit hash of a shingle"""
+    return int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=4).digest(), 'little')
+
+class MinHashIndex:
+    """In-memory MinHash signatures with LSH banding for near-duplicate lookup
+
+    Documents whose signatures agree on every row of at least one band become
+    candidates; candidates are then ranked by estimated Jaccard similarity, so
+    a lookup never compares against every stored document.
+    """
+    def __init__(self, num_perm=64, bands=16, seed=42):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = random.Random(seed)
+        self.permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self.signatures = {}  # doc_id -> signature
+        self.buckets = [{} for _ in range(bands)]  # band -> {band key: set of doc_ids}
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def signature(self, text):
+        """Compute the MinHash signature of a text, None if it has no words to shingle
+        
+        An empty shingle set would give every such text the same all-MAX_HASH
+        signature, so short or punctuation-only texts would all look identical.
+        """
+        hashes = [hash_shingle(shingle) for shingle in shingles(text)]
+        if not hashes:
+            return None
+        return [
+            min(((a * h + b) % MERSENNE_PRIME) & MAX_HASH for h in hashes)
+            for a, b in self.permutations
+        ]
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, tuple(signature[band * self.rows:(band + 1) * self.rows])
+
+    def add(self, doc_id, text=None, signature=None):
+        """Index a document by text or precomputed signature (texts without shingles are not indexed)"""
+        if signature is None:
+            signature = self.signature(text or '')
+        self.remove(doc_id)
+        if signature is None:
+            return None
+        self.signatures[doc_id] = signature
+        for band, key in self._band_keys(signature):
+            self.buckets[band].setdefault(key, set()).add(doc_id)
+        return signature
+
+    def remove(self, doc_id):
+        """Remove a document from the index if present"""
+        signature = self.signatures.pop(doc_id, None)
+        if signature is None:
+            return
+        for band, key in self._band_keys(signature):
+            bucket = self.buckets[band].get(key)
+            if bucket:
+                bucket.discard(doc_id)
+                if not bucket:
+                    del self.buckets[band][key]
+
+    def query(self, text=None, signature=None, threshold=0.5):
+        """Return (doc_id, similarity) pairs at or above threshold, most similar first"""
+        if signature is None:
+            signature = self.signature(text or '')
+        if signature is None:
+            return []
+
+        candidates = set()
+        for band, key in self._band_keys(signature):
+            candidates.update(self.buckets[band].get(key, ()))
+
+        matches = []
+        for doc_id in candidates:
+            other = self.signatures[doc_id]
+            similarity = sum(1 for x, y in zip(signature, other) if x == y) / self.num_perm
+            if similarity >= threshold:
+                matches.append((doc_id, similarity))
+
+        return sorted(matches, key=lambda match: match[1], reverse=True)
@@ -0,0 +1,103 @@
+import bisect
+
+SEPARATOR = '\x00'  # Sorts before every printable character, so "bob" comes before "bobby"
+
+def fold(name):
+    """Case-insensitive form of a name used as the index key"""
+    return name.replace(SEPARATOR, '').casefold().strip()
+
+class PrefixIndex:
+    """Case-insensitive prefix search from names to ids
+    
+    Answers the same queries as a prefix trie (every name under a prefix, in
+    order) from one sorted list of "name\\0id" strings: a search is a bisect to
+    the first key with the prefix plus a scan that stops after `limit` ids, and
+    an update is a bisect plus one list insert or delete. One string per name
+    instead of one node per character keeps a million-member guild in tens of MB.
+    """
+    def __init__(self):
+        self.keys = []  # Sorted "folded name\0id" strings
+        self.names = {}  # id -> tuple of folded names it is indexed under
+        self.labels = {}  # id -> label shown in suggestions
+    
+    def __len__(self):
+        return len(self.names)
+    
+    def __contains__(self, item_id):
+        return item_id in self.names
+    
+    @staticmethod
+    def _fold_all(names):
+        return tuple(sorted({fold(name) for name in names if name and fold(name)}))
+    
+    def add(self, item_id, label, names):
+        """Index an id under each of its names, replacing whatever it was indexed under before"""
+        folded = self._fold_all(names)
+        self.labels[item_id] = label
+        if self.names.get(item_id) == folded:
+            return
+        
+        self._remove_keys(item_id)
+        for name in folded:
+            bisect.insort(self.keys, f"{name}{SEPARATOR}{item_id}")
+        self.names[item_id] = folded
+    
+    def add_many(self, entries):
+        """Index many (id, label, names) entries with one sort; ids already indexed are kept as they are
+        
+        Used for the initial scan, so updates that arrived while it ran are not overwritten.
+        """
+        added = 0
+        for item_id, label, names in entries:
+            if item_id in self.names:
+                continue
+            folded = self._fold_all(names)
+            self.keys.extend(f"{name}{SEPARATOR}{item_id}" for name in folded)
+            self.names[item_id] = folded
+            self.labels[item_id] = label
+            added += 1
+        self.keys.sort()
+        return added
+    
+    def remove(self, item_id):
+        """Drop an id from the index"""
+        self._remove_keys(item_id)
+        self.labels.pop(item_id, None)
+    
+    def _remove_keys(self, item_id):
+        for name in self.names.pop(item_id, ()):
+            key = f"{name}{SEPARATOR}{item_id}"
+            i = bisect.bisect_left(self.keys, key)
+            if i < len(self.keys) and self.keys[i] == key:
+                del self.keys[i]
+    
+    def search(self, prefix, limit=25):
+        """Ids with a name starting with prefix, ordered by name (exact matches first)"""
+        prefix = fold(prefix)
+        results = []
+        for i in range(bisect.bisect_left(self.keys, prefix), len(self.keys)):
+            key = self.keys[i]
+            if not key.startswith(prefix):
+                break
+            item_id = int(key.rsplit(SEPARATOR, 1)[1])
+            if item_id not in results:
+                results.append(item_id)
+                if len(results) >= limit:
+                    break
+        return results
+    
+    def lookup(self, name):
+        """Ids indexed under exactly this name (case-insensitive)"""
+        exact = fold(name) + SEPARATOR
+        results = []
+        for i in range(bisect.bisect_left(self.keys, exact), len(self.keys)):
+            key = self.keys[i]
+            if not key.startswith(exact):
+                break
+            results.append(int(key[len(exact):]))
+        return results
+    
+    def clear(self):
+        self.keys.clear()
+        self.names.clear()
+        self.labels.clear()
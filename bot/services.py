@@ -0,0 +1,311 @@
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from cards import CardRenderer
+from config import *
+from prefixindex import PrefixIndex
+from spamfilter import SpamFilter
+
+logger = logging.getLogger(__name__)
+
+class Services:
+    """Shared services and state handed to every extension
+
+    Extensions get this through `bot.services` instead of module globals, so
+    caches, queues, channels and timers outlive `bot.reload_extension`: only
+    the extension's code is replaced, the objects it works on stay put.
+    """
+    def __init__(self, bot, db, settings, discord_handler):
+        self.bot = bot
+        self.db = db
+        self.settings = settings
+        self.discord_handler = discord_handler
+
+        # Channels found or created by the startup steps
+        self.message_log_channel = None
+        self.member_count_channel = None
+        self.levelup_channel = None
+
+        # Leveling system
+        self.user_cooldowns = {}  # Track XP gain cooldowns
+        self.leaderboard_cache = OrderedDict()  # (guild_id, page) -> (fetched_at, entries)
+        self.xp_rollups = {}  # (guild_id, user_id, day) -> [xp, messages] waiting to be flushed
+        self.period_leaderboard_cache = {}  # (guild_id, start_day, end_day) -> (fetched_at, entries)
+        self.level_role_ids = {}  # guild_id -> {level: role_id} for O(1) level role lookup
+        self.card_renderer = CardRenderer(workers=CARD_RENDER_WORKERS, cache_size=CARD_CACHE_SIZE)  # Rank and leaderboard PNGs
+        self.spam_filter = SpamFilter(
+            history_size=SPAM_HISTORY_SIZE,
+            max_users=SPAM_MAX_TRACKED_USERS,
+            bloom_bits=SPAM_BLOOM_BITS,
+            bloom_window=SPAM_BLOOM_WINDOW,
+            bloom_min_length=SPAM_BLOOM_MIN_LENGTH,
+            min_entropy=SPAM_MIN_ENTROPY
+        )
+
+        # Bug triage
+        self.bug_indexes = {}  # guild_id -> MinHashIndex of active bug reports
+
+        # Moderation
+        self.mute_tasks = {}  # (guild_id, user_id) -> task that lifts a timed mute
+
+        # Activity analytics
+        self.activity_buckets = {}  # (guild_id, day) -> hourly/channel counters and unique-user sketch waiting to be flushed
+
+        # Name lookup for autocomplete and member arguments, kept current by member and role events
+        self.name_indexes = {}  # guild_id -> GuildNameIndex
+
+        # Memory monitoring
+        self.memory_snapshot = None  # Last tracemalloc snapshot
+        self.memory_report = {'rss_mb': None, 'checked_at': None, 'top_diffs': []}
+
+        # Message pipeline, stages are registered by the extensions that own them
+        self.message_checks = {}  # Stage name -> blocking check, returns True to stop the message
+        self.message_stages = {}  # Stage name -> (side-effect stage, also run for blocked messages)
+        self.message_stage_tasks = set()  # Background side-effect stages still running
+        self.message_stage_stats = {}  # Stage name -> {'runs', 'errors', 'total', 'max'} timings in seconds
+
+        # Startup
+        self.startup_steps = {}  # Setup step name -> coroutine function, registered by the extensions
+        self.category_setup_tasks = {}  # (guild_id, category_name) -> task finding or creating the category
+        self.startup_task = None  # Runs the channel setup steps once per process
+        self.startup_timings = {}  # Setup step name -> seconds taken
+        self.channels_ready = asyncio.Event()  # Set once the setup steps have finished
+
+    def add_startup_step(self, name, step):
+        """Register a setup step
+
+        An extension loaded after startup has begun gets its step run right away,
+        a reloaded one does not repeat it: what the step built lives on here.
+        """
+        self.startup_steps[name] = step
+        if self.startup_task is not None and name not in self.startup_timings:
+            asyncio.create_task(self.timed_setup_step(name, step))
+
+    def add_message_stage(self, name, stage, blocking=False, run_when_blocked=False):
+        """Register a message pipeline stage (blocking checks run before command dispatch)"""
+        if blocking:
+            self.message_checks[name] = stage
+        else:
+            self.message_stages[name] = (stage, run_when_blocked)
+
+    def remove_message_stage(self, name):
+        self.message_checks.pop(name, None)
+        self.message_stages.pop(name, None)
+
+    def name_index(self, guild_id):
+        """A guild's name index, created empty on first use"""
+        index = self.name_indexes.get(guild_id)
+        if index is None:
+            index = self.name_indexes[guild_id] = GuildNameIndex()
+        return index
+
+    async def get_or_create_category(self, guild, name, overwrites):
+        """Find or create a category, sharing one lookup between concurrent setup steps"""
+        key = (guild.id, name)
+        task = self.category_setup_tasks.get(key)
+
+        if task is None or (task.done() and (task.cancelled() or task.exception())):
+            async def find_or_create():
+                category = discord.utils.get(guild.categories, name=name)
+                if not category:
+                    category = await guild.create_category(name=name, overwrites=overwrites)
+                    logger.info(f"Created category: {name}")
+                return category
+
+            task = asyncio.ensure_future(find_or_create())
+            self.category_setup_tasks[key] = task
+
+        return await asyncio.shield(task)
+
+    async def wait_for_channels(self, timeout=CHANNEL_READY_TIMEOUT):
+        """Wait until startup has set up the bot's channels; returns False on timeout"""
+        if self.channels_ready.is_set():
+            return True
+        try:
+            await asyncio.wait_for(self.channels_ready.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def timed_setup_step(self, name, step):
+        """Run one setup step, recording its duration and isolating its errors"""
+        start = time.perf_counter()
+        try:
+            await step()
+        except Exception as e:
+            logger.error(f"Setup step {name} failed: {e}")
+        finally:
+            self.startup_timings[name] = time.perf_counter() - start
+
+    async def run_startup(self):
+        """Run all registered setup steps concurrently, then release waiting handlers"""
+        start = time.perf_counter()
+        try:
+            await asyncio.gather(*(self.timed_setup_step(name, step) for name, step in self.startup_steps.items()))
+        finally:
+            self.startup_timings['total'] = time.perf_counter() - start
+            self.channels_ready.set()
+
+        timings = ", ".join(f"{name}: {seconds:.2f}s" for name, seconds in self.startup_timings.items())
+        logger.info(f"Startup setup complete ({timings})")
+
+class GuildNameIndex:
+    """Prefix indexes over one guild's member names and role names"""
+    def __init__(self):
+        self.members = PrefixIndex()
+        self.roles = PrefixIndex()
+        self.members_ready = False  # Set once the initial member scan has finished
+
+    def add_member(self, member):
+        self.members.add(*member_index_entry(member))
+
+    def add_role(self, role):
+        if not role.is_default():
+            self.roles.add(role.id, role.name, (role.name,))
+
+def member_label(member):
+    """How a member is shown in suggestions: display name, plus username when they differ"""
+    if member.display_name == member.name:
+        return member.name
+    return f"{member.display_name} ({member.name})"
+
+def member_index_entry(member):
+    """(id, label, names) of a member for the name index: nickname, global name and username"""
+    return member.id, member_label(member), (member.display_name, member.global_name, member.name)
+
+async def iter_guild_members(guild):
+    """Yield every member of a guild
+
+    Uses the member cache when the guild is fully chunked, otherwise streams
+    members from the API in pages so they never all sit in the cache.
+    """
+    if guild.chunked:
+        for member in guild.members:
+            yield member
+    else:
+        async for member in guild.fetch_members(limit=None):
+            yield member
+
+async def resolve_members(guild, user_ids):
+    """Map user IDs to members, fetching uncached ones in batches of 100"""
+    members = {}
+    missing = []
+    for user_id in user_ids:
+        member = guild.get_member(user_id)
+        if member:
+            members[user_id] = member
+        else:
+            missing.append(user_id)
+
+    for i in range(0, len(missing), 100):
+        try:
+            fetched = await guild.query_members(user_ids=missing[i:i + 100], cache=False)
+            members.update({member.id: member for member in fetched})
+        except Exception as e:
+            logger.warning(f"Failed to fetch {len(missing[i:i + 100])} members: {e}")
+
+    return members
+
+class IndexedMember(commands.MemberConverter):
+    """Member converter that resolves names through the guild's name index
+
+    IDs and mentions (what autocomplete submits) go to the stock converter,
+    which looks them up directly. Names are looked up in the index instead of
+    discord.py's linear scan over guild.members; while the index is still being
+    built, or when it has no match, the stock converter is used as before.
+    """
+    async def convert(self, ctx, argument):
+        services = getattr(ctx.bot, 'services', None)
+        if ctx.guild and services and not re.match(r'<@!?([0-9]{15,20})>$|([0-9]{15,20})$', argument):
+            index = services.name_indexes.get(ctx.guild.id)
+            if index and index.members_ready:
+                user_ids = index.members.lookup(argument)[:100]
+                if user_ids:
+                    members = await resolve_members(ctx.guild, user_ids)
+                    for user_id in user_ids:
+                        if user_id in members:
+                            return members[user_id]
+        return await super().convert(ctx, argument)
+
+async def member_autocomplete(interaction, current):
+    """Suggest members whose display name, global name or username starts with what was typed"""
+    index = interaction.client.services.name_indexes.get(interaction.guild_id)
+    if index is None or not index.members_ready:
+        # Let Discord search usernames until the index has been built
+        members = await interaction.guild.query_members(query=current, limit=25, cache=False)
+        return [app_commands.Choice(name=member_label(member)[:100], value=str(member.id)) for member in members]
+
+    return [
+        app_commands.Choice(name=index.members.labels[user_id][:100], value=str(user_id))
+        for user_id in index.members.search(current)
+    ]
+
+async def available_role_autocomplete(interaction, current):
+    """Suggest the self-assignable roles (AVAILABLE_ROLES) whose name starts with what was typed"""
+    index = interaction.client.services.name_indexes.get(interaction.guild_id)
+    if index is None:
+        names = [name for name in AVAILABLE_ROLES if name.casefold().startswith(current.casefold())]
+    else:
+        available = {name.casefold() for name in AVAILABLE_ROLES}
+        names = [index.roles.labels[role_id] for role_id in index.roles.search(current, limit=250)]
+        names = [name for name in dict.fromkeys(names) if name.casefold() in available]
+    return [app_commands.Choice(name=name, value=name) for name in names[:25]]
+
+def is_user_admin(user):
+    """Check if a user has admin permissions"""
+    if not user or not hasattr(user, 'roles'):
+        return False
+    user_roles = [role.name for role in user.roles]
+    return any(role in ADMIN_ROLES for role in user_roles) or user.guild_permissions.administrator
+
+def is_admin():
+    """Check if user has admin permissions (decorator)"""
+    def predicate(ctx):
+        return is_user_admin(ctx.author)
+    return commands.check(predicate)
+
+def parse_time(time_str):
+    """Parse time string to seconds"""
+    try:
+        if time_str.endswith('s'):
+            return int(time_str[:-1])
+        elif time_str.endswith('m'):
+            return int(time_str[:-1]) * 60
+        elif time_str.endswith('h'):
+            return int(time_str[:-1]) * 3600
+        elif time_str.endswith('d'):
+            return int(time_str[:-1]) * 86400
+        else:
+            return int(time_str) * 60  # Default to minutes
+    except:
+        return 600  # Default 10 minutes
+
+def parse_leaderboard_period(period, end=None):
+    """Parse a period ('today', 'week', 'month', '<n>d' or 'YYYY-MM-DD') into (start_day, end_day)"""
+    now = datetime.utcnow()
+    today = datetime(now.year, now.month, now.day)
+    period = period.lower()
+    
+    if period == 'today':
+        return today, today
+    if period == 'week':
+        return today - timedelta(days=6), today
+    if period == 'month':
+        return today - timedelta(days=29), today
+    if period.endswith('d') and period[:-1].isdigit():
+        days = int(period[:-1])
+        if days < 1:
+            raise ValueError("Period must cover at least one day")
+        return today - timedelta(days=days - 1), today
+    
+    start_day = datetime.strptime(period, '%Y-%m-%d')
+    end_day = datetime.strptime(end, '%Y-%m-%d') if end else today
+    return start_day, end_day
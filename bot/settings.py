@@ -0,0 +1,122 @@
+import logging
+import time
+
+import config
+
+logger = logging.getLogger(__name__)
+
+def parse_bool(value):
+    value = str(value).strip().lower()
+    if value in ('true', 'yes', 'on', '1'):
+        return True
+    if value in ('false', 'no', 'off', '0'):
+        return False
+    raise ValueError(f"expected true or false, got '{value}'")
+
+def parse_levels(value):
+    levels = [level.strip().upper() for level in str(value).split(',') if level.strip()]
+    unknown = [level for level in levels if level not in ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')]
+    if unknown:
+        raise ValueError(f"unknown log levels: {', '.join(unknown)}")
+    return levels
+
+# Settings that can be overridden per guild at runtime: name -> (parser, description)
+TUNABLE_SETTINGS = {
+    'XP_PER_MESSAGE': (int, "Base XP per message"),
+    'XP_BONUS_MIN': (int, "Minimum random bonus XP"),
+    'XP_BONUS_MAX': (int, "Maximum random bonus XP"),
+    'XP_COOLDOWN': (int, "Seconds between XP gains per member"),
+    'MIN_MESSAGE_LENGTH': (int, "Minimum message length for length bonus XP"),
+    'MESSAGE_LENGTH_MULTIPLIER': (float, "Length bonus XP per character"),
+    'MAX_LENGTH_BONUS': (int, "Maximum length bonus XP"),
+    'ENABLE_SPAM_FILTER': (parse_bool, "Reject repeated and low-effort messages for XP"),
+    'LOG_LEVELS_TO_DISCORD': (parse_levels, "Log levels sent to the log channel"),
+}
+
+class SettingsResolver:
+    """Per-guild settings backed by the guild_settings collection with env defaults
+    
+    Each guild's overrides are loaded with one query and cached in process, so a
+    lookup on the message path is two dict reads. `invalidate` drops a guild's
+    entry after `!config set`; the TTL picks up changes made by other processes.
+    A failed load is cached for only `retry_ttl` seconds, so a brief MongoDB
+    outage does not hide a guild's overrides for the full TTL.
+    """
+    def __init__(self, db, ttl=300, retry_ttl=10):
+        self.db = db
+        self.ttl = ttl
+        self.retry_ttl = retry_ttl
+        self.cache = {}  # guild_id -> (expires_at, overrides)
+    
+    def overrides(self, guild_id):
+        """A guild's stored overrides (cached)"""
+        cached = self.cache.get(guild_id)
+        if cached and time.monotonic() < cached[0]:
+            return cached[1]
+        
+        try:
+            overrides = self.db.get_guild_settings(guild_id)
+            self.cache[guild_id] = (time.monotonic() + self.ttl, overrides)
+        except Exception as e:
+            # Serve the last known overrides (or the defaults) rather than failing the caller,
+            # and try again soon. Cache before logging: the Discord log handler reads settings too.
+            overrides = cached[1] if cached else {}
+            self.cache[guild_id] = (time.monotonic() + self.retry_ttl, overrides)
+            logger.warning(f"Failed to load settings for guild {guild_id}, using {'last known' if cached else 'default'} values: {e}")
+        return overrides
+    
+    def get(self, guild_id, name):
+        """Effective value of a setting for a guild"""
+        if guild_id is not None:
+            overrides = self.overrides(guild_id)
+            if name in overrides:
+                return overrides[name]
+        return getattr(config, name)
+    
+    def expired(self, guild_id):
+        """Whether a guild's overrides are missing or past their TTL, so `overrides` would query the database"""
+        cached = self.cache.get(guild_id)
+        return not cached or time.monotonic() >= cached[0]
+    
+    def get_cached(self, guild_id, name):
+        """Effective value of a setting from the cache only, never querying the database
+        
+        For callers that must not block, such as logging handlers and the message
+        path (which loads expired guilds in a thread first); an expired entry is
+        still used and a guild not loaded yet gets the env default.
+        """
+        cached = self.cache.get(guild_id)
+        if cached and name in cached[1]:
+            return cached[1][name]
+        return getattr(config, name)
+    
+    def parse(self, name, raw):
+        """Validate and convert a raw value for a setting, raises ValueError"""
+        if name not in TUNABLE_SETTINGS:
+            raise ValueError(f"unknown setting '{name}'")
+        parser = TUNABLE_SETTINGS[name][0]
+        try:
+            return parser(raw)
+        except ValueError as e:
+            raise ValueError(f"invalid value for {name}: {e}")
+    
+    def set(self, guild_id, name, raw):
+        """Store a parsed override and invalidate the guild's cache, returns the stored value"""
+        value = self.parse(name, raw)
+        self.db.set_guild_setting(guild_id, name, value)
+        self.invalidate(guild_id)
+        return value
+    
+    def reset(self, guild_id, name):
+        """Remove an override so the env default applies again"""
+        if name not in TUNABLE_SETTINGS:
+            raise ValueError(f"unknown setting '{name}'")
+        self.db.unset_guild_setting(guild_id, name)
+        self.invalidate(guild_id)
+    
+    def invalidate(self, guild_id=None):
+        """Drop cached overrides for one guild, or all guilds"""
+        if guild_id is None:
+            self.cache.clear()
+        else:
+            self.cache.pop(guild_id, None)
@@ -0,0 +1,120 @@
+import hashlib
+import math
+import re
+import time
+from collections import Counter, OrderedDict, deque
+
+WHITESPACE = re.compile(r"\s+")
+
+def normalize(content):
+    """Lowercase and collapse whitespace so trivial edits still hash the same"""
+    return WHITESPACE.sub(" ", content.lower()).strip()
+
+def char_entropy(text):
+    """Shannon entropy of a string in bits per character"""
+    if not text:
+        return 0.0
+    length = len(text)
+    return -sum(count / length * math.log2(count / length) for count in Counter(text).values())
+
+class BloomFilter:
+    """Fixed-size Bloom filter over 16-byte digests"""
+    def __init__(self, bits=1 << 20, hashes=4):
+        self.bits = bits
+        self.hashes = min(hashes, 4)  # A 16-byte digest yields four 32-bit indexes
+        self.array = bytearray((bits + 7) // 8)  # Rounded up, bits need not be a multiple of 8
+    
+    def _indexes(self, digest):
+        for i in range(self.hashes):
+            yield int.from_bytes(digest[i * 4:(i + 1) * 4], 'little') % self.bits
+    
+    def add(self, digest):
+        for index in self._indexes(digest):
+            self.array[index >> 3] |= 1 << (index & 7)
+    
+    def __contains__(self, digest):
+        return all(self.array[index >> 3] & (1 << (index & 7)) for index in self._indexes(digest))
+
+class SpamFilter:
+    """Rejects repeated and low-effort messages before any database access
+    
+    Each user keeps a ring buffer of their recent message digests, and a pair of
+    rotating Bloom filters remembers every digest seen in a guild during the
+    last one to two windows to catch the same text pasted by several users.
+    """
+    def __init__(self, history_size=10, max_users=10000, bloom_bits=1 << 20, bloom_window=600,
+                 bloom_min_length=20, min_entropy=2.0, entropy_min_length=8):
+        self.history_size = history_size
+        self.max_users = max_users
+        self.bloom_bits = bloom_bits
+        self.bloom_window = bloom_window
+        self.bloom_min_length = bloom_min_length
+        self.min_entropy = min_entropy
+        self.entropy_min_length = entropy_min_length
+        self.histories = OrderedDict()  # (guild_id, user_id) -> deque of recent digests
+        self.current = BloomFilter(bloom_bits)
+        self.previous = BloomFilter(bloom_bits)
+        self.rotated_at = time.monotonic()
+        self.counters = Counter()
+        self.check_seconds = 0.0
+    
+    def __len__(self):
+        return len(self.histories)
+    
+    def _rotate(self, now):
+        if now - self.rotated_at >= self.bloom_window:
+            self.previous = self.current
+            self.current = BloomFilter(self.bloom_bits)
+            self.rotated_at = now
+    
+    def check(self, guild_id, user_id, content):
+        """Return a rejection reason ('duplicate', 'copypasta', 'low_entropy') or None if the message is fine"""
+        start = time.perf_counter()
+        reason = self._check(guild_id, user_id, content)
+        self.check_seconds += time.perf_counter() - start
+        self.counters['checked'] += 1
+        self.counters[reason or 'accepted'] += 1
+        return reason
+    
+    def _check(self, guild_id, user_id, content):
+        text = normalize(content or "")
+        digest = hashlib.blake2b(f"{guild_id}:{text}".encode(), digest_size=16).digest()
+        
+        key = (guild_id, user_id)
+        history = self.histories.get(key)
+        if history is None:
+            history = self.histories[key] = deque(maxlen=self.history_size)
+            if len(self.histories) > self.max_users:
+                self.histories.popitem(last=False)
+        else:
+            self.histories.move_to_end(key)
+        
+        if digest in history:
+            return 'duplicate'
+        history.append(digest)
+        
+        if len(text) >= self.bloom_min_length:
+            self._rotate(time.monotonic())
+            if digest in self.current or digest in self.previous:
+                return 'copypasta'
+            self.current.add(digest)
+        
+        if len(text) >= self.entropy_min_length and char_entropy(text) < self.min_entropy:
+            return 'low_entropy'
+        
+        return None
+    
+    def stats(self):
+        """Counters plus the average check time in microseconds"""
+        checked = self.counters['checked']
+        return {
+            **{reason: self.counters[reason] for reason in ('checked', 'accepted', 'duplicate', 'copypasta', 'low_entropy')},
+            'tracked_users': len(self.histories),
+            'avg_check_us': self.check_seconds / checked * 1e6 if checked else 0.0
+        }
+    
+    def clear(self):
+        """Drop all remembered digests (counters are kept)"""
+        self.histories.clear()
+        self.current = BloomFilter(self.bloom_bits)
+        self.previous = BloomFilter(self.bloom_bits)
@@ -0,0 +1,275 @@
+import contextlib
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+
+import bson
+
+logger = logging.getLogger(__name__)
+
+# Record layout: payload length and CRC32, both little-endian uint32, then the BSON payload
+HEADER = struct.Struct('<II')
+
+class CircuitBreaker:
+    """Stops calling a failing dependency until a cool-down has passed
+    
+    Closed: calls go through. After `failure_threshold` consecutive failures it
+    opens and calls are refused for `reset_timeout` seconds, then one trial call
+    is let through (half open); its outcome closes or re-opens the breaker.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, failure_threshold=3, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+    
+    def allow(self):
+        """Whether a call may be attempted now"""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+    
+    def success(self):
+        with self.lock:
+            if self.state != self.CLOSED:
+                logger.info("Circuit breaker closed, dependency recovered")
+            self.state = self.CLOSED
+            self.failures = 0
+    
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit breaker opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+    
+    def trip(self):
+        """Open the breaker immediately"""
+        with self.lock:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+    
+    @contextlib.contextmanager
+    def attempt(self, connection_errors):
+        """Resolve one allowed call by its outcome
+        
+        Only `connection_errors` count as failures. Any other error means the
+        dependency answered, so it counts as a success; either way a half-open
+        trial is always settled and the exception propagates.
+        """
+        failed = False
+        try:
+            yield
+        except connection_errors:
+            failed = True
+            raise
+        finally:
+            if failed:
+                self.failure()
+            else:
+                self.success()
+
+class ReplayInterrupted(Exception):
+    """Raised by a replay callback that stopped part way through a batch
+    
+    `applied` leading records of the batch were written and are not replayed
+    again; the error that stopped the batch is the exception's __cause__.
+    """
+    def __init__(self, applied):
+        super().__init__(f"replay interrupted after {applied} records")
+        self.applied = applied
+
+class Spool:
+    """Append-only on-disk log of pending writes
+    
+    Records are length-prefixed, checksummed BSON documents. Appends are
+    buffered and fsynced in groups (every `fsync_batch` records or
+    `fsync_interval` seconds, whichever comes first). Replay moves the active
+    file aside so new writes keep appending while the old ones drain, and
+    remembers its offset so an interrupted replay resumes after the last
+    record that was written. Records the callback rejects for good are moved
+    to a dead-letter file (`path.dead`, same format) instead of blocking the
+    rest. A torn record at the end of a file (crash mid-write) ends the replay
+    of that file.
+    """
+    def __init__(self, path, fsync_interval=1.0, fsync_batch=100):
+        self.path = path
+        self.replay_path = path + '.replay'
+        self.offset_path = path + '.replay.offset'
+        self.dead_letter_path = path + '.dead'
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = fsync_batch
+        self.lock = threading.Lock()
+        self.replay_lock = threading.Lock()
+        self.file = None
+        self.unsynced = 0
+        self.synced_at = time.monotonic()
+        self.appended = 0
+        self.replayed = 0
+        self.dead_lettered = 0
+    
+    def _open(self):
+        if self.file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self.file = open(self.path, 'ab')
+        return self.file
+    
+    def append(self, record):
+        """Append one record (a BSON-encodable dict)"""
+        payload = bson.encode(record)
+        with self.lock:
+            spool_file = self._open()
+            spool_file.write(HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+            self.unsynced += 1
+            self.appended += 1
+            if self.unsynced >= self.fsync_batch or time.monotonic() - self.synced_at >= self.fsync_interval:
+                self._sync()
+    
+    def _sync(self):
+        if self.file is not None and self.unsynced:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.synced_at = time.monotonic()
+    
+    def sync(self):
+        """fsync any buffered records"""
+        with self.lock:
+            self._sync()
+    
+    def pending(self):
+        """Bytes waiting to be replayed"""
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+            size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if os.path.exists(self.replay_path):
+            size += os.path.getsize(self.replay_path) - self._load_offset()
+        return size
+    
+    def _load_offset(self):
+        try:
+            with open(self.offset_path) as offset_file:
+                return int(offset_file.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+    
+    def _save_offset(self, offset):
+        with open(self.offset_path + '.tmp', 'w') as offset_file:
+            offset_file.write(str(offset))
+            offset_file.flush()
+            os.fsync(offset_file.fileno())
+        os.replace(self.offset_path + '.tmp', self.offset_path)
+    
+    def _rotate(self):
+        """Move the active file aside for replay (only if no earlier replay is unfinished)"""
+        with self.lock:
+            if os.path.exists(self.replay_path):
+                return True
+            if self.file is None and not os.path.exists(self.path):
+                return False
+            self._sync()
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            if os.path.getsize(self.path) == 0:
+                return False
+            os.replace(self.path, self.replay_path)
+            return True
+    
+    def _read_records(self, offset):
+        """Yield (end offset, record) pairs from the replay file starting at offset"""
+        with open(self.replay_path, 'rb') as replay_file:
+            replay_file.seek(offset)
+            while True:
+                header = replay_file.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    break
+                length, checksum = HEADER.unpack(header)
+                payload = replay_file.read(length)
+                if len(payload) < length or zlib.crc32(payload) != checksum:
+                    logger.warning(f"Spool {self.replay_path} has a torn record at offset {offset}, ignoring the rest")
+                    break
+                offset += HEADER.size + length
+                yield offset, bson.decode(payload)
+    
+    def _dead_letter(self, record, error):
+        """Set a record aside in the dead-letter file with the error that rejected it"""
+        payload = bson.encode({**record, 'error': f"{type(error).__name__}: {error}", 'failed_at': time.time()})
+        with open(self.dead_letter_path, 'ab') as dead_file:
+            dead_file.write(HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+            dead_file.flush()
+            os.fsync(dead_file.fileno())
+        self.dead_lettered += 1
+        logger.error(f"Moved spooled {record.get('op')} to {self.dead_letter_path}: {error}")
+    
+    def _apply(self, apply_batch, batch, ends):
+        """Apply one batch and checkpoint after it, or after its last written record if it stops part way"""
+        try:
+            rejected = apply_batch(batch) or []
+        except ReplayInterrupted as e:
+            if e.applied:
+                self._save_offset(ends[e.applied - 1])
+                self.replayed += e.applied
+            raise (e.__cause__ or e)
+        
+        for record, error in rejected:
+            self._dead_letter(record, error)
+        self._save_offset(ends[-1])
+        self.replayed += len(batch) - len(rejected)
+        return len(batch) - len(rejected)
+    
+    def replay(self, apply_batch, batch_size=500):
+        """Feed spooled records to apply_batch(records) in order, returns records replayed
+        
+        apply_batch returns the (record, error) pairs it rejected for good, which
+        go to the dead-letter file. It raises ReplayInterrupted (or any other
+        error) if it could not finish; replay then resumes after the records it
+        reports as written. Only one replay runs at a time.
+        """
+        if not self.replay_lock.acquire(blocking=False):
+            return 0
+        try:
+            replayed = 0
+            while self._rotate():
+                batch = []
+                ends = []
+                for end, record in self._read_records(self._load_offset()):
+                    batch.append(record)
+                    ends.append(end)
+                    if len(batch) >= batch_size:
+                        replayed += self._apply(apply_batch, batch, ends)
+                        batch = []
+                        ends = []
+                if batch:
+                    replayed += self._apply(apply_batch, batch, ends)
+                
+                os.remove(self.replay_path)
+                if os.path.exists(self.offset_path):
+                    os.remove(self.offset_path)
+            return replayed
+        finally:
+            self.replay_lock.release()
+    
+    def close(self):
+        """fsync and close the active file"""
+        with self.lock:
+            self._sync()
+            if self.file is not None:
+                self.file.close()
+                self.file = None
@@ -0,0 +1,201 @@
+"""Bulk export/import of the bot's MongoDB collections
+
+Usage:
+    python bot/transfer.py export --dir backups/ [--guild ID] [--collections users user_levels]
+    python bot/transfer.py import --dir backups/ [--guild ID] [--batch-size 1000] [--resume]
+
+Each collection is streamed to <dir>/<collection>.jsonl.zst as one Extended
+JSON document per line, so memory stays bounded regardless of collection size.
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import sys
+
+import zstandard
+from bson import json_util
+from pymongo import ReplaceOne
+
+# Add the bot directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import Database
+
+logger = logging.getLogger(__name__)
+
+COLLECTIONS = [
+    'users',
+    'user_levels',
+    'level_stats',
+    'level_roles',
+    'guild_settings',
+    'mute_timers',
+    'xp_daily',
+    'activity_daily',
+    'admin_logs',
+    'bug_reports',
+    'resources',
+    'role_requests'
+]
+# Fields identifying a document across clusters. Imports upsert on them, so a restored
+# document replaces the one the bot has recreated since instead of colliding with a
+# unique index or duplicating it. Event-like collections keep matching on _id.
+NATURAL_KEYS = {
+    'users': ('user_id', 'guild_id'),
+    'user_levels': ('user_id', 'guild_id'),
+    'level_stats': ('guild_id',),
+    'level_roles': ('guild_id',),
+    'guild_settings': ('guild_id',),
+    'mute_timers': ('guild_id', 'user_id'),
+    'xp_daily': ('guild_id', 'day', 'user_id'),
+    'activity_daily': ('guild_id', 'day')
+}
+CHECKPOINT_FILE = '.import-checkpoint.json'
+# Canonical mode keeps int32/int64/double and Decimal128 apart, so a backup restores the exact BSON types
+JSON_OPTIONS = json_util.CANONICAL_JSON_OPTIONS
+
+def collection_path(directory, collection_name):
+    """Path of a collection's export file"""
+    return os.path.join(directory, f"{collection_name}.jsonl.zst")
+
+def export_collection(db, collection_name, directory, guild_id=None, batch_size=1000, level=3):
+    """Stream one collection into a zstd-compressed JSONL file, returns the document count"""
+    query = {'guild_id': guild_id} if guild_id is not None else {}
+    cursor = db.get_collection(collection_name).find(query).sort('_id', 1).batch_size(batch_size)
+    
+    path = collection_path(directory, collection_name)
+    temp_path = path + '.tmp'
+    count = 0
+    with open(temp_path, 'wb') as raw:
+        compressor = zstandard.ZstdCompressor(level=level)
+        with compressor.stream_writer(raw) as compressed:
+            for document in cursor:
+                compressed.write(json_util.dumps(document, json_options=JSON_OPTIONS).encode('utf-8') + b"\n")
+                count += 1
+                if count % 100000 == 0:
+                    logger.info(f"{collection_name}: exported {count:,} documents")
+    
+    # Only replace a previous export once this one is complete
+    os.replace(temp_path, path)
+    return count
+
+def load_checkpoint(directory):
+    """Load the import checkpoint ({collection: lines done}), empty if none exists"""
+    path = os.path.join(directory, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as checkpoint_file:
+        return json.load(checkpoint_file)
+
+def save_checkpoint(directory, checkpoint):
+    """Atomically write the import checkpoint"""
+    path = os.path.join(directory, CHECKPOINT_FILE)
+    with open(path + '.tmp', 'w') as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file)
+    os.replace(path + '.tmp', path)
+
+def replace_operation(collection_name, document):
+    """Upsert of an exported document, matched on the collection's natural key when it has one
+    
+    Documents matched on a natural key are replaced without their _id (which is
+    immutable), so one the bot recreated since the export keeps its own.
+    """
+    key = NATURAL_KEYS.get(collection_name)
+    if key and all(field in document for field in key):
+        replacement = {field: value for field, value in document.items() if field != '_id'}
+        return ReplaceOne({field: document[field] for field in key}, replacement, upsert=True)
+    return ReplaceOne({'_id': document['_id']}, document, upsert=True)
+
+def import_collection(db, collection_name, directory, guild_id=None, batch_size=1000, checkpoint=None):
+    """Upsert one collection's export file in ordered batches, returns (read, written)
+    
+    Progress is recorded in the checkpoint after every batch, so an interrupted
+    import resumes from the last completed batch.
+    """
+    path = collection_path(directory, collection_name)
+    if not os.path.exists(path):
+        logger.warning(f"{collection_name}: no export file at {path}, skipping")
+        return 0, 0
+    
+    checkpoint = checkpoint if checkpoint is not None else {}
+    done = checkpoint.get(collection_name, 0)
+    if done == -1:
+        logger.info(f"{collection_name}: already imported, skipping")
+        return 0, 0
+    
+    collection = db.get_collection(collection_name)
+    read = 0
+    written = 0
+    operations = []
+    line_number = 0
+    
+    def flush():
+        nonlocal written, operations
+        if operations:
+            collection.bulk_write(operations, ordered=True)
+            written += len(operations)
+            operations = []
+        checkpoint[collection_name] = line_number
+        save_checkpoint(directory, checkpoint)
+    
+    with open(path, 'rb') as raw:
+        decompressor = zstandard.ZstdDecompressor()
+        with decompressor.stream_reader(raw) as compressed:
+            for line in io.TextIOWrapper(compressed, encoding='utf-8'):
+                line_number += 1
+                if line_number <= done or not line.strip():
+                    continue
+                
+                document = json_util.loads(line, json_options=JSON_OPTIONS)
+                read += 1
+                if guild_id is not None and document.get('guild_id') != guild_id:
+                    continue
+                
+                operations.append(replace_operation(collection_name, document))
+                if len(operations) >= batch_size:
+                    flush()
+                    logger.debug(f"{collection_name}: imported {written:,} documents")
+    
+    flush()
+    checkpoint[collection_name] = -1
+    save_checkpoint(directory, checkpoint)
+    return read, written
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or import the bot's MongoDB collections")
+    parser.add_argument('command', choices=['export', 'import'])
+    parser.add_argument('--dir', required=True, help="Directory holding the <collection>.jsonl.zst files")
+    parser.add_argument('--guild', type=int, default=None, help="Only export/import documents for this guild ID")
+    parser.add_argument('--collections', nargs='+', default=COLLECTIONS, choices=COLLECTIONS)
+    parser.add_argument('--batch-size', type=int, default=1000, help="Documents per cursor batch / bulk write")
+    parser.add_argument('--level', type=int, default=3, help="zstd compression level for export")
+    parser.add_argument('--resume', action='store_true', help="Resume an interrupted import from its checkpoint")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(
+        level=getattr(logging, os.getenv('LOGGING_LEVEL', 'INFO')),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    db = Database()
+    try:
+        if args.command == 'export':
+            os.makedirs(args.dir, exist_ok=True)
+            for collection_name in args.collections:
+                count = export_collection(db, collection_name, args.dir, args.guild, args.batch_size, args.level)
+                logger.info(f"{collection_name}: exported {count:,} documents")
+        else:
+            checkpoint = load_checkpoint(args.dir) if args.resume else {}
+            if not args.resume:
+                save_checkpoint(args.dir, checkpoint)
+            for collection_name in args.collections:
+                read, written = import_collection(db, collection_name, args.dir, args.guild, args.batch_size, checkpoint)
+                logger.info(f"{collection_name}: read {read:,} documents, upserted {written:,}")
+            os.remove(os.path.join(args.dir, CHECKPOINT_FILE))
+    finally:
+        db.close_connection()
+
+if __name__ == "__main__":
+    main()
@@ -14,24 +14,54 @@ db.admin_logs.createIndex({ "admin_id": 1 });
 db.admin_logs.createIndex({ "guild_id": 1 });
 db.admin_logs.createIndex({ "timestamp": -1 });
 db.admin_logs.createIndex({ "action": 1 });
+db.admin_logs.createIndex({ "guild_id": 1, "timestamp": -1 });
+db.admin_logs.createIndex({ "guild_id": 1, "admin_id": 1, "timestamp": -1 });
+db.admin_logs.createIndex({ "guild_id": 1, "target_id": 1, "timestamp": -1 });
+db.admin_logs.createIndex({ "guild_id": 1, "action": 1, "timestamp": -1 });
 
 db.createCollection('users');
 db.users.createIndex({ "user_id": 1, "guild_id": 1 }, { unique: true });
 db.users.createIndex({ "join_date": -1 });
 db.users.createIndex({ "last_activity": -1 });
 
+db.createCollection('user_levels');
+db.user_levels.createIndex({ "user_id": 1, "guild_id": 1 });
+db.user_levels.createIndex({ "guild_id": 1, "xp": -1, "user_id": 1, "level": 1 });
+
+db.createCollection('level_stats');
+db.level_stats.createIndex({ "guild_id": 1 }, { unique: true });
+
+db.createCollection('guild_settings');
+db.guild_settings.createIndex({ "guild_id": 1 }, { unique: true });
+
+db.createCollection('mute_timers');
+db.mute_timers.createIndex({ "guild_id": 1, "user_id": 1 }, { unique: true });
+
+db.createCollection('level_roles');
+db.level_roles.createIndex({ "guild_id": 1 }, { unique: true });
+
+db.createCollection('xp_daily');
+db.xp_daily.createIndex({ "guild_id": 1, "day": 1, "user_id": 1 }, { unique: true });
+db.xp_daily.createIndex({ "day": 1 }, { expireAfterSeconds: 400 * 86400 });
+
+db.createCollection('activity_daily');
+db.activity_daily.createIndex({ "guild_id": 1, "day": 1 }, { unique: true });
+db.activity_daily.createIndex({ "day": 1 }, { expireAfterSeconds: 400 * 86400 });
+
 db.createCollection('bug_reports');
 db.bug_reports.createIndex({ "user_id": 1 });
 db.bug_reports.createIndex({ "guild_id": 1 });
 db.bug_reports.createIndex({ "status": 1 });
 db.bug_reports.createIndex({ "timestamp": -1 });
+db.bug_reports.createIndex({ "guild_id": 1, "status": 1, "timestamp": -1 });
 
 db.createCollection('resources');
 db.resources.createIndex({ "user_id": 1 });
 db.resources.createIndex({ "guild_id": 1 });
 db.resources.createIndex({ "timestamp": -1 });
+db.resources.createIndex({ "guild_id": 1, "timestamp": -1, "_id": -1 });
 db.resources.createIndex({ "title": "text", "content": "text" });
 
 print('Database initialization completed successfully!');
-print('Collections created: role_requests, admin_logs, users, bug_reports, resources');
+print('Collections created: role_requests, admin_logs, users, user_levels, level_stats, level_roles, guild_settings, mute_timers, xp_daily, activity_daily, bug_reports, resources');
 print('Indexes created for optimal performance');
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'bot'))
+
+from spool import CircuitBreaker
+
+class Unreachable(Exception):
+    pass
+
+def half_open_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.failure()
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    return breaker
+
+def test_trial_with_server_error_closes_breaker():
+    breaker = half_open_breaker()
+    with pytest.raises(ValueError):
+        with breaker.attempt(Unreachable):
+            raise ValueError("rejected by the server")
+    
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert [breaker.allow() for _ in range(3)] == [True, True, True]
+
+def test_trial_with_connection_error_reopens_breaker():
+    breaker = half_open_breaker()
+    with pytest.raises(Unreachable):
+        with breaker.attempt(Unreachable):
+            raise Unreachable()
+    
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow()  # reset_timeout=0: the next trial is allowed straight away
+
+def test_successful_trial_closes_breaker():
+    breaker = half_open_breaker()
+    with breaker.attempt(Unreachable):
+        pass
+    
+    assert breaker.state == CircuitBreaker.CLOSED